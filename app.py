@@ -2,13 +2,15 @@ import streamlit as st
 from pages.holdings import show as show_holdings
 from pages.orderbook import show as show_orderbook
 from pages.trades import show as show_trades
-from pages.login import show as show_login
+from pages.login import show as show_login, restore_session
 from pages.place_order import show_place_order
 from pages.gtt_orderbook import show as show_gtt_orderbook
 from pages.positions import show as show_positions
 from pages.place_gtt_order import show_place_gtt_order
 from pages.place_oco_order import show_place_oco_order
 from pages.dashboard import show_dashboard
+from pages.rs_scanner import show as show_rs_scanner
+from pages.screener import show as show_screener
 
 # ---- Page config ----
 st.set_page_config(page_title="📊 Trade Dashboard", layout="wide")
@@ -38,7 +40,9 @@ page = st.sidebar.radio(
         "GTT Order Book",
         "Place GTT Order",
         "Place OCO Order",
-        "Dashboard"
+        "Dashboard",
+        "RS Scanner",
+        "Screener"
     ]
 )
 
@@ -46,7 +50,8 @@ page = st.sidebar.radio(
 if page == "Login":
     show_login()
 else:
-    # Check client is logged in
+    # Check client is logged in (a cached broker session counts)
+    restore_session()
     if "client" not in st.session_state:
         st.warning("⚠️ Please login first via Login page.")
         st.stop()
@@ -69,3 +74,7 @@ else:
         show_place_oco_order()
     elif page ==  "Dashboard":
         show_dashboard()
+    elif page == "RS Scanner":
+        show_rs_scanner()
+    elif page == "Screener":
+        show_screener()
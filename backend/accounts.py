@@ -0,0 +1,170 @@
+# backend/accounts.py
+import logging
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, Optional
+
+from requests.adapters import HTTPAdapter
+
+from .ratelimit import RateLimiter
+from .session import token_fingerprint
+
+log = logging.getLogger("backend.accounts")
+log.setLevel(logging.INFO)
+
+# Connections kept per host for one pooled client (worker pools + pages share them)
+POOL_MAXSIZE = 16
+
+
+class AccountRegistry:
+    """
+    Process-level pool of broker clients, one per uid. acquire() hands every browser
+    session the same client, so they share its HTTP connection pool, its rate limiter
+    (client.rate_limiter, picked up by OrdersService) and per-account caches
+    (account_state). Leases are reference counted; when the last one is released the
+    session renewal stops, per-account workers are shut down (see on_release) and the
+    connections are closed.
+    """
+
+    def __init__(self, pool_maxsize: int = POOL_MAXSIZE):
+        self.pool_maxsize = pool_maxsize
+        self._accounts: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _prepare(self, client) -> None:
+        session = getattr(client, "_session", None)
+        if session is not None:
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_maxsize)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        if getattr(client, "rate_limiter", None) is None:
+            client.rate_limiter = RateLimiter()
+
+    def acquire(self, uid: str, client, manager=None) -> Any:
+        """
+        Pooled client for `uid`. The first caller's `client` (and its SessionManager) is
+        registered; later callers get that same client and their own is discarded.
+        """
+        with self._lock:
+            entry = self._accounts.get(uid)
+            if entry is None:
+                if client is None:
+                    raise KeyError(f"account {uid} is not in the pool")
+                self._prepare(client)
+                entry = self._accounts[uid] = {
+                    "client": client, "manager": manager, "refs": 0, "state": {},
+                    "token_fp": token_fingerprint(getattr(client, "api_token", "")),
+                }
+                log.info("account %s added to pool", uid)
+            elif manager is not None and manager is not entry["manager"]:
+                # a fresh login may have invalidated the pooled session: adopt the newer key
+                pooled = entry["manager"]
+                if pooled is None or (manager.issued_at or 0) > (pooled.issued_at or 0):
+                    if pooled is not None:
+                        pooled.api_session_key, pooled.susertoken = manager.api_session_key, manager.susertoken
+                        pooled.issued_at = manager.issued_at
+                    entry["client"].api_session_key = manager.api_session_key
+                    entry["client"].susertoken = manager.susertoken
+                manager.stop_renewal()
+            entry["refs"] += 1
+            return entry["client"]
+
+    def lease(self, uid: str, client, manager=None) -> "AccountLease":
+        return AccountLease(self, uid, self.acquire(uid, client, manager))
+
+    def find(self, api_token: str) -> Optional[str]:
+        """uid of a pooled account logged in with `api_token`, if any."""
+        fp = token_fingerprint(api_token)
+        with self._lock:
+            return next((uid for uid, e in self._accounts.items() if e["token_fp"] == fp), None)
+
+    def release(self, uid: str) -> None:
+        with self._lock:
+            entry = self._accounts.get(uid)
+            if entry is None:
+                return
+            entry["refs"] -= 1
+            if entry["refs"] > 0:
+                return
+            del self._accounts[uid]
+        if entry["manager"] is not None:
+            entry["manager"].stop_renewal()
+        entry["state"].clear()
+        with _release_lock:
+            callbacks = list(_release_subscribers)
+        for cb in callbacks:
+            try:
+                cb(uid)
+            except Exception as e:
+                log.error("account release subscriber %r failed for %s: %s", cb, uid, e)
+        session = getattr(entry["client"], "_session", None)
+        if session is not None:
+            session.close()
+        log.info("account %s released from pool", uid)
+
+    def manager(self, uid: str):
+        with self._lock:
+            entry = self._accounts.get(uid)
+            return entry and entry["manager"]
+
+    def state(self, client) -> Optional[Dict[str, Any]]:
+        """Shared per-account dict for a pooled client (None if the client is not pooled)."""
+        with self._lock:
+            for entry in self._accounts.values():
+                if entry["client"] is client:
+                    return entry["state"]
+        return None
+
+    def refs(self, uid: str) -> int:
+        with self._lock:
+            entry = self._accounts.get(uid)
+            return entry["refs"] if entry else 0
+
+
+class AccountLease:
+    """
+    One session's hold on a pooled client. Released explicitly (logout) or when the
+    lease is garbage collected with the browser session's state.
+    """
+
+    def __init__(self, registry: AccountRegistry, uid: str, client):
+        self.uid = uid
+        self.client = client
+        self._finalizer = weakref.finalize(self, registry.release, uid)
+
+    def release(self) -> None:
+        self._finalizer()
+
+
+_release_subscribers: List[Callable[[str], None]] = []
+_release_lock = threading.Lock()
+
+
+def on_release(callback: Callable[[str], None]) -> None:
+    """Register `callback(uid)`, called when an account leaves the pool (its client is about to close)."""
+    with _release_lock:
+        if callback not in _release_subscribers:
+            _release_subscribers.append(callback)
+
+
+_registry: Optional[AccountRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_account_registry() -> AccountRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = AccountRegistry()
+        return _registry
+
+
+_unpooled: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def account_state(client) -> Dict[str, Any]:
+    """Per-account dict for caches shared by every session using `client`."""
+    state = get_account_registry().state(client)
+    if state is None:
+        state = _unpooled.setdefault(client, {})
+    return state
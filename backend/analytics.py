@@ -0,0 +1,199 @@
+# backend/analytics.py
+import hashlib
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .bars import BarStore
+
+log = logging.getLogger("backend.analytics")
+log.setLevel(logging.INFO)
+
+ANALYTICS_CACHE_DIR = "data/cache/analytics"
+TRADING_DAYS = 252
+# Exchange a holding is analysed on, in order of preference
+HOLDING_EXCHANGES = ("NSE", "BSE")
+
+
+def trading_day(now: Optional[datetime] = None) -> date:
+    """Current trading day; weekends roll back to Friday."""
+    d = (now or datetime.now()).date()
+    while d.weekday() >= 5:
+        d -= timedelta(days=1)
+    return d
+
+
+def flatten_holdings(resp: Any, exchanges: Sequence[str] = HOLDING_EXCHANGES) -> pd.DataFrame:
+    """
+    One row per holding from a /holdings response, listed on the first of `exchanges`
+    it trades on (NSE, else BSE), with that exchange kept in the row
+    (quantity = dp_qty + t1_qty + holding_used, as on the dashboard).
+    """
+    items = resp.get("data", []) if isinstance(resp, dict) else (resp or [])
+    rows: List[Dict[str, Any]] = []
+    for item in items:
+        qty = float(item.get("dp_qty", 0) or 0) + float(item.get("t1_qty", 0) or 0) + float(item.get("holding_used", 0) or 0)
+        listed = {sym.get("exchange"): sym for sym in item.get("tradingsymbol", []) or []}
+        exchange = next((ex for ex in exchanges if ex in listed), None)
+        if exchange is None:
+            continue
+        sym = listed[exchange]
+        rows.append({
+            "symbol": sym.get("tradingsymbol"),
+            "token": str(sym.get("token")),
+            "exchange": exchange,
+            "quantity": qty,
+            "avg_buy_price": float(item.get("avg_buy_price", 0) or 0),
+        })
+    return pd.DataFrame(rows, columns=["symbol", "token", "exchange", "quantity", "avg_buy_price"])
+
+
+def portfolio_metrics(
+    closes: pd.DataFrame,
+    quantities: pd.Series,
+    benchmark: pd.Series,
+    vol_window: int = 20,
+) -> Dict[str, Any]:
+    """
+    Vectorized analytics for a fixed set of holdings (`closes` is DateTime x symbol,
+    `quantities` is indexed by symbol). Daily portfolio returns weight each asset's
+    return by its previous-day value (today's quantities), over the assets priced on
+    both days, so a holding with a shorter history joins without a jump; the equity
+    curve compounds those returns and ends at today's value.
+    """
+    closes = closes.sort_index().ffill().dropna(how="all")
+    qty = quantities.reindex(closes.columns).fillna(0.0)
+    value = closes * qty
+    priced = value.notna() & (qty > 0)
+    closes = closes[priced.any(axis=1)]
+    value = value.loc[closes.index]
+    prev = value.shift(1)
+    overlap = value.notna() & prev.notna()
+    base = prev.where(overlap).sum(axis=1)
+    rets = ((value - prev).where(overlap).sum(axis=1) / base.where(base > 0)).fillna(0.0)
+    growth = (1.0 + rets).cumprod()
+    equity = value.iloc[-1].sum() * growth / growth.iloc[-1] if len(growth) else growth
+    rets = rets.iloc[1:].reindex(equity.index)
+
+    asset_rets = closes.pct_change()
+    bench = benchmark.sort_index().reindex(equity.index).ffill()
+    bench_rets = bench.pct_change()
+
+    drawdown = equity / equity.cummax() - 1.0
+    rolling_vol = rets.rolling(vol_window, min_periods=vol_window).std() * np.sqrt(TRADING_DAYS)
+
+    both = pd.concat([rets, bench_rets], axis=1, keys=["p", "b"]).dropna()
+    var_b = both["b"].var()
+    beta = float(both["p"].cov(both["b"]) / var_b) if var_b and len(both) > 2 else None
+    corr_b = float(both["p"].corr(both["b"])) if len(both) > 2 else None
+
+    aligned = asset_rets.loc[both.index]
+    b = both["b"]
+    asset_beta = (aligned.sub(aligned.mean()).mul(b - b.mean(), axis=0).sum() / (len(b) - 1)) / var_b if var_b else pd.Series(dtype=float)
+
+    curve = pd.DataFrame({
+        "equity": equity,
+        "drawdown_%": drawdown * 100.0,
+        "rolling_vol_%": rolling_vol * 100.0,
+        "benchmark_rebased": bench / bench.dropna().iloc[0] * equity.iloc[0] if bench.notna().any() else np.nan,
+    })
+    metrics = {
+        "start": equity.index.min(),
+        "end": equity.index.max(),
+        "start_value": float(equity.iloc[0]),
+        "end_value": float(equity.iloc[-1]),
+        "total_return_%": float((equity.iloc[-1] / equity.iloc[0] - 1.0) * 100.0),
+        "max_drawdown_%": float(drawdown.min() * 100.0),
+        "max_drawdown_date": drawdown.idxmin(),
+        "annual_vol_%": float(rets.std() * np.sqrt(TRADING_DAYS) * 100.0),
+        "beta": beta,
+        "corr_to_benchmark": corr_b,
+    }
+    return {
+        "metrics": metrics,
+        "curve": curve,
+        "correlation": asset_rets.corr(),
+        "asset_beta": asset_beta.rename("beta"),
+    }
+
+
+class PortfolioAnalytics:
+    """
+    Equity curve, drawdown, volatility, beta and correlations for the current holdings.
+    Results are pickled per trading day and holdings fingerprint, so only the first
+    render of the day pays for the bar refresh and computation.
+    """
+
+    def __init__(self, api_client, bars: Optional[BarStore] = None, cache_dir: str = ANALYTICS_CACHE_DIR):
+        self.client = api_client
+        self.bars = bars or BarStore(api_client)
+        self.cache_dir = cache_dir
+
+    def fetch_holdings(self) -> pd.DataFrame:
+        return flatten_holdings(self.client.holdings())
+
+    def _cache_path(self, holdings: pd.DataFrame, benchmark_key: str, lookback_days: int, vol_window: int, day: date) -> str:
+        cols = [c for c in ("exchange", "token", "quantity") if c in holdings.columns]
+        fp = holdings[cols].sort_values(cols[:-1]).to_csv(index=False)
+        key = hashlib.sha1(f"{fp}|{benchmark_key}|{lookback_days}|{vol_window}".encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{day:%Y%m%d}_{key}.pkl")
+
+    def compute(
+        self,
+        holdings: pd.DataFrame,
+        benchmark_segment: str = "NSE",
+        benchmark_token: str = "26000",
+        lookback_days: int = 365,
+        vol_window: int = 20,
+        refresh_bars: bool = True,
+    ) -> Dict[str, Any]:
+        segments = holdings["exchange"].astype(str) if "exchange" in holdings.columns else pd.Series("NSE", index=holdings.index)
+        panels = []
+        for segment, tokens in holdings["token"].astype(str).groupby(segments):
+            if refresh_bars and self.bars.client is not None:
+                self.bars.refresh(segment, tokens.tolist(), days=lookback_days + 30)
+            panels.append(self.bars.panel(segment, tokens.tolist(), "Close"))
+        if refresh_bars and self.bars.client is not None:
+            self.bars.fetch(benchmark_segment, str(benchmark_token), days=lookback_days + 30)
+        closes = pd.concat(panels, axis=1).sort_index() if panels else pd.DataFrame()
+        cutoff = pd.Timestamp(datetime.now() - timedelta(days=lookback_days))
+        closes = closes[closes.index >= cutoff]
+        sym_by_token = dict(zip(holdings["token"].astype(str), holdings["symbol"]))
+        closes = closes.rename(columns=sym_by_token).rename_axis(columns="symbol")
+        quantities = holdings.groupby("symbol")["quantity"].sum()
+        benchmark = self.bars.series(benchmark_segment, str(benchmark_token), "Close")
+        if closes.empty:
+            raise ValueError("no cached bars for holdings")
+        return portfolio_metrics(closes, quantities, benchmark, vol_window=vol_window)
+
+    def get(
+        self,
+        holdings: Optional[pd.DataFrame] = None,
+        benchmark_segment: str = "NSE",
+        benchmark_token: str = "26000",
+        lookback_days: int = 365,
+        vol_window: int = 20,
+        force: bool = False,
+    ) -> Dict[str, Any]:
+        if holdings is None:
+            holdings = self.fetch_holdings()
+        if holdings.empty:
+            raise ValueError("no holdings")
+        day = trading_day()
+        path = self._cache_path(holdings, f"{benchmark_segment}|{benchmark_token}", lookback_days, vol_window, day)
+        if not force and os.path.exists(path):
+            try:
+                return pd.read_pickle(path)
+            except Exception as e:
+                log.error("analytics cache read failed for %s: %s", path, e)
+        result = self.compute(holdings, benchmark_segment, benchmark_token, lookback_days, vol_window)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for old in os.listdir(self.cache_dir):
+            if not old.startswith(f"{day:%Y%m%d}_"):
+                os.remove(os.path.join(self.cache_dir, old))
+        pd.to_pickle(result, path)
+        return result
@@ -3,6 +3,8 @@ import logging
 from typing import Any, Dict, Optional
 import requests
 
+from .journal import ORDER_ENDPOINTS, journaled
+
 log = logging.getLogger("backend.api_client")
 log.setLevel(logging.INFO)
 
@@ -67,12 +69,22 @@ class APIClient:
         return hdr
 
     def get(self, path: str) -> Any:
+        if ORDER_ENDPOINTS.match(path):
+            return journaled(path, None, lambda: self._get(path))
+        return self._get(path)
+
+    def post(self, path: str, json: Optional[Dict[str, Any]] = None) -> Any:
+        if ORDER_ENDPOINTS.match(path):
+            return journaled(path, json, lambda: self._post(path, json))
+        return self._post(path, json)
+
+    def _get(self, path: str) -> Any:
         url = path if path.startswith("http") else f"{BASE_API}{path}"
         r = self._session.get(url, headers=self._headers(), timeout=self.timeout)
         r.raise_for_status()
         return r.json()
 
-    def post(self, path: str, json: Optional[Dict[str, Any]] = None) -> Any:
+    def _post(self, path: str, json: Optional[Dict[str, Any]] = None) -> Any:
         url = path if path.startswith("http") else f"{BASE_API}{path}"
         r = self._session.post(url, headers=self._headers(), json=json or {}, timeout=self.timeout)
         r.raise_for_status()
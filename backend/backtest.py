@@ -0,0 +1,236 @@
+# backend/backtest.py
+import logging
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .bars import BarStore
+from .orders import DEFAULT_SL_PCT, DEFAULT_TARGET_PCTS
+
+log = logging.getLogger("backend.backtest")
+log.setLevel(logging.INFO)
+
+
+def _first_true(mask: np.ndarray, sentinel: int) -> np.ndarray:
+    """Index of the first True along the last axis, `sentinel` where there is none."""
+    hit = mask.any(axis=-1)
+    return np.where(hit, mask.argmax(axis=-1), sentinel)
+
+
+# Entries simulated per pass: each pass gathers (entries x max_hold) windows, so this bounds memory
+ENTRY_CHUNK = 20000
+
+
+def simulate_ladder(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    entries: np.ndarray,
+    sl_pct: Optional[float] = DEFAULT_SL_PCT,
+    target_pcts: Sequence[float] = DEFAULT_TARGET_PCTS,
+    max_hold: int = 60,
+    open_: Optional[np.ndarray] = None,
+    target_weights: Optional[Sequence[float]] = None,
+    chunk: int = ENTRY_CHUNK,
+) -> Dict[str, np.ndarray]:
+    """
+    Simulate the SL/target levels of OrdersService.build_gtt_oco_payloads_from_holding
+    for every entry at once. Inputs are (bars x symbols) arrays; `entries` marks bars whose
+    close is the average buy price.
+
+    Semantics per trade:
+      - quantity is split across the targets (equal weights unless given); each target leg
+        sells its share the first bar the high reaches it (at the open if it gapped through).
+        The live payloads put the full quantity on every leg, so there the first target
+        reached sells everything: pass target_weights=(1, 0, ...) to simulate exactly that
+      - the stop sells whatever is still held the first bar the low reaches it (at the open
+        on a gap down) and cancels the remaining targets (OCO)
+      - when stop and target trigger on the same bar the stop is assumed first
+      - once every target has filled the stop is cancelled
+      - anything left after `max_hold` bars (or at the end of data) exits at that bar's close
+    Entries without a single later bar (e.g. on the last bar) are dropped. Entries are
+    processed `chunk` at a time. Returns flat per-trade arrays.
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    opn = np.asarray(open_, dtype=float) if open_ is not None else None
+    targets = np.asarray(target_pcts, dtype=float)
+    K = len(targets)
+    if target_weights is None:
+        weights = np.full(K, 1.0 / K) if K else np.zeros(0)
+    else:
+        weights = np.asarray(target_weights, dtype=float)
+
+    ti, si = np.nonzero(np.asarray(entries, dtype=bool) & np.isfinite(close))
+    step = max(1, int(chunk))
+    parts = [
+        _simulate_entries(high, low, close, opn, ti[i:i + step], si[i:i + step], sl_pct, targets, weights, int(max_hold))
+        for i in range(0, len(ti), step)
+    ] or [_simulate_entries(high, low, close, opn, ti, si, sl_pct, targets, weights, int(max_hold))]
+    return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+
+def _simulate_entries(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    opn: Optional[np.ndarray],
+    ti: np.ndarray,
+    si: np.ndarray,
+    sl_pct: Optional[float],
+    targets: np.ndarray,
+    weights: np.ndarray,
+    H: int,
+) -> Dict[str, np.ndarray]:
+    n_bars = close.shape[0]
+    K = len(targets)
+    rows = ti[:, None] + np.arange(1, H + 1)[None, :]                 # (E, H)
+    valid = rows < n_bars
+    rows = np.minimum(rows, n_bars - 1)
+    cols = si[:, None]
+    valid &= np.isfinite(close[rows, cols])
+    # no forward bar at all: nothing to simulate
+    keep = valid.any(axis=1)
+    ti, si, rows, cols, valid = ti[keep], si[keep], rows[keep], cols[keep], valid[keep]
+    entry = close[ti, si]
+    hi = np.where(valid, high[rows, cols], np.nan)
+    lo = np.where(valid, low[rows, cols], np.nan)
+    cl = np.where(valid, close[rows, cols], np.nan)
+
+    # stop
+    if sl_pct is not None:
+        stop_px = entry * (1.0 + sl_pct / 100.0)
+        t_stop = _first_true(lo <= stop_px[:, None], H)
+    else:
+        stop_px = np.full(len(entry), np.nan)
+        t_stop = np.full(len(entry), H)
+    stopped = t_stop < H
+
+    # targets: first bar the running high reaches each level
+    run_hi = np.fmax.accumulate(np.where(np.isfinite(hi), hi, -np.inf), axis=1)
+    tgt_px = entry[:, None] * (1.0 + targets[None, :] / 100.0)          # (E, K)
+    t_tgt = np.zeros((len(entry), K), dtype=int)
+    for k in range(K):
+        t_tgt[:, k] = _first_true(run_hi >= tgt_px[:, k:k + 1], H)
+    filled = t_tgt < t_stop[:, None]                                   # stop wins ties
+
+    if opn is not None:
+        op = np.where(valid, opn[rows, cols], np.nan)
+        stop_open = np.take_along_axis(op, np.minimum(t_stop, H - 1)[:, None], axis=1)[:, 0]
+        tgt_open = np.take_along_axis(op, np.minimum(t_tgt, H - 1), axis=1)
+        stop_fill = np.fmin(stop_px, stop_open)
+        tgt_fill = np.fmax(tgt_px, tgt_open)
+    else:
+        stop_fill = stop_px
+        tgt_fill = tgt_px
+
+    tgt_ret = np.where(filled, weights[None, :] * (tgt_fill / entry[:, None] - 1.0), 0.0).sum(axis=1)
+    remaining = 1.0 - (filled * weights[None, :]).sum(axis=1)
+    all_filled = remaining <= 1e-9
+
+    last_valid = H - 1 - np.argmax(valid[:, ::-1], axis=1)
+    timeout_px = np.take_along_axis(cl, last_valid[:, None], axis=1)[:, 0]
+    exit_px = np.where(stopped & ~all_filled, stop_fill, timeout_px)
+    ret = tgt_ret + np.where(all_filled, 0.0, remaining * (exit_px / entry - 1.0))
+
+    last_tgt = np.where(filled, t_tgt, -1).max(axis=1) if K else np.full(len(entry), -1)
+    exit_bar = np.where(all_filled, last_tgt, np.where(stopped, t_stop, last_valid))
+    reason = np.where(all_filled, "targets", np.where(stopped, "stop", "timeout"))
+
+    return {
+        "entry_bar": ti,
+        "symbol_idx": si,
+        "entry_price": entry,
+        "return_pct": ret * 100.0,
+        "holding_bars": exit_bar + 1,
+        "exit_reason": reason,
+        "stop_hit": stopped & ~all_filled,
+        "targets_filled": filled,
+    }
+
+
+def summarize(trades: pd.DataFrame, target_pcts: Sequence[float] = DEFAULT_TARGET_PCTS) -> Dict[str, Any]:
+    """Hit rates, expectancy and holding time for a trades table from LadderBacktester.run."""
+    if trades.empty:
+        return {"trades": 0}
+    ret = trades["return_pct"]
+    wins, losses = ret[ret > 0], ret[ret <= 0]
+    out = {
+        "trades": int(len(trades)),
+        "win_rate_%": float((ret > 0).mean() * 100.0),
+        "stop_rate_%": float(trades["stop_hit"].mean() * 100.0),
+        "all_targets_rate_%": float((trades["exit_reason"] == "targets").mean() * 100.0),
+        "timeout_rate_%": float((trades["exit_reason"] == "timeout").mean() * 100.0),
+        "expectancy_%": float(ret.mean()),
+        "avg_win_%": float(wins.mean()) if len(wins) else 0.0,
+        "avg_loss_%": float(losses.mean()) if len(losses) else 0.0,
+        "avg_holding_bars": float(trades["holding_bars"].mean()),
+        "median_holding_bars": float(trades["holding_bars"].median()),
+    }
+    for pct in target_pcts:
+        col = f"target_{pct:g}_hit"
+        if col in trades.columns:
+            out[f"target_{pct:g}_hit_rate_%"] = float(trades[col].mean() * 100.0)
+    return out
+
+
+class LadderBacktester:
+    """
+    Backtests the SL/target GTT ladder on cached bars (daily or intraday), vectorized
+    across all entries and symbols.
+    """
+
+    def __init__(self, bars: BarStore):
+        self.bars = bars
+
+    def run(
+        self,
+        segment: str,
+        tokens: Sequence[str],
+        entries: Optional[pd.DataFrame] = None,
+        sl_pct: Optional[float] = DEFAULT_SL_PCT,
+        target_pcts: Sequence[float] = DEFAULT_TARGET_PCTS,
+        max_hold: int = 60,
+        timeframe: str = "day",
+        entry_step: int = 1,
+    ) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """
+        `entries` is a boolean DateTime x token frame of entry bars; without it every
+        `entry_step`-th bar of every token is an entry. Returns (trades, summary).
+        """
+        panels = self.bars.panels(segment, tokens, ["Open", "High", "Low", "Close"], timeframe)
+        close = panels["Close"]
+        if close.empty:
+            return pd.DataFrame(), summarize(pd.DataFrame())
+        cols = close.columns
+        high = panels["High"].reindex(index=close.index, columns=cols)
+        low = panels["Low"].reindex(index=close.index, columns=cols)
+        opn = panels["Open"].reindex(index=close.index, columns=cols)
+
+        if entries is None:
+            mask = np.zeros(close.shape, dtype=bool)
+            mask[::max(1, int(entry_step)), :] = True
+        else:
+            mask = entries.reindex(index=close.index, columns=cols).fillna(False).to_numpy(dtype=bool)
+
+        res = simulate_ladder(
+            high.to_numpy(), low.to_numpy(), close.to_numpy(), mask,
+            sl_pct=sl_pct, target_pcts=target_pcts, max_hold=max_hold, open_=opn.to_numpy(),
+        )
+        trades = pd.DataFrame({
+            "token": cols[res["symbol_idx"]].astype(str),
+            "entry_time": close.index[res["entry_bar"]],
+            "entry_price": res["entry_price"],
+            "return_pct": res["return_pct"],
+            "holding_bars": res["holding_bars"],
+            "exit_reason": res["exit_reason"],
+            "stop_hit": res["stop_hit"],
+        })
+        for k, pct in enumerate(target_pcts):
+            trades[f"target_{pct:g}_hit"] = res["targets_filled"][:, k]
+        summary = summarize(trades, target_pcts)
+        summary.update({"sl_pct": sl_pct, "target_pcts": list(target_pcts), "max_hold": max_hold})
+        log.info("ladder backtest %s: %d trades, expectancy %.3f%%", segment, len(trades), summary.get("expectancy_%", 0.0))
+        return trades, summary
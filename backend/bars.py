@@ -0,0 +1,175 @@
+# backend/bars.py
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from .master_diff import subscribe
+
+log = logging.getLogger("backend.bars")
+log.setLevel(logging.INFO)
+
+BAR_DIR = "data/bars"
+OHLCV_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def parse_history_csv(csv_text: str) -> pd.DataFrame:
+    """
+    Parse the headerless CSV returned by the history endpoint
+    (DateTime as ddmmyyyyHHMM, O, H, L, C, V[, OI]).
+    """
+    if not csv_text or not csv_text.strip():
+        return pd.DataFrame()
+    df = pd.read_csv(io.StringIO(csv_text), header=None)
+    if df.shape[1] == 7:
+        df.columns = ["DateTime", "Open", "High", "Low", "Close", "Volume", "OI"]
+    elif df.shape[1] == 6:
+        df.columns = ["DateTime", "Open", "High", "Low", "Close", "Volume"]
+    else:
+        return pd.DataFrame()
+    df["DateTime"] = pd.to_datetime(df["DateTime"].astype(str), format="%d%m%Y%H%M", errors="coerce")
+    df = df.dropna(subset=["DateTime"]).sort_values("DateTime")
+    return df.drop_duplicates(subset=["DateTime"]).reset_index(drop=True)
+
+
+class BarStore:
+    """
+    On-disk cache of OHLCV bars, one pickle per (segment, timeframe, token).
+    Scanners and engines read from here; fetch()/refresh() top it up from the API.
+    """
+
+    def __init__(self, api_client=None, root: str = BAR_DIR):
+        self.client = api_client
+        self.root = root
+
+    def path(self, segment: str, token: str, timeframe: str = "day") -> str:
+        return os.path.join(self.root, segment, timeframe, f"{token}.pkl")
+
+    def load(self, segment: str, token: str, timeframe: str = "day") -> pd.DataFrame:
+        p = self.path(segment, str(token), timeframe)
+        if not os.path.exists(p):
+            return pd.DataFrame()
+        try:
+            return pd.read_pickle(p)
+        except Exception as e:
+            log.error("bar cache read failed for %s: %s", p, e)
+            return pd.DataFrame()
+
+    def save(self, segment: str, token: str, timeframe: str, df: pd.DataFrame) -> None:
+        p = self.path(segment, str(token), timeframe)
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        tmp = p + ".tmp"
+        df.to_pickle(tmp)
+        os.replace(tmp, p)
+
+    def fetch(self, segment: str, token: str, timeframe: str = "day", days: int = 400) -> pd.DataFrame:
+        """
+        Fetch bars from the API and merge them into the cache. When the token is
+        already cached only the bars since the last cached one are requested.
+        """
+        if self.client is None:
+            raise ValueError("BarStore.fetch requires an api client")
+        cached = self.load(segment, token, timeframe)
+        now = datetime.now()
+        start = now - timedelta(days=days)
+        if not cached.empty:
+            start = max(start, cached["DateTime"].iloc[-1].to_pydatetime() - timedelta(days=1))
+        csv_text = self.client.historical_csv(
+            segment=segment, token=str(token), timeframe=timeframe,
+            frm=start.strftime("%d%m%Y%H%M"), to=now.strftime("%d%m%Y%H%M"),
+        )
+        fresh = parse_history_csv(csv_text)
+        if cached.empty:
+            merged = fresh
+        elif fresh.empty:
+            merged = cached
+        else:
+            merged = pd.concat([cached, fresh], ignore_index=True)
+            merged = merged.drop_duplicates(subset=["DateTime"], keep="last").sort_values("DateTime").reset_index(drop=True)
+        if not merged.empty:
+            self.save(segment, token, timeframe, merged)
+        return merged
+
+    def refresh(self, segment: str, tokens: Iterable[str], timeframe: str = "day", days: int = 400, max_workers: int = 8) -> Dict[str, bool]:
+        """
+        Top up the cache for many tokens concurrently (network bound, so threads).
+        Returns token -> success.
+        """
+        def _one(tok: str) -> bool:
+            try:
+                return not self.fetch(segment, tok, timeframe, days).empty
+            except Exception as e:
+                log.error("bar refresh failed for %s|%s: %s", segment, tok, e)
+                return False
+
+        toks = [str(t) for t in tokens]
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            return dict(zip(toks, ex.map(_one, toks)))
+
+    def panels(self, segment: str, tokens: Iterable[str], fields: List[str] = None, timeframe: str = "day", tail: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Wide (DateTime x token) frames, one per field, built from the cached bars.
+        Tokens without cached bars are left out.
+        """
+        fields = fields or OHLCV_FIELDS
+        frames = {}
+        for tok in tokens:
+            df = self.load(segment, str(tok), timeframe)
+            if df.empty:
+                continue
+            if tail:
+                df = df.tail(tail)
+            frames[str(tok)] = df.set_index("DateTime")
+        if not frames:
+            return {f: pd.DataFrame() for f in fields}
+        stacked = pd.concat(frames, axis=1, names=["token", "field"])
+        out = {}
+        for f in fields:
+            if f in stacked.columns.get_level_values("field"):
+                out[f] = stacked.xs(f, axis=1, level="field").sort_index()
+            else:
+                out[f] = pd.DataFrame(index=stacked.index)
+        return out
+
+    def panel(self, segment: str, tokens: Iterable[str], field: str = "Close", timeframe: str = "day", tail: Optional[int] = None) -> pd.DataFrame:
+        return self.panels(segment, tokens, [field], timeframe, tail)[field]
+
+    def series(self, segment: str, token: str, field: str = "Close", timeframe: str = "day") -> pd.Series:
+        df = self.load(segment, token, timeframe)
+        if df.empty:
+            return pd.Series(dtype=float)
+        return df.set_index("DateTime")[field]
+
+    def apply_master_diff(self, diff: Dict) -> Dict[str, int]:
+        """
+        Carry cached bars across a master refresh: drop expired contracts, then move
+        re-tokenised ones to their new token, for every cached timeframe.
+        """
+        moved = dropped = 0
+        # deletes first: a removed contract's token may be the one another contract moves to
+        for seg, tok in diff["removed"][["SEGMENT", "TOKEN"]].itertuples(index=False):
+            for tf in self._timeframes(seg):
+                p = self.path(seg, tok, tf)
+                if os.path.exists(p):
+                    os.remove(p)
+                    dropped += 1
+        for seg, old_tok, new_tok in diff["retokenised"][["SEGMENT", "OLD_TOKEN", "TOKEN"]].itertuples(index=False):
+            for tf in self._timeframes(seg):
+                src, dst = self.path(seg, old_tok, tf), self.path(seg, new_tok, tf)
+                if os.path.exists(src) and not os.path.exists(dst):
+                    os.replace(src, dst)
+                    moved += 1
+        if moved or dropped:
+            log.info("bar cache master update: %d moved, %d dropped", moved, dropped)
+        return {"moved": moved, "dropped": dropped}
+
+    def _timeframes(self, segment: str) -> List[str]:
+        d = os.path.join(self.root, str(segment))
+        return os.listdir(d) if os.path.isdir(d) else []
+
+
+subscribe(lambda diff: BarStore().apply_master_diff(diff))
@@ -0,0 +1,188 @@
+# backend/chain.py
+import logging
+import threading
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .master import InstrumentMaster
+from .master_diff import rebind_indexes, subscribe
+
+log = logging.getLogger("backend.chain")
+log.setLevel(logging.INFO)
+
+OPTION_TYPES = ("CE", "PE")
+
+
+def parse_expiry(values: np.ndarray) -> np.ndarray:
+    """
+    Master EXPIRY strings -> datetime64[D] (NaT when blank/unparseable). Only the distinct
+    values are parsed, there are a few hundred at most.
+    """
+    uniq, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    parsed = pd.to_datetime(pd.Series(uniq), format="mixed", dayfirst=True, errors="coerce")
+    return parsed.to_numpy(dtype="datetime64[D]")[inverse]
+
+
+class DerivativesChainIndex:
+    """
+    Futures and options of one segment grouped underlying -> expiry. Each (underlying,
+    expiry) holds CE and PE strike arrays sorted ascending with the matching master rows,
+    so nearest-strike and strike-range queries are binary searches.
+    """
+
+    def __init__(self, master: InstrumentMaster, segment: str = "NFO"):
+        self.master = master
+        self.segment = segment
+        rows = master.segment_rows(segment)
+        symbol = np.char.strip(np.asarray(master.column("SYMBOL", rows), dtype=str))
+        expiry = parse_expiry(master.column("EXPIRY", rows))
+        strike = np.asarray(master.column("STRIKE", rows), dtype=np.float64)
+        opt = np.char.upper(np.asarray(master.column("OPTIONTYPE", rows), dtype=str))
+
+        keep = ~np.isnat(expiry)
+        rows, symbol, expiry, strike, opt = rows[keep], symbol[keep], expiry[keep], strike[keep], opt[keep]
+        kind = np.where(opt == "CE", 1, np.where(opt == "PE", 2, 0))   # 0 = future
+
+        order = np.lexsort((strike, kind, expiry, symbol))
+        rows, symbol, expiry, strike, kind = rows[order], symbol[order], expiry[order], strike[order], kind[order]
+
+        # group boundaries where (symbol, expiry, kind) changes
+        change = np.r_[True, (symbol[1:] != symbol[:-1]) | (expiry[1:] != expiry[:-1]) | (kind[1:] != kind[:-1])]
+        starts = np.flatnonzero(change)
+        ends = np.r_[starts[1:], len(rows)]
+
+        self._tree: Dict[str, Dict[date, Dict[str, Any]]] = {}
+        for s, e in zip(starts.tolist(), ends.tolist()):
+            exp = expiry[s].astype(date)
+            node = self._tree.setdefault(str(symbol[s]), {}).setdefault(exp, {"FUT": np.zeros(0, np.int64)})
+            if kind[s] == 0:
+                node["FUT"] = rows[s:e]
+            else:
+                node[OPTION_TYPES[kind[s] - 1]] = (strike[s:e], rows[s:e])
+        log.info("chain index %s: %d underlyings, %d contracts", segment, len(self._tree), len(rows))
+
+    def rebind(self, master: InstrumentMaster, old_rows: np.ndarray, new_rows: np.ndarray) -> None:
+        """Switch to another build with the same contracts in the same order (see master_diff)."""
+        def remap(rows: np.ndarray) -> np.ndarray:
+            return new_rows[np.searchsorted(old_rows, rows)]
+
+        for node in (n for exps in self._tree.values() for n in exps.values()):
+            for t, side in node.items():
+                node[t] = remap(side) if t == "FUT" else (side[0], remap(side[1]))
+        self.master = master
+
+    # ---- navigation ----
+    def underlyings(self) -> List[str]:
+        return sorted(self._tree)
+
+    def expiries(self, underlying: str, as_of: Optional[date] = None, options_only: bool = False) -> List[date]:
+        node = self._tree.get(underlying, {})
+        as_of = as_of or date.today()
+        return sorted(d for d, v in node.items()
+                      if d >= as_of and (not options_only or any(t in v for t in OPTION_TYPES)))
+
+    def nearest_expiry(self, underlying: str, as_of: Optional[date] = None, options_only: bool = True) -> Optional[date]:
+        exps = self.expiries(underlying, as_of, options_only)
+        return exps[0] if exps else None
+
+    def _side(self, underlying: str, expiry: date, option_type: str) -> Tuple[np.ndarray, np.ndarray]:
+        side = self._tree.get(underlying, {}).get(expiry, {}).get(option_type.upper())
+        if side is None:
+            return np.zeros(0, np.float64), np.zeros(0, np.int64)
+        return side
+
+    def strikes(self, underlying: str, expiry: date, option_type: str = "CE") -> np.ndarray:
+        return self._side(underlying, expiry, option_type)[0]
+
+    # ---- strike queries ----
+    def nearest_strike(self, underlying: str, expiry: date, price: float, option_type: str = "CE") -> Optional[float]:
+        strikes = self.strikes(underlying, expiry, option_type)
+        if not len(strikes):
+            return None
+        i = int(np.searchsorted(strikes, price))
+        lo, hi = max(i - 1, 0), min(i, len(strikes) - 1)
+        return float(strikes[lo] if abs(strikes[lo] - price) <= abs(strikes[hi] - price) else strikes[hi])
+
+    def strikes_around(self, underlying: str, expiry: date, price: float, n: int = 5, option_type: str = "CE") -> np.ndarray:
+        """`n` strikes either side of the strike nearest `price` (ATM included)."""
+        strikes = self.strikes(underlying, expiry, option_type)
+        atm = self.nearest_strike(underlying, expiry, price, option_type)
+        if atm is None:
+            return strikes
+        i = int(np.searchsorted(strikes, atm))
+        return strikes[max(i - n, 0):i + n + 1]
+
+    def strike_range(self, underlying: str, expiry: date, low: float, high: float, option_type: str = "CE") -> np.ndarray:
+        strikes = self.strikes(underlying, expiry, option_type)
+        return strikes[np.searchsorted(strikes, low, side="left"):np.searchsorted(strikes, high, side="right")]
+
+    # ---- contracts ----
+    def option_row(self, underlying: str, expiry: date, strike: float, option_type: str) -> Optional[int]:
+        strikes, rows = self._side(underlying, expiry, option_type)
+        i = int(np.searchsorted(strikes, strike))
+        if i < len(strikes) and np.isclose(strikes[i], strike):
+            return int(rows[i])
+        return None
+
+    def option(self, underlying: str, expiry: date, strike: float, option_type: str) -> Optional[Dict[str, Any]]:
+        return self.master.record(self.option_row(underlying, expiry, strike, option_type))
+
+    def future(self, underlying: str, expiry: date) -> Optional[Dict[str, Any]]:
+        rows = self._tree.get(underlying, {}).get(expiry, {}).get("FUT", ())
+        return self.master.record(int(rows[0])) if len(rows) else None
+
+    def futures(self, underlying: str, as_of: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Futures contracts of `underlying` from the nearest expiry out."""
+        node = self._tree.get(underlying, {})
+        return [self.master.record(int(r)) for d in self.expiries(underlying, as_of) for r in node[d]["FUT"]]
+
+    def chain(self, underlying: str, expiry: date, price: Optional[float] = None, n: Optional[int] = None) -> pd.DataFrame:
+        """
+        Option chain for one expiry: one row per strike with CE and PE token/tradingsymbol.
+        With `price` and `n`, only the `n` strikes either side of ATM are returned.
+        """
+        sides = {t: self._side(underlying, expiry, t) for t in OPTION_TYPES}
+        strikes = np.union1d(sides["CE"][0], sides["PE"][0])
+        if price is not None and n is not None and len(strikes):
+            i = int(np.abs(strikes - price).argmin())
+            strikes = strikes[max(i - n, 0):i + n + 1]
+        out = pd.DataFrame({"STRIKE": strikes})
+        for t, (s, rows) in sides.items():
+            pos = np.searchsorted(s, strikes)
+            hit = (pos < len(s)) & (s[np.minimum(pos, len(s) - 1)] == strikes) if len(s) else np.zeros(len(strikes), bool)
+            r = rows[pos[hit]]
+            for col in ("TOKEN", "TRADINGSYM"):
+                vals = np.full(len(strikes), None, dtype=object)
+                vals[hit] = self.master.column(col, r)
+                out[f"{t}_{col}"] = vals
+        any_rows = np.concatenate([sides["CE"][1], sides["PE"][1]])
+        if len(any_rows):
+            out["LOTSIZE"] = int(self.master.column("LOTSIZE", any_rows[:1])[0])
+            out["TICKSIZE"] = float(self.master.column("TICKSIZE", any_rows[:1])[0])
+        return out
+
+
+_indexes: Dict[Tuple[str, str], DerivativesChainIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_chain_index(master: InstrumentMaster, segment: str = "NFO") -> DerivativesChainIndex:
+    """Process-wide chain index per (master build, segment), built on first use."""
+    key = (master.path, segment)
+    with _indexes_lock:
+        idx = _indexes.get(key)
+        if idx is None:
+            for stale in [k for k in _indexes if k[0] != master.path]:
+                _indexes.pop(stale)
+            idx = _indexes[key] = DerivativesChainIndex(master, segment)
+        return idx
+
+
+def _on_master_diff(diff: Dict[str, Any]) -> None:
+    rebind_indexes(_indexes, _indexes_lock, diff)
+
+
+subscribe(_on_master_diff)
@@ -0,0 +1,183 @@
+# backend/chart_cache.py
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime, time as dtime, timedelta
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .master_diff import subscribe
+
+log = logging.getLogger("backend.chart_cache")
+log.setLevel(logging.INFO)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+MARKET_CLOSE = dtime(15, 30)
+
+
+def chart_key(
+    segment: str,
+    token: str,
+    timeframe: str,
+    days: int,
+    ema_periods: Tuple[int, ...] = (),
+    rs_index: Optional[Tuple[str, str]] = None,
+    rs_sma_period: Optional[int] = None,
+) -> Tuple:
+    return (str(segment), str(token), str(timeframe), int(days), tuple(int(p) for p in ema_periods),
+            tuple(str(x) for x in rs_index) if rs_index else None, int(rs_sma_period) if rs_sma_period else None)
+
+
+def last_closed_bar(timeframe: str, now: Optional[datetime] = None) -> str:
+    """
+    Stamp of the most recent closed bar for `timeframe`; a cached chart built under an
+    older stamp is stale. Daily bars close at 15:30 on weekdays, intraday bars on the minute
+    (or on `N`-minute boundaries for timeframes such as "5minute").
+    """
+    now = now or datetime.now()
+    if timeframe == "day":
+        d = now.date()
+        if now.time() < MARKET_CLOSE:
+            d -= timedelta(days=1)
+        while d.weekday() >= 5:
+            d -= timedelta(days=1)
+        return d.isoformat()
+    digits = "".join(ch for ch in timeframe if ch.isdigit())
+    step = int(digits) if digits else 1
+    minutes = now.hour * 60 + now.minute
+    floored = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(minutes=minutes - minutes % step)
+    return floored.isoformat(timespec="minutes")
+
+
+def estimate_size(obj: Any) -> int:
+    """Approximate memory footprint of a cached chart payload in bytes."""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sum(estimate_size(v) for v in obj.values()) + sys.getsizeof(obj)
+    if isinstance(obj, (list, tuple)):
+        return sum(estimate_size(v) for v in obj) + sys.getsizeof(obj)
+    if hasattr(obj, "data") and hasattr(obj, "layout"):  # plotly Figure
+        total = 0
+        for trace in obj.data:
+            for attr in ("x", "y", "open", "high", "low", "close", "z"):
+                v = getattr(trace, attr, None)
+                if v is not None:
+                    total += np.asarray(v).nbytes if not isinstance(v, (str, bytes)) else len(v)
+        return total + 4096
+    return sys.getsizeof(obj)
+
+
+class ChartCache:
+    """
+    Thread-safe LRU cache of computed chart datasets, bounded by estimated memory.
+    Entries carry the bar-close stamp they were built under and are dropped on access
+    once a newer bar for their timeframe has closed.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry["size"]
+
+    def get(self, key: Hashable, timeframe: Optional[str] = None) -> Any:
+        stamp = last_closed_bar(timeframe) if timeframe else None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if stamp is not None and entry["stamp"] is not None and entry["stamp"] != stamp:
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["value"]
+
+    def put(self, key: Hashable, value: Any, timeframe: Optional[str] = None) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            log.info("chart payload %s (%d bytes) larger than cache, not stored", key, size)
+            return
+        stamp = last_closed_bar(timeframe) if timeframe else None
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = {"value": value, "size": size, "stamp": stamp}
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                old_key, _ = next(iter(self._entries.items()))
+                self._drop(old_key)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], timeframe: Optional[str] = None) -> Any:
+        value = self.get(key, timeframe)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.put(key, value, timeframe)
+        return value
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Drop every entry (or those whose key matches `predicate`); returns the count."""
+        with self._lock:
+            keys = [k for k in self._entries if predicate is None or predicate(k)]
+            for k in keys:
+                self._drop(k)
+            return len(keys)
+
+    def invalidate_token(self, segment: str, token: str) -> int:
+        return self.invalidate(lambda k: isinstance(k, tuple) and len(k) > 1 and k[0] == str(segment) and k[1] == str(token))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_shared: Optional[ChartCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_chart_cache() -> ChartCache:
+    """Process-wide cache shared by every page and browser session."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ChartCache()
+        return _shared
+
+
+def _on_master_diff(diff: Dict[str, Any]) -> None:
+    """Drop cached charts of contracts that expired, were re-tokenised or changed."""
+    stale = set()
+    for part, col in (("removed", "TOKEN"), ("retokenised", "OLD_TOKEN"), ("changed", "TOKEN")):
+        stale.update(zip(diff[part]["SEGMENT"].astype(str), diff[part][col].astype(str)))
+    if stale:
+        n = get_chart_cache().invalidate(lambda k: isinstance(k, tuple) and len(k) > 1 and (k[0], k[1]) in stale)
+        log.info("chart cache master update: %d entries dropped", n)
+
+
+subscribe(_on_master_diff)
@@ -0,0 +1,118 @@
+# backend/downsample.py
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger("backend.downsample")
+log.setLevel(logging.INFO)
+
+DEFAULT_MAX_POINTS = 1500
+
+
+def _bucket_starts(n: int, n_out: int) -> np.ndarray:
+    """Start offsets of n_out near-equal contiguous buckets over n rows."""
+    return np.unique((np.arange(n_out) * n) // n_out)
+
+
+def ohlc_buckets(df: pd.DataFrame, max_points: int = DEFAULT_MAX_POINTS, time_col: str = "DateTime") -> pd.DataFrame:
+    """
+    Merge consecutive candles into at most `max_points` buckets: first open, max high,
+    min low, last close, summed volume; any other numeric column (EMAs) keeps its last
+    value. The bucket is stamped with its first bar's time. Returns df unchanged when
+    it is already small enough.
+    """
+    n = len(df)
+    if n <= max_points or max_points <= 0:
+        return df
+    starts = _bucket_starts(n, max_points)
+    last = np.r_[starts[1:], n] - 1
+    out = {time_col: df[time_col].to_numpy()[starts]}
+    for col in df.columns:
+        if col == time_col:
+            continue
+        arr = df[col].to_numpy()
+        if col == "Open":
+            out[col] = arr[starts]
+        elif col == "High":
+            out[col] = np.fmax.reduceat(arr.astype(float), starts)
+        elif col == "Low":
+            out[col] = np.fmin.reduceat(arr.astype(float), starts)
+        elif col == "Volume":
+            out[col] = np.add.reduceat(np.nan_to_num(arr.astype(float)), starts)
+        else:
+            out[col] = arr[last]
+    return pd.DataFrame(out, columns=df.columns)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of `n_out` points of (x, y) that keep the
+    visual shape of the line. NaN points are skipped (e.g. EMA/SMA warm-up).
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    ok = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    n = len(ok)
+    if n_out >= n or n_out < 3:
+        return ok
+    xs, ys = x[ok], y[ok]
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(int)
+    picked = np.empty(n_out, dtype=int)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x = xs[nxt_lo:nxt_hi].mean()
+        avg_y = ys[nxt_lo:nxt_hi].mean()
+        area = np.abs((xs[a] - avg_x) * (ys[lo:hi] - ys[a]) - (xs[a] - xs[lo:hi]) * (avg_y - ys[a]))
+        a = lo + int(area.argmax())
+        picked[i + 1] = a
+    return ok[picked]
+
+
+def line_on_buckets(df: pd.DataFrame, col: str, max_points: int = DEFAULT_MAX_POINTS, time_col: str = "DateTime") -> Tuple[pd.Series, pd.Series]:
+    """
+    LTTB-reduce column `col` to as many points as ohlc_buckets(df, max_points) has
+    candles, then stamp each kept point with its bucket's time so the line shares the
+    candles' x values on a category axis. A bucket may keep two points (a peak and a
+    trough), which draw as a vertical stroke at that candle.
+    """
+    n = len(df)
+    if n <= max_points or max_points <= 0:
+        return df[time_col].reset_index(drop=True), df[col].reset_index(drop=True)
+    starts = _bucket_starts(n, max_points)
+    # bars are evenly spaced on a category axis, so LTTB runs on row position, not time
+    idx = lttb(np.arange(n), df[col].to_numpy(), len(starts))
+    bucket = np.searchsorted(starts, idx, side="right") - 1
+    times = df[time_col].to_numpy()[starts[bucket]]
+    return pd.Series(times, name=time_col), df[col].iloc[idx].reset_index(drop=True)
+
+
+def visible_window(df: pd.DataFrame, start: Optional[Any] = None, end: Optional[Any] = None, time_col: str = "DateTime") -> pd.DataFrame:
+    """Rows whose time lies in [start, end]; the detail level is decided on this slice."""
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= df[time_col] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= df[time_col] <= pd.Timestamp(end) + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+    return df[mask]
+
+
+def figure_stats(fig, built_at: float) -> Dict[str, Any]:
+    """Serialized payload size and build time of a Plotly figure (built_at = perf_counter() at start)."""
+    payload = fig.to_json()
+    return {
+        "points": sum(len(t.x) for t in fig.data if t.x is not None),
+        "payload_kb": round(len(payload.encode("utf-8")) / 1024.0, 1),
+        "build_ms": round((time.perf_counter() - built_at) * 1000.0, 1),
+    }
+
+
+def format_stats(name: str, stats: Dict[str, Any], total_rows: int) -> str:
+    return (f"{name}: {stats['points']:,} points sent (of {total_rows:,}), "
+            f"payload {stats['payload_kb']:,} KB, built+rendered in {stats['build_ms']} ms")
+
@@ -0,0 +1,218 @@
+# backend/journal.py
+import atexit
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+log = logging.getLogger("backend.journal")
+log.setLevel(logging.INFO)
+
+JOURNAL_DIR = "data/journal"
+FLUSH_INTERVAL = 1.0
+FLUSH_BATCH = 64
+PERCENTILES = (50, 90, 99)
+# Order actions worth journaling; path ids (order_id / alert_id) are stripped for grouping
+ORDER_ENDPOINTS = re.compile(r"^/(placeorder|modify|cancel|sliceorder|gttplaceorder|gttmodify|gttcancel|ocoplaceorder|ocomodify|ococancel)(/|$)")
+
+
+def endpoint_name(path: str) -> str:
+    m = ORDER_ENDPOINTS.match(path)
+    return f"/{m.group(1)}" if m else path
+
+
+def order_kind(endpoint: str, request: Optional[Dict[str, Any]]) -> str:
+    """Bucket for reports: GTT / OCO for alerts, otherwise the price type (MARKET, LIMIT, ...)."""
+    if endpoint.startswith("/gtt"):
+        return "GTT"
+    if endpoint.startswith("/oco"):
+        return "OCO"
+    return str((request or {}).get("price_type") or "-").upper()
+
+
+class OrderJournal:
+    """
+    Append-only JSONL journal of order actions, one file per day. record() only queues the
+    entry; a background thread writes batches and fsyncs them every `flush_interval`
+    seconds (or sooner once `batch` entries are waiting), so callers never block on disk.
+    Monotonic stamps (t_submit / t_ack / t_fill) are comparable within one process (pid).
+    """
+
+    def __init__(self, root: str = JOURNAL_DIR, flush_interval: float = FLUSH_INTERVAL, batch: int = FLUSH_BATCH):
+        self.root = root
+        self.flush_interval = flush_interval
+        self.batch = batch
+        self._queue: List[Dict[str, Any]] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._fh = None
+        self._day = None
+        self._submits: Dict[str, float] = {}
+        self._thread = threading.Thread(target=self._run, name="order-journal", daemon=True)
+        self._thread.start()
+
+    def path(self, day: str) -> str:
+        return os.path.join(self.root, f"orders-{day}.jsonl")
+
+    def record(
+        self,
+        endpoint: str,
+        request: Optional[Dict[str, Any]] = None,
+        response: Any = None,
+        error: Optional[str] = None,
+        t_submit: Optional[float] = None,
+        t_ack: Optional[float] = None,
+    ) -> None:
+        name = endpoint_name(endpoint)
+        entry = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "event": "ack" if error is None else "error",
+            "pid": os.getpid(),
+            "endpoint": name,
+            "path": endpoint,
+            "order_type": order_kind(name, request),
+            "request": request,
+            "response": response,
+            "error": error,
+            "t_submit": t_submit,
+            "t_ack": t_ack,
+            "latency_ms": round((t_ack - t_submit) * 1000, 3) if t_submit is not None and t_ack is not None else None,
+        }
+        oid = response.get("order_id") if isinstance(response, dict) else None
+        if oid and t_submit is not None:
+            entry["order_id"] = str(oid)
+            with self._cond:
+                self._submits[str(oid)] = t_submit
+        self._put(entry)
+
+    def record_fill(self, order_id: str, t_fill: Optional[float] = None, status: str = "COMPLETE", **fields: Any) -> None:
+        """Fill (or other final state) of an order journaled at submit; latency is submit-to-fill."""
+        t_fill = time.monotonic() if t_fill is None else t_fill
+        with self._cond:
+            t_submit = self._submits.pop(str(order_id), None)
+        self._put({
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "event": "fill",
+            "pid": os.getpid(),
+            "order_id": str(order_id),
+            "status": status,
+            "t_submit": t_submit,
+            "t_fill": t_fill,
+            "fill_ms": round((t_fill - t_submit) * 1000, 3) if t_submit is not None else None,
+            **fields,
+        })
+
+    def _put(self, entry: Dict[str, Any]) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self._queue.append(entry)
+            if len(self._queue) >= self.batch:
+                self._cond.notify()
+
+    def _write(self, entries: List[Dict[str, Any]]) -> None:
+        for e in entries:
+            day = e["ts"][:10].replace("-", "")
+            if day != self._day:
+                if self._fh:
+                    self._fh.close()
+                os.makedirs(self.root, exist_ok=True)
+                self._fh = open(self.path(day), "a", encoding="utf-8")
+                self._day = day
+            self._fh.write(json.dumps(e, default=str, separators=(",", ":")) + "\n")
+        if self._fh:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._queue and not self._closed:
+                    self._cond.wait(self.flush_interval)
+                entries, self._queue = self._queue, []
+                closed = self._closed
+            if entries:
+                try:
+                    self._write(entries)
+                except Exception as e:
+                    log.error("order journal write failed (%d entries lost): %s", len(entries), e)
+            if closed:
+                break
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+
+
+_journal: Optional[OrderJournal] = None
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> OrderJournal:
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = OrderJournal()
+            atexit.register(_journal.close)
+        return _journal
+
+
+def journaled(path: str, request: Optional[Dict[str, Any]], call: Callable[[], Any]) -> Any:
+    """Run `call` (an HTTP request to `path`) and journal it with submit/ack stamps."""
+    t0 = time.monotonic()
+    try:
+        resp = call()
+    except Exception as e:
+        get_journal().record(path, request, error=str(e), t_submit=t0, t_ack=time.monotonic())
+        raise
+    get_journal().record(path, request, response=resp, t_submit=t0, t_ack=time.monotonic())
+    return resp
+
+
+# ---- analysis ----
+def load_journal(root: str = JOURNAL_DIR, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+    """Journal entries for days in [start, end] (YYYYMMDD, inclusive) as a DataFrame."""
+    rows = []
+    for p in sorted(glob.glob(os.path.join(root, "orders-*.jsonl"))):
+        day = os.path.basename(p)[7:15]
+        if (start and day < start) or (end and day > end):
+            continue
+        with open(p, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    continue  # torn last line after a crash
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df["ts"] = pd.to_datetime(df["ts"], errors="coerce")
+        df["hour"] = df["ts"].dt.hour
+    return df
+
+
+def latency_report(df: pd.DataFrame, by: List[str], value: str = "latency_ms") -> pd.DataFrame:
+    """Count, error rate and latency percentiles of journal entries grouped by `by`."""
+    if df.empty or value not in df.columns:
+        return pd.DataFrame()
+    df = df[df[value].notna()] if value == "fill_ms" else df[df["event"].isin(["ack", "error"])]
+    if df.empty:
+        return pd.DataFrame()
+    g = df.groupby(by, dropna=False)
+    out = g[value].agg(["count", "mean", "max"])
+    for q in PERCENTILES:
+        out[f"p{q}"] = g[value].quantile(q / 100.0)
+    if "event" in df.columns and value == "latency_ms":
+        out["errors"] = g["event"].apply(lambda s: int((s == "error").sum()))
+    return out.round(1).reset_index()
@@ -0,0 +1,153 @@
+# backend/margin.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+log = logging.getLogger("backend.margin")
+log.setLevel(logging.INFO)
+
+MARGIN_TTL = 30.0
+LIMITS_TTL = 10.0
+MAX_ENTRIES = 256
+# Only derivative legs go to the span calculator; cash legs need their traded value
+SPAN_EXCHANGES = ("NFO", "BFO", "MCX", "CDS")
+# Field names seen in span_calculator / limits responses
+SPAN_KEYS = ("span", "span_margin")
+EXPOSURE_KEYS = ("exposure", "exposure_margin")
+TOTAL_KEYS = ("total_margin", "totalmargin", "margin", "total")
+CASH_KEYS = ("cash", "net", "available_cash")
+
+
+def _num(d: Dict[str, Any], keys: Tuple[str, ...]) -> Optional[float]:
+    for k in keys:
+        try:
+            return float(d[k])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+def normalize_positions(legs: List[Dict[str, Any]]) -> Tuple[Tuple, ...]:
+    """
+    Order-independent key of a basket: legs on the same contract and product are netted
+    (BUY +qty, SELL -qty), flat contracts dropped, prices rounded to the paisa.
+    """
+    net: Dict[Tuple[str, str, str], List[float]] = {}
+    for leg in legs:
+        side = str(leg.get("side") or leg.get("order_type") or "BUY").upper()
+        qty = float(leg.get("quantity") or 0) * (-1 if side == "SELL" else 1)
+        key = (str(leg.get("exchange", "")), str(leg.get("tradingsymbol", "")).strip(), str(leg.get("product_type", "NORMAL")).upper())
+        slot = net.setdefault(key, [0.0, 0.0, str(leg.get("token") or "")])
+        slot[0] += qty
+        slot[1] = round(float(leg.get("price") or 0), 2) or slot[1]
+    return tuple(sorted((k[0], k[1], k[2], v[2], int(v[0]), v[1]) for k, v in net.items() if v[0]))
+
+
+class MarginService:
+    """
+    Required margin for a whole basket in one span_calculator call, memoized by the
+    normalized position set for `ttl` seconds. Editing one leg of a strategy changes the
+    set and costs one call; reverting it, reordering legs or splitting a leg is a cache hit.
+    """
+
+    def __init__(self, client, ttl: float = MARGIN_TTL, limits_ttl: float = LIMITS_TTL, max_entries: int = MAX_ENTRIES):
+        self.client = client
+        self.ttl = ttl
+        self.limits_ttl = limits_ttl
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._limits: Optional[Tuple[float, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _cached(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit and time.monotonic() - hit[0] < self.ttl:
+                self._cache.move_to_end(key)
+                return hit[1]
+            self._cache.pop(key, None)
+            return None
+
+    def _store(self, key: Tuple, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._cache[key] = (time.monotonic(), result)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def required(self, legs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        {"span", "exposure", "cash", "total", "cached", "elapsed_ms", "positions"} for the basket.
+        Cash-segment buys count at traded value; cash sells are assumed to be covered.
+        """
+        fno = [l for l in legs if str(l.get("exchange", "")).upper() in SPAN_EXCHANGES]
+        cash = sum(
+            float(l.get("quantity") or 0) * float(l.get("price") or 0)
+            for l in legs
+            if str(l.get("exchange", "")).upper() not in SPAN_EXCHANGES
+            and str(l.get("side") or l.get("order_type") or "BUY").upper() == "BUY"
+        )
+        out = self._span(normalize_positions(fno))
+        out["cash"] = cash
+        out["total"] += cash
+        return out
+
+    def _span(self, key: Tuple[Tuple, ...]) -> Dict[str, Any]:
+        if not key:
+            return {"span": 0.0, "exposure": 0.0, "total": 0.0, "cached": True, "elapsed_ms": 0.0, "positions": 0}
+        hit = self._cached(key)
+        if hit is not None:
+            return dict(hit, cached=True, elapsed_ms=0.0)
+
+        positions = [{
+            "exchange": exch, "tradingsymbol": sym, "token": token, "product_type": product,
+            "order_type": "BUY" if qty > 0 else "SELL", "quantity": str(abs(qty)), "price": str(price),
+        } for exch, sym, product, token, qty, price in key]
+        t0 = time.monotonic()
+        resp = self.client.span_calculator({"positions": positions})
+        self.calls += 1
+        data = resp.get("data", resp) if isinstance(resp, dict) else {}
+        if isinstance(resp, dict) and str(resp.get("status", "SUCCESS")).upper() != "SUCCESS":
+            raise RuntimeError(f"span_calculator returned: {resp}")
+        span, exposure = _num(data, SPAN_KEYS) or 0.0, _num(data, EXPOSURE_KEYS) or 0.0
+        total = _num(data, TOTAL_KEYS)
+        result = {
+            "span": span, "exposure": exposure, "total": total if total is not None else span + exposure,
+            "positions": len(positions), "raw": resp,
+        }
+        self._store(key, result)
+        return dict(result, cached=False, elapsed_ms=round((time.monotonic() - t0) * 1000, 1))
+
+    def available(self) -> Optional[float]:
+        """Cash available from /limits, cached for `limits_ttl` seconds."""
+        # held across the refresh so concurrent sessions share one /limits call
+        with self._lock:
+            now = time.monotonic()
+            if self._limits is None or now - self._limits[0] >= self.limits_ttl:
+                resp = self.client.limits()
+                self._limits = (now, resp if isinstance(resp, dict) else {})
+            limits = self._limits[1]
+        return _num(limits, CASH_KEYS)
+
+    def check(self, legs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """required() plus available funds and whether the basket fits."""
+        out = self.required(legs)
+        avail = self.available()
+        out["available"] = avail
+        out["ok"] = avail is None or out["total"] <= avail
+        out["shortfall"] = max(0.0, out["total"] - avail) if avail is not None else 0.0
+        return out
+
+
+def get_margin_service(client, store: Optional[Dict[str, Any]] = None) -> MarginService:
+    """
+    MarginService for `client`, kept in `store` (e.g. st.session_state) so the memo
+    survives reruns. Margins are per account, so a new client gets a fresh service.
+    """
+    store = {} if store is None else store
+    svc = store.get("margin_service")
+    if svc is None or svc.client is not client:
+        svc = store["margin_service"] = MarginService(client)
+    return svc
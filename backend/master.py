@@ -0,0 +1,260 @@
+# backend/master.py
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger("backend.master")
+log.setLevel(logging.INFO)
+
+MASTER_DIR = "data/master"
+MASTER_FILE = os.path.join(MASTER_DIR, "allmaster.csv")
+MASTER_BIN_DIR = os.path.join(MASTER_DIR, "allmaster.bin")
+
+# Column layout of the Definedge allmaster file (the zip ships it without a header row)
+MASTER_COLUMNS: List[str] = [
+    "SEGMENT", "TOKEN", "SYMBOL", "TRADINGSYM", "INSTRUMENT", "EXPIRY",
+    "TICKSIZE", "LOTSIZE", "OPTIONTYPE", "STRIKE", "PRICEPREC", "MULTIPLIER",
+    "ISIN", "PRICEMULT", "COMPANY",
+]
+
+# Binary layout: low-cardinality columns as int16 codes, numbers as int64/float64,
+# everything else as UTF-8 fixed-width bytes; all of them memory-mappable .npy files.
+CATEGORICAL_COLUMNS = ("SEGMENT", "INSTRUMENT", "OPTIONTYPE")
+INT_COLUMNS = ("LOTSIZE", "PRICEPREC")
+FLOAT_COLUMNS = ("TICKSIZE", "STRIKE", "MULTIPLIER", "PRICEMULT")
+
+
+def load_master(path: str = MASTER_FILE) -> pd.DataFrame:
+    """
+    Load the instrument master CSV. Accepts both the raw headerless file from the
+    zip and the normalised copy (with header row) written by the pages.
+    """
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        first = f.readline()
+    has_header = first.split(",", 1)[0].strip().upper() == "SEGMENT"
+    if has_header:
+        df = pd.read_csv(path, low_memory=False)
+    else:
+        df = pd.read_csv(path, header=None, low_memory=False)
+        df = df.iloc[:, :len(MASTER_COLUMNS)]
+        df.columns = MASTER_COLUMNS[:df.shape[1]]
+    df["TOKEN"] = df["TOKEN"].astype(str).str.strip()
+    return df
+
+
+def segment_tokens(df: pd.DataFrame, segment: str, instrument: str = None) -> pd.DataFrame:
+    """
+    Rows of one segment (optionally one INSTRUMENT type, e.g. "EQ") with TOKEN/TRADINGSYM.
+    """
+    out = df[df["SEGMENT"] == segment]
+    if instrument:
+        out = out[out["INSTRUMENT"].astype(str).str.upper() == instrument.upper()]
+    return out.drop_duplicates("TOKEN")
+
+
+def _key_hash(key: str) -> int:
+    return zlib.crc32(key.encode("utf-8"))
+
+
+def _hash_table(keys: List[str]) -> np.ndarray:
+    """Open-addressing (linear probing) table of row numbers, sized to a power of two >= 2n."""
+    size = 1 << max(4, (2 * len(keys) - 1).bit_length())
+    mask = size - 1
+    slots = [-1] * size
+    for row, key in enumerate(keys):
+        j = _key_hash(key) & mask
+        while slots[j] != -1:
+            j = (j + 1) & mask
+        slots[j] = row
+    return np.asarray(slots, dtype=np.int32)
+
+
+def build_master_binary(csv_path: str = MASTER_FILE, bin_root: str = MASTER_BIN_DIR) -> str:
+    """
+    Convert the master CSV into a versioned directory of .npy columns plus
+    (segment, tradingsymbol) and (segment, token) hash indexes. The CURRENT pointer
+    is swapped atomically, so readers keep using the previous build until it flips.
+    Returns the new build directory.
+    """
+    df = load_master(csv_path)
+    version = time.strftime("%Y%m%d%H%M%S") + f"_{os.getpid()}"
+    out = os.path.join(bin_root, version)
+    os.makedirs(out, exist_ok=True)
+
+    meta: Dict[str, Any] = {
+        "rows": int(len(df)),
+        "source": os.path.abspath(csv_path),
+        "source_mtime": os.path.getmtime(csv_path),
+        "categories": {},
+        "columns": [c for c in MASTER_COLUMNS if c in df.columns],
+    }
+    for col in meta["columns"]:
+        ser = df[col]
+        if col in CATEGORICAL_COLUMNS:
+            cat = pd.Categorical(ser.fillna("").astype(str).str.strip())
+            meta["categories"][col] = [str(c) for c in cat.categories]
+            arr = cat.codes.astype(np.int16)
+        elif col in INT_COLUMNS:
+            arr = pd.to_numeric(ser, errors="coerce").fillna(0).astype(np.int64).to_numpy()
+        elif col in FLOAT_COLUMNS:
+            arr = pd.to_numeric(ser, errors="coerce").astype(np.float64).to_numpy()
+        else:
+            arr = np.array([v.encode("utf-8") for v in ser.fillna("").astype(str).str.strip()], dtype=bytes)
+        np.save(os.path.join(out, f"{col}.npy"), arr)
+
+    segs = df["SEGMENT"].fillna("").astype(str).str.strip()
+    np.save(os.path.join(out, "idx_symbol.npy"), _hash_table((segs + "|" + df["TRADINGSYM"].fillna("").astype(str).str.strip()).tolist()))
+    np.save(os.path.join(out, "idx_token.npy"), _hash_table((segs + "|" + df["TOKEN"].fillna("").astype(str).str.strip()).tolist()))
+    with open(os.path.join(out, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+    pointer = os.path.join(bin_root, "CURRENT")
+    with open(pointer + ".tmp", "w") as f:
+        f.write(version)
+    os.replace(pointer + ".tmp", pointer)
+
+    # keep the previous build for readers that still have it mapped
+    builds = sorted(d for d in os.listdir(bin_root) if os.path.isdir(os.path.join(bin_root, d)))
+    for old in builds[:-2]:
+        shutil.rmtree(os.path.join(bin_root, old), ignore_errors=True)
+    log.info("built binary master %s (%d rows)", out, len(df))
+    return out
+
+
+def current_build(bin_root: str = MASTER_BIN_DIR) -> Optional[str]:
+    try:
+        with open(os.path.join(bin_root, "CURRENT")) as f:
+            path = os.path.join(bin_root, f.read().strip())
+    except OSError:
+        return None
+    return path if os.path.isdir(path) else None
+
+
+class InstrumentMaster:
+    """
+    Read-only view of a binary master build. Columns are memory-mapped, so opening it
+    costs a few file opens; symbol and token lookups are single hash probes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.columns: List[str] = self.meta["columns"]
+        self.categories: Dict[str, np.ndarray] = {k: np.asarray(v, dtype=object) for k, v in self.meta["categories"].items()}
+        self._arrays = {c: np.load(os.path.join(path, f"{c}.npy"), mmap_mode="r") for c in self.columns}
+        self._idx_symbol = np.load(os.path.join(path, "idx_symbol.npy"), mmap_mode="r")
+        self._idx_token = np.load(os.path.join(path, "idx_token.npy"), mmap_mode="r")
+        self._frame: Optional[pd.DataFrame] = None
+
+    def __len__(self) -> int:
+        return int(self.meta["rows"])
+
+    def _code(self, col: str, value: str) -> int:
+        cats = self.categories[col]
+        hit = np.flatnonzero(cats == value)
+        return int(hit[0]) if len(hit) else -1
+
+    def _probe(self, table: np.ndarray, segment: str, col: str, value: str) -> Optional[int]:
+        seg_code = self._code("SEGMENT", segment)
+        if seg_code < 0:
+            return None
+        want = value.encode("utf-8")
+        mask = len(table) - 1
+        j = _key_hash(f"{segment}|{value}") & mask
+        seg_col, val_col = self._arrays["SEGMENT"], self._arrays[col]
+        while True:
+            row = int(table[j])
+            if row < 0:
+                return None
+            if seg_col[row] == seg_code and val_col[row] == want:
+                return row
+            j = (j + 1) & mask
+
+    def row_by_symbol(self, segment: str, tradingsymbol: str) -> Optional[int]:
+        return self._probe(self._idx_symbol, str(segment), "TRADINGSYM", str(tradingsymbol).strip())
+
+    def row_by_token(self, segment: str, token: Any) -> Optional[int]:
+        return self._probe(self._idx_token, str(segment), "TOKEN", str(token).strip())
+
+    def column(self, col: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        arr = self._arrays[col]
+        if rows is not None:
+            arr = arr[rows]
+        if col in self.categories:
+            return self.categories[col][np.asarray(arr)]
+        if arr.dtype.kind == "S":
+            try:
+                return np.asarray(arr).astype(str).astype(object)  # fast path: plain ASCII
+            except UnicodeDecodeError:
+                return np.char.decode(np.asarray(arr), "utf-8").astype(object)
+        return np.asarray(arr)
+
+    def record(self, row: Optional[int]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        return {c: self.column(c, np.array([row]))[0] for c in self.columns}
+
+    def lookup_symbol(self, segment: str, tradingsymbol: str) -> Optional[Dict[str, Any]]:
+        return self.record(self.row_by_symbol(segment, tradingsymbol))
+
+    def lookup_token(self, segment: str, token: Any) -> Optional[Dict[str, Any]]:
+        return self.record(self.row_by_token(segment, token))
+
+    def segments(self) -> List[str]:
+        return sorted(c for c in self.categories["SEGMENT"] if c)
+
+    def segment_rows(self, segment: str) -> np.ndarray:
+        return np.flatnonzero(np.asarray(self._arrays["SEGMENT"]) == self._code("SEGMENT", segment))
+
+    def frame(self, rows: Optional[np.ndarray] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """DataFrame view; the full frame is decoded once and reused."""
+        if rows is None and columns is None:
+            if self._frame is None:
+                self._frame = pd.DataFrame({c: self.column(c) for c in self.columns})
+            return self._frame
+        cols = columns or self.columns
+        out = pd.DataFrame({c: self.column(c, rows) for c in cols})
+        if rows is not None:
+            out.index = rows
+        return out
+
+
+_master: Optional[InstrumentMaster] = None
+# Re-entrant: a CSV swap and its rebuild_with_diff can be held as one step (scripts/update_master.py)
+_master_lock = threading.RLock()
+
+
+def get_master(csv_path: str = MASTER_FILE, bin_root: str = MASTER_BIN_DIR) -> InstrumentMaster:
+    """
+    Process-wide InstrumentMaster shared by all pages. When the CSV is newer than the
+    current build it is rebuilt through the same locked path as rebuild_with_diff, so
+    the refresh is diffed, recorded and published like any other.
+    """
+    global _master
+    diff = None
+    with _master_lock:
+        path = current_build(bin_root)
+        stale = path is None
+        if not stale and os.path.exists(csv_path):
+            with open(os.path.join(path, "meta.json")) as f:
+                stale = json.load(f).get("source_mtime", 0) < os.path.getmtime(csv_path)
+        if stale:
+            from .master_diff import build_diff  # master_diff imports this module
+            diff = build_diff(csv_path, bin_root)
+            _master = diff["master"]
+        elif _master is None or _master.path != path:
+            _master = InstrumentMaster(path)
+        master = _master
+    if diff is not None:
+        from .master_diff import publish
+        publish(diff)
+    return master
@@ -0,0 +1,240 @@
+# backend/master_diff.py
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import master as master_module
+from .master import (
+    MASTER_BIN_DIR, MASTER_COLUMNS, MASTER_DIR, MASTER_FILE, InstrumentMaster,
+    build_master_binary, current_build,
+)
+
+log = logging.getLogger("backend.master_diff")
+log.setLevel(logging.INFO)
+
+HISTORY_DIR = os.path.join(MASTER_DIR, "history")
+HISTORY_KEEP = 30
+DIFF_KEY = ["SEGMENT", "TRADINGSYM"]
+# Contract attributes whose change downstream caches care about (TOKEN is handled separately)
+COMPARE_COLUMNS = ("SYMBOL", "INSTRUMENT", "EXPIRY", "TICKSIZE", "LOTSIZE", "OPTIONTYPE", "STRIKE",
+                   "PRICEPREC", "MULTIPLIER", "ISIN", "PRICEMULT", "COMPANY")
+DIFF_PARTS = ("added", "removed", "retokenised", "changed")
+
+
+def diff_masters(old: pd.DataFrame, new: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Keyed diff of two master frames on (SEGMENT, TRADINGSYM):
+      added       - contracts only in `new`
+      removed     - contracts only in `old` (expired / delisted)
+      retokenised - same contract, new TOKEN (columns SEGMENT, TRADINGSYM, OLD_TOKEN, TOKEN)
+      changed     - same contract and token, other attributes differ (CHANGED lists them)
+    """
+    cols = [c for c in MASTER_COLUMNS if c in old.columns and c in new.columns]
+    old = old[cols].drop_duplicates(DIFF_KEY, keep="last")
+    new = new[cols].drop_duplicates(DIFF_KEY, keep="last")
+    m = old.merge(new, on=DIFF_KEY, how="outer", suffixes=("_old", ""), indicator=True)
+
+    added = m.loc[m["_merge"] == "right_only", cols].reset_index(drop=True)
+    removed = m.loc[m["_merge"] == "left_only", DIFF_KEY + [f"{c}_old" for c in cols if c not in DIFF_KEY]]
+    removed = removed.rename(columns=lambda c: c[:-4] if c.endswith("_old") else c).reset_index(drop=True)
+
+    both = m[m["_merge"] == "both"]
+    retok = both["TOKEN_old"].astype(str) != both["TOKEN"].astype(str)
+    retokenised = both.loc[retok, DIFF_KEY + ["TOKEN_old", "TOKEN"]].rename(columns={"TOKEN_old": "OLD_TOKEN"}).reset_index(drop=True)
+
+    same = both[~retok]
+    compare = [c for c in COMPARE_COLUMNS if c in cols]
+    # compare values, not strings: the outer merge turns int columns into float when rows are unmatched
+    diffs = pd.DataFrame({c: ~((same[f"{c}_old"] == same[c]) | (same[f"{c}_old"].isna() & same[c].isna()))
+                          for c in compare}, index=same.index)
+    hit = diffs.any(axis=1) if compare else pd.Series(False, index=same.index)
+    changed = same.loc[hit, DIFF_KEY + ["TOKEN"]].copy()
+    changed["CHANGED"] = [",".join(np.asarray(compare)[row]) for row in diffs[hit].to_numpy()]
+    return {"added": added, "removed": removed, "retokenised": retokenised, "changed": changed.reset_index(drop=True)}
+
+
+def touched_segments(diff: Dict[str, Any]) -> List[str]:
+    segs = set()
+    for part in DIFF_PARTS:
+        segs.update(diff[part]["SEGMENT"].astype(str).unique())
+    return sorted(segs)
+
+
+def unchanged_row_map(old: InstrumentMaster, new: InstrumentMaster, segment: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    (old_rows, new_rows) of `segment` when both builds list the same contracts in the
+    same order, so row-addressed structures can be re-pointed instead of rebuilt.
+    """
+    old_rows, new_rows = old.segment_rows(segment), new.segment_rows(segment)
+    if len(old_rows) != len(new_rows):
+        return None
+    for col in ("TRADINGSYM", "TOKEN"):
+        if not np.array_equal(np.asarray(old._arrays[col][old_rows]), np.asarray(new._arrays[col][new_rows])):
+            return None
+    return old_rows, new_rows
+
+
+def rebind_indexes(indexes: Dict[Tuple[str, Optional[str]], Any], lock: threading.Lock, diff: Dict[str, Any]) -> None:
+    """
+    Master-diff handler for caches of row-addressed indexes keyed (master path, segment):
+    indexes of segments the refresh did not touch are re-pointed at the new build, the
+    rest are dropped and rebuilt on next use.
+    """
+    old, new = diff["old_master"], diff["master"]
+    if old is None:
+        return
+    with lock:
+        for key in [k for k in indexes if k[0] == old.path]:
+            idx = indexes.pop(key)
+            segment = key[1]
+            if segment is None or segment in diff["segments"]:
+                continue
+            row_map = unchanged_row_map(old, new, segment)
+            if row_map is not None:
+                idx.rebind(new, *row_map)
+                indexes[(new.path, segment)] = idx
+
+
+# ---- versioned history ----
+def _index_path(history_dir: str) -> str:
+    return os.path.join(history_dir, "index.json")
+
+
+def load_history(history_dir: str = HISTORY_DIR) -> List[Dict[str, Any]]:
+    try:
+        with open(_index_path(history_dir)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def record_diff(diff: Dict[str, Any], history_dir: str = HISTORY_DIR, keep: int = HISTORY_KEEP) -> None:
+    """Store the diff rows (not full snapshots) and append to the version index."""
+    os.makedirs(history_dir, exist_ok=True)
+    path = os.path.join(history_dir, f"{diff['version']}.pkl")
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump({p: diff[p] for p in DIFF_PARTS}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + ".tmp", path)
+
+    history = load_history(history_dir)
+    history.append({
+        "version": diff["version"],
+        "previous": diff["previous"],
+        "created": diff["created"],
+        "counts": {p: int(len(diff[p])) for p in DIFF_PARTS},
+    })
+    for old in history[:-keep]:
+        try:
+            os.remove(os.path.join(history_dir, f"{old['version']}.pkl"))
+        except OSError:
+            pass
+    history = history[-keep:]
+    with open(_index_path(history_dir) + ".tmp", "w") as f:
+        json.dump(history, f, indent=2)
+    os.replace(_index_path(history_dir) + ".tmp", _index_path(history_dir))
+
+
+def load_diff(version: str, history_dir: str = HISTORY_DIR) -> Optional[Dict[str, pd.DataFrame]]:
+    try:
+        with open(os.path.join(history_dir, f"{version}.pkl"), "rb") as f:
+            return pickle.load(f)
+    except OSError:
+        return None
+
+
+def token_remap(since_version: Optional[str] = None, history_dir: str = HISTORY_DIR) -> Dict[Tuple[str, str], str]:
+    """
+    {(segment, old_token): current_token} for every re-tokenisation after `since_version`
+    (all recorded history when None), with chains A -> B -> C collapsed to A -> C.
+    """
+    versions = [h["version"] for h in load_history(history_dir)]
+    if since_version in versions:
+        versions = versions[versions.index(since_version) + 1:]
+    remap: Dict[Tuple[str, str], str] = {}
+    for v in versions:
+        diff = load_diff(v, history_dir)
+        if diff is None:
+            continue
+        step = {(str(s), str(o)): str(n) for s, o, n in diff["retokenised"][["SEGMENT", "OLD_TOKEN", "TOKEN"]].itertuples(index=False)}
+        remap = {k: step.get((k[0], t), t) for k, t in remap.items()}
+        for k, t in step.items():
+            remap.setdefault(k, t)
+    return {k: t for k, t in remap.items() if k[1] != t}
+
+
+# ---- publish / subscribe ----
+_subscribers: List[Callable[[Dict[str, Any]], None]] = []
+_subscribers_lock = threading.Lock()
+
+
+def subscribe(callback: Callable[[Dict[str, Any]], None]) -> None:
+    """Register `callback(diff)` to be called after each master refresh."""
+    with _subscribers_lock:
+        if callback not in _subscribers:
+            _subscribers.append(callback)
+
+
+def unsubscribe(callback: Callable[[Dict[str, Any]], None]) -> None:
+    with _subscribers_lock:
+        if callback in _subscribers:
+            _subscribers.remove(callback)
+
+
+def publish(diff: Dict[str, Any]) -> None:
+    with _subscribers_lock:
+        callbacks = list(_subscribers)
+    for cb in callbacks:
+        try:
+            cb(diff)
+        except Exception as e:
+            log.error("master diff subscriber %r failed: %s", cb, e)
+
+
+def build_diff(csv_path: str = MASTER_FILE, bin_root: str = MASTER_BIN_DIR, history_dir: str = HISTORY_DIR) -> Dict[str, Any]:
+    """
+    Build the binary master from `csv_path`, diff it against the previous build and
+    record the diff in the history. The caller must hold backend.master._master_lock so
+    no other rebuild moves CURRENT between reading the previous build and the new one.
+    """
+    prev_path = current_build(bin_root)
+    old = InstrumentMaster(prev_path) if prev_path else None
+    new = InstrumentMaster(build_master_binary(csv_path, bin_root))
+
+    t0 = time.perf_counter()
+    if old is not None:
+        parts = diff_masters(old.frame(), new.frame())
+    else:
+        parts = diff_masters(new.frame().iloc[:0], new.frame())
+    diff: Dict[str, Any] = dict(parts)
+    diff.update({
+        "version": os.path.basename(new.path),
+        "previous": os.path.basename(old.path) if old else None,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "old_master": old,
+        "master": new,
+    })
+    diff["segments"] = touched_segments(diff)
+    log.info("master diff %s -> %s in %.2fs: %s", diff["previous"], diff["version"], time.perf_counter() - t0,
+             {p: len(diff[p]) for p in DIFF_PARTS})
+    record_diff(diff, history_dir)
+    return diff
+
+
+def rebuild_with_diff(csv_path: str = MASTER_FILE, bin_root: str = MASTER_BIN_DIR, history_dir: str = HISTORY_DIR) -> Dict[str, Any]:
+    """
+    Rebuild under the master lock (see build_diff), make the new build the process-wide
+    master and publish the diff. Returns the diff; its "old_master" and "master" entries
+    are open InstrumentMaster views (old_master is None on first build).
+    """
+    with master_module._master_lock:
+        diff = build_diff(csv_path, bin_root, history_dir)
+        master_module._master = diff["master"]
+    publish(diff)
+    return diff
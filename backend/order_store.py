@@ -0,0 +1,155 @@
+# backend/order_store.py
+import logging
+import threading
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+log = logging.getLogger("backend.order_store")
+log.setLevel(logging.INFO)
+
+# Fields whose change is reported as an order update (others are carried but not diffed)
+TRACKED_FIELDS = (
+    "order_status", "status", "quantity", "filled_qty", "pending_qty", "price", "trigger_price",
+    "average_traded_price", "message",
+)
+TIME_FIELDS = ("order_entry_time", "order_time", "exchange_time")
+
+
+def _fingerprint(row: Dict[str, Any]) -> Tuple:
+    return tuple(str(row.get(f, "")) for f in TRACKED_FIELDS)
+
+
+class OrderStore:
+    """
+    Day order book keyed by order_id. apply() takes a full /orders snapshot (or single push
+    updates via apply_update) and returns only the orders that are new or changed; the
+    DataFrame used for rendering is rebuilt only when something changed. The book starts
+    empty again on the first poll of a new trading day (see roll).
+    """
+
+    def __init__(self):
+        self.day = date.today()
+        self._lock = threading.Lock()
+        self._orders: Dict[str, Dict[str, Any]] = {}
+        self._prints: Dict[str, Tuple] = {}
+        self._subscribers: List[Callable[[List[Dict[str, Any]]], None]] = []
+        self.version = 0
+        self._frame: Optional[pd.DataFrame] = None
+        self._frame_version = -1
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        return self._orders.get(str(order_id))
+
+    def subscribe(self, callback: Callable[[List[Dict[str, Any]]], None]) -> None:
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[List[Dict[str, Any]]], None]) -> None:
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _merge(self, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        oid = str(row.get("order_id") or "")
+        if not oid:
+            return None
+        old = self._orders.get(oid)
+        merged = dict(old or {}, **row)
+        fp = _fingerprint(merged)
+        if old is not None and self._prints[oid] == fp:
+            return None
+        self._orders[oid] = merged
+        self._prints[oid] = fp
+        if old is None:
+            return {"order_id": oid, "change": "new", "fields": {}, "row": merged}
+        fields = {f: (old.get(f), merged.get(f)) for f in TRACKED_FIELDS if str(old.get(f, "")) != str(merged.get(f, ""))}
+        return {"order_id": oid, "change": "updated", "fields": fields, "row": merged}
+
+    def _emit(self, changes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if changes:
+            self.version += 1
+            for cb in list(self._subscribers):
+                try:
+                    cb(changes)
+                except Exception as e:
+                    log.error("order store subscriber %r failed: %s", cb, e)
+        return changes
+
+    def apply(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge an /orders snapshot; returns change events for new/updated orders only."""
+        with self._lock:
+            changes = [c for c in (self._merge(r) for r in rows if isinstance(r, dict)) if c]
+        return self._emit(changes)
+
+    def apply_update(self, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Merge one pushed order update (may carry only the changed fields)."""
+        changes = self.apply([row])
+        return changes[0] if changes else None
+
+    def roll(self, today: Optional[date] = None) -> bool:
+        """Empty the book if the day changed since it was started; True if it was reset."""
+        today = today or date.today()
+        with self._lock:
+            if today == self.day:
+                return False
+            log.info("order store: new day %s, dropping %d orders of %s", today, len(self._orders), self.day)
+            self.day = today
+            self._orders.clear()
+            self._prints.clear()
+            self.version += 1
+        return True
+
+    def poll(self, client) -> List[Dict[str, Any]]:
+        """Fetch /orders and apply it. Raises RuntimeError on a non-success response."""
+        self.roll()
+        resp = client.orders()
+        if not isinstance(resp, dict) or resp.get("status") != "SUCCESS":
+            raise RuntimeError(f"orders API returned: {resp}")
+        return self.apply(resp.get("orders") or [])
+
+    # ---- views ----
+    def frame(self) -> pd.DataFrame:
+        """All orders, newest first; cached until the store changes."""
+        with self._lock:
+            if self._frame is None or self._frame_version != self.version:
+                df = pd.DataFrame(list(self._orders.values()))
+                for col in TIME_FIELDS:
+                    if col in df.columns:
+                        df = df.sort_values(col, ascending=False, kind="stable")
+                        break
+                self._frame, self._frame_version = df.reset_index(drop=True), self.version
+            return self._frame
+
+    def query(
+        self,
+        symbol: str = "",
+        statuses: Optional[Iterable[str]] = None,
+        side: Optional[str] = None,
+        page: int = 0,
+        page_size: int = 50,
+    ) -> Tuple[pd.DataFrame, int]:
+        """Filtered page of the book and the total number of matching orders."""
+        df = self.frame()
+        if df.empty:
+            return df, 0
+        mask = pd.Series(True, index=df.index)
+        if symbol and "tradingsymbol" in df.columns:
+            mask &= df["tradingsymbol"].astype(str).str.upper().str.contains(symbol.upper(), regex=False)
+        if statuses:
+            status_col = "order_status" if "order_status" in df.columns else "status"
+            if status_col in df.columns:
+                mask &= df[status_col].astype(str).str.upper().isin([s.upper() for s in statuses])
+        if side and "order_type" in df.columns:
+            mask &= df["order_type"].astype(str).str.upper() == side.upper()
+        hits = df[mask]
+        start = max(0, int(page)) * page_size
+        return hits.iloc[start:start + page_size], len(hits)
+
+    def statuses(self) -> List[str]:
+        df = self.frame()
+        col = "order_status" if "order_status" in df.columns else "status"
+        return sorted(df[col].astype(str).str.upper().unique()) if col in df.columns else []
@@ -0,0 +1,214 @@
+# backend/order_tracker.py
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .accounts import on_release
+from .journal import get_journal
+from .order_store import OrderStore
+from .orders import TERMINAL_STATUSES, order_status
+from .outbox import get_outbox
+from .ratelimit import RateLimiter
+
+log = logging.getLogger("backend.order_tracker")
+log.setLevel(logging.INFO)
+
+# Poll fast right after submit, then back off while an order rests unchanged
+FAST_INTERVAL = 0.5
+SLOW_INTERVAL = 15.0
+BACKOFF = 1.6
+IDLE_INTERVAL = 30.0
+# Book polls share their own small budget so they never starve order submission
+POLL_RATE_PER_SEC = 2.0
+# Store changes kept for pages that read them between reruns
+CHANGE_LOG_SIZE = 500
+
+
+class OrderTracker:
+    """
+    Background follower of open orders. Each order has its own poll interval: FAST after
+    submission or after any change, growing by BACKOFF while it rests unchanged up to SLOW.
+    Whenever any order is due, one /orders snapshot refreshes all of them through the
+    OrderStore; status transitions are published to subscribers and final states are
+    journaled as fills. Open orders placed elsewhere are adopted at the slow interval.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        store: Optional[OrderStore] = None,
+        fast: float = FAST_INTERVAL,
+        slow: float = SLOW_INTERVAL,
+        backoff: float = BACKOFF,
+        idle: float = IDLE_INTERVAL,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self.client = client
+        self.store = store or OrderStore()
+        self.fast, self.slow, self.backoff, self.idle = fast, slow, backoff, idle
+        self.limiter = rate_limiter or RateLimiter(POLL_RATE_PER_SEC, 1)
+        # order_id -> {"interval", "due", "status", "since"}
+        self._tracked: Dict[str, Dict[str, Any]] = {}
+        self._subscribers: List[Callable[[Dict[str, Any]], None]] = []
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread: Optional[threading.Thread] = None
+        self.polls = 0
+        self.last_poll: Optional[float] = None
+        # (seq, store change) from recent polls, oldest first
+        self._changes: Deque[Tuple[int, Dict[str, Any]]] = deque(maxlen=CHANGE_LOG_SIZE)
+        self._seq = 0
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """callback({"order_id", "old", "new", "row", "elapsed_ms"}) on every status change."""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def changes_since(self, seq: int = 0) -> Tuple[int, List[Dict[str, Any]]]:
+        """Store changes ({"change", "order_id", "fields", "row"}) seen after `seq`, and the latest seq."""
+        with self._cond:
+            return self._seq, [c for s, c in self._changes if s > seq]
+
+    def track(self, order_id: str, status: str = "") -> None:
+        """Follow `order_id` from now on at the fast interval."""
+        now = time.monotonic()
+        with self._cond:
+            self._tracked[str(order_id)] = {"interval": self.fast, "due": now + self.fast, "status": status, "since": now}
+            self._cond.notify()
+
+    def tracked(self) -> List[str]:
+        with self._cond:
+            return list(self._tracked)
+
+    def _next_due(self) -> float:
+        with self._cond:
+            if not self._tracked:
+                return (self.last_poll or 0.0) + self.idle
+            return min(t["due"] for t in self._tracked.values())
+
+    def poll_once(self) -> List[Dict[str, Any]]:
+        """One /orders snapshot: update intervals, adopt open orders, publish transitions."""
+        if self.store.roll():
+            # yesterday's day orders are gone from the book; stop following them
+            with self._cond:
+                self._tracked.clear()
+        self.limiter.acquire()
+        changes = self.store.poll(self.client)
+        self.polls += 1
+        now = self.last_poll = time.monotonic()
+        changed = {c["order_id"]: c for c in changes}
+        events = []
+        with self._cond:
+            for c in changes:
+                self._seq += 1
+                self._changes.append((self._seq, c))
+                oid = c["order_id"]
+                if oid not in self._tracked and order_status(c["row"]) not in TERMINAL_STATUSES:
+                    self._tracked[oid] = {"interval": self.slow, "due": now + self.slow, "status": "", "since": now}
+            for oid, t in list(self._tracked.items()):
+                row = self.store.get(oid)
+                if row is None:
+                    # not in the book yet (just acknowledged)
+                    t["interval"] = min(self.slow, t["interval"] * self.backoff)
+                    t["due"] = now + t["interval"]
+                    continue
+                status = order_status(row)
+                if status != t["status"]:
+                    events.append({"order_id": oid, "old": t["status"] or None, "new": status, "row": row,
+                                   "elapsed_ms": round((now - t["since"]) * 1000, 1)})
+                    t["status"] = status
+                if status in TERMINAL_STATUSES:
+                    del self._tracked[oid]
+                    continue
+                active = oid in changed and changed[oid]["change"] == "updated"
+                t["interval"] = self.fast if active else min(self.slow, t["interval"] * self.backoff)
+                t["due"] = now + t["interval"]
+        for e in events:
+            if e["new"] in TERMINAL_STATUSES:
+                row = e["row"]
+                get_journal().record_fill(e["order_id"], status=e["new"], filled_qty=row.get("filled_qty"),
+                                          avg_price=row.get("average_traded_price"))
+            for cb in list(self._subscribers):
+                try:
+                    cb(e)
+                except Exception as ex:
+                    log.error("order tracker subscriber %r failed: %s", cb, ex)
+        return events
+
+    def _run(self) -> None:
+        while not self._stop:
+            wait = self._next_due() - time.monotonic()
+            if wait > 0:
+                with self._cond:
+                    self._cond.wait(min(wait, self.idle))
+                continue
+            try:
+                self.poll_once()
+            except Exception as e:
+                log.warning("order tracker poll failed: %s", e)
+                self.last_poll = time.monotonic()
+                with self._cond:
+                    for t in self._tracked.values():
+                        t["due"] = self.last_poll + max(t["interval"], self.fast * 4)
+
+    def on_outbox(self, event: Dict[str, Any]) -> None:
+        """Outbox subscriber: follow every regular order it gets acknowledged."""
+        if event.get("kind") == "order" and event.get("status") in ("placed", "exists") and event.get("order_id"):
+            self.track(event["order_id"])
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name=f"order-tracker-{getattr(self.client, 'uid', '')}", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        self._stop = True
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            if self._thread is not threading.current_thread():
+                self._thread.join(timeout=5)
+            self._thread = None
+
+
+_trackers: Dict[Optional[str], OrderTracker] = {}
+_tracker_lock = threading.Lock()
+
+
+def get_order_tracker(client) -> OrderTracker:
+    """
+    Tracker of `client`'s account (one per uid) with that account's order store, fed by
+    its outbox; polling starts once a client is attached.
+    """
+    uid = getattr(client, "uid", None)
+    with _tracker_lock:
+        tracker = _trackers.get(uid)
+        if tracker is None:
+            tracker = _trackers[uid] = OrderTracker(client)
+            get_outbox(client).subscribe(tracker.on_outbox)
+            atexit.register(tracker.close)
+        elif client is not None and tracker.client is not client:
+            tracker.client = client
+        if tracker.client is not None:
+            tracker.start()
+        return tracker
+
+
+def _on_account_released(uid: str) -> None:
+    with _tracker_lock:
+        tracker = _trackers.pop(uid, None)
+    if tracker is not None:
+        # the account's outbox is closed by its own release handler
+        atexit.unregister(tracker.close)
+        tracker.close()
+
+
+on_release(_on_account_released)
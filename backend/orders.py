@@ -1,18 +1,119 @@
 # backend/orders.py
+import hashlib
+import json
 import logging
-from typing import Dict, Any, List
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Set
+import numpy as np
+import pandas as pd
 from .api_client import APIClient
+from .bars import BarStore
+from .master import get_master
+from .ratelimit import RateLimiter
+from .slicing import freeze_qty, slice_quantity
+from .validator import PreTradeValidator, get_validator
 
 log = logging.getLogger("backend.orders")
 log.setLevel(logging.INFO)
 
+# Default protective ladder: stop below average price plus staged profit targets
+DEFAULT_SL_PCT = -2.0
+DEFAULT_TARGET_PCTS = (10.0, 20.0, 30.0, 40.0)
+
+# Bulk placement: concurrent requests in flight (sends and retries go through the account's outbox)
+BULK_MAX_WORKERS = 8
+# How long a caller waits for an outbox intent's outcome before reporting it still queued
+ACK_TIMEOUT = 10.0
+# Basket tracking: poll interval for open legs and how long to wait for fills
+BASKET_POLL_INTERVAL = 0.5
+BASKET_TRACK_TIMEOUT = 30.0
+ORDER_SIDES = ("BUY", "SELL")
+PRICE_TYPES = ("MARKET", "LIMIT", "SL-LIMIT", "SL-MARKET")
+TERMINAL_STATUSES = ("COMPLETE", "REJECTED", "CANCELED", "CANCELLED")
+# Portfolio ladder in ATR multiples (used when levels are ATR-based instead of % of average price)
+ATR_PERIOD = 14
+DEFAULT_SL_ATR = 2.0
+DEFAULT_TARGET_ATRS = (2.0, 4.0, 6.0, 8.0)
+HOLDING_COLUMNS = {"tradingsymbol": "symbol", "quantity": "qty", "avg_buy_price": "avg_price"}
+# Bulk actions: book time columns used for the age filter, and OCO-only GTT book fields
+ORDER_TIME_FIELDS = ("order_entry_time", "order_time", "exchange_time")
+OCO_FIELDS = ("stoploss_price", "target_price")
+
+# Slicing schedules: all children at once, one after another fills, or evenly spaced in time
+SLICE_SCHEDULES = ("parallel", "iceberg", "twap")
+IDEMPOTENCY_TAG = re.compile(r"\[gm:([0-9a-f]{10})\]")
+
+
+def idempotency_key(payload: Dict[str, Any]) -> str:
+    """Stable short hash of an order/GTT payload (remarks excluded)."""
+    body = {k: str(v) for k, v in payload.items() if k != "remarks"}
+    return hashlib.sha1(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()[:10]
+
+
+def order_status(row: Dict[str, Any]) -> str:
+    """Normalised status of an order book / order detail row."""
+    return str(row.get("order_status") or row.get("status") or "").upper()
+
+
+def validate_order_spec(spec: Dict[str, Any]) -> List[str]:
+    """Local checks of one basket leg before anything is sent; returns error messages."""
+    errors = []
+    for field in ("exchange", "tradingsymbol", "side"):
+        if not str(spec.get(field) or "").strip():
+            errors.append(f"{field} missing")
+    side = str(spec.get("side") or "").upper()
+    if side and side not in ORDER_SIDES:
+        errors.append(f"side must be one of {ORDER_SIDES}")
+    price_type = str(spec.get("price_type") or "MARKET").upper()
+    if price_type not in PRICE_TYPES:
+        errors.append(f"price_type must be one of {PRICE_TYPES}")
+    try:
+        qty = float(spec.get("quantity") or 0)
+        if qty <= 0 or qty != int(qty):
+            errors.append("quantity must be a positive integer")
+    except (TypeError, ValueError):
+        errors.append("quantity must be a positive integer")
+    try:
+        price = float(spec.get("price") or 0)
+        trigger = float(spec.get("trigger_price") or 0)
+    except (TypeError, ValueError):
+        errors.append("price / trigger_price must be numeric")
+    else:
+        if price_type in ("LIMIT", "SL-LIMIT") and price <= 0:
+            errors.append(f"{price_type} needs a price")
+        if price_type.startswith("SL") and trigger <= 0:
+            errors.append(f"{price_type} needs a trigger_price")
+    return errors
+
+
+def tag_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of `payload` with its idempotency key embedded in remarks, which the book echoes back."""
+    key = idempotency_key(payload)
+    out = dict(payload)
+    remarks = IDEMPOTENCY_TAG.sub("", str(payload.get("remarks") or "")).strip()
+    out["remarks"] = f"{remarks} [gm:{key}]".strip()
+    return out
+
 class OrdersService:
     """
     Orders helper: regular orders and GTT generation/placement.
     """
 
-    def __init__(self, api_client: APIClient):
+    def __init__(
+        self,
+        api_client: APIClient,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_workers: int = BULK_MAX_WORKERS,
+        validator: Optional[PreTradeValidator] = None,
+    ):
         self.client = api_client
+        # pooled clients carry the account's shared budget (see backend.accounts)
+        self.limiter = rate_limiter or getattr(api_client, "rate_limiter", None) or RateLimiter()
+        self.max_workers = max_workers
+        self.validator = validator or get_validator(api_client)
 
     def place_regular(
         self,
@@ -27,6 +128,41 @@ class OrdersService:
         trigger_price: float = 0.0,
         validity: str = "DAY",
     ) -> Any:
+        payload = self.build_order_payload(
+            exchange, tradingsymbol, token, side, quantity, price_type, product_type, price, trigger_price, validity,
+        )
+        payload = self.validator.validate(payload)   # raises OrderValidationError
+        log.info("Placing order payload: %s", payload)
+        intent = self.send_intent(payload)
+        if intent.get("response"):
+            return json.loads(intent["response"])
+        return {"status": intent["status"].upper(), "message": intent.get("error") or "", "key": intent["key"]}
+
+    def send_intent(self, payload: Dict[str, Any], kind: str = "order", key: Optional[str] = None,
+                    timeout: float = ACK_TIMEOUT) -> Dict[str, Any]:
+        """
+        Send through the account's durable outbox and wait up to `timeout` seconds for the
+        outcome; returns the intent row (status queued/sending if it is still in flight).
+        """
+        from .outbox import get_outbox  # outbox imports this module
+        outbox = get_outbox(self.client)
+        intent = outbox.enqueue(payload, kind, key, renew=key is not None)
+        return outbox.wait(intent["key"], timeout) or intent
+
+    @staticmethod
+    def build_order_payload(
+        exchange: str,
+        tradingsymbol: str,
+        token: str = "",
+        side: str = "BUY",
+        quantity: int = 0,
+        price_type: str = "MARKET",
+        product_type: str = "MIS",
+        price: float = 0.0,
+        trigger_price: float = 0.0,
+        validity: str = "DAY",
+        remarks: str = "",
+    ) -> Dict[str, Any]:
         payload = {
             "exchange": exchange,
             "tradingsymbol": tradingsymbol,
@@ -39,8 +175,122 @@ class OrdersService:
             "trigger_price": str(trigger_price or 0),
             "validity": validity.upper(),
         }
-        log.info("Placing order payload: %s", payload)
-        return self.client.place_order(payload)
+        if remarks:
+            payload["remarks"] = remarks
+        return payload
+
+    def place_basket(
+        self,
+        specs: List[Dict[str, Any]],
+        max_workers: Optional[int] = None,
+        track: bool = True,
+        poll_interval: float = BASKET_POLL_INTERVAL,
+        timeout: float = BASKET_TRACK_TIMEOUT,
+    ) -> pd.DataFrame:
+        """
+        Validate every leg locally, submit the basket concurrently within the rate limit and,
+        with `track`, poll order(order_id) until each leg is filled/rejected or `timeout` passes.
+        Specs use the place_regular argument names. Nothing is sent if any leg is invalid.
+        Returns one row per leg with order_id, status, fills and submit-to-ack latency.
+        """
+        legs = self.submit_legs(specs, max_workers)
+        if track:
+            self.track_legs(legs, max_workers, poll_interval, timeout)
+        table = self.legs_table(legs)
+        log.info("basket of %d legs: %s", len(legs), table["status"].value_counts().to_dict())
+        return table
+
+    @staticmethod
+    def legs_table(legs: List[Dict[str, Any]]) -> pd.DataFrame:
+        return pd.DataFrame(legs).drop(columns=["submitted_at"], errors="ignore")
+
+    def submit_legs(self, specs: List[Dict[str, Any]], max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Validate and concurrently submit order specs; returns mutable leg records."""
+        specs, checks = self.validator.check_batch(specs, check_bands=True)
+        legs: List[Dict[str, Any]] = []
+        for i, spec in enumerate(specs):
+            errors = validate_order_spec(spec) + checks[i]
+            legs.append({
+                "leg": i, "tradingsymbol": spec.get("tradingsymbol"), "side": str(spec.get("side") or "").upper(),
+                "quantity": spec.get("quantity"), "status": "INVALID" if errors else "PENDING", "order_id": None,
+                "ack_ms": None, "fill_ms": None, "filled_qty": 0, "avg_price": None, "message": "; ".join(errors),
+                "submitted_at": None, "key": None,
+            })
+        if any(leg["status"] == "INVALID" for leg in legs):
+            for leg in legs:
+                if leg["status"] == "PENDING":
+                    leg.update(status="NOT_SENT", message="basket has invalid legs")
+            return legs
+
+        fields = ("exchange", "tradingsymbol", "token", "side", "quantity", "price_type", "product_type",
+                  "price", "trigger_price", "validity", "remarks")
+
+        # the tracker follows every leg the outbox acknowledges and journals its final state,
+        # whether or not the legs are tracked here
+        from .order_tracker import get_order_tracker  # order_tracker imports this module
+        get_order_tracker(self.client)
+
+        def _submit(i: int) -> None:
+            leg = legs[i]
+            payload = self.build_order_payload(**{k: specs[i][k] for k in fields if k in specs[i]})
+            leg["submitted_at"] = time.monotonic()
+            intent = self.send_intent(payload)
+            leg["key"] = intent["key"]
+            if intent["status"] in ("placed", "exists") and intent.get("order_id"):
+                leg["ack_ms"] = round((time.monotonic() - leg["submitted_at"]) * 1000, 1)
+                leg.update(status="ACKED", order_id=str(intent["order_id"]), message="")
+            elif intent["status"] == "rejected":
+                leg.update(status="REJECTED", message=intent.get("error") or "")
+            elif intent["status"] in ("failed", "unknown"):
+                leg.update(status="ERROR", message=intent.get("error") or intent["status"])
+            else:
+                leg.update(status="QUEUED", message=f"still in the outbox ({intent['key']})")
+
+        self._run(_submit, range(len(legs)), max_workers)
+        return legs
+
+    def _poll_leg(self, leg: Dict[str, Any]) -> None:
+        self.limiter.acquire()
+        try:
+            resp = self.client.order(leg["order_id"])
+        except Exception as e:
+            leg["message"] = f"poll failed: {e}"
+            return
+        rows = resp.get("orders") if isinstance(resp, dict) and isinstance(resp.get("orders"), list) else [resp]
+        row = rows[0] if rows and isinstance(rows[0], dict) else {}
+        status = order_status(row)
+        if not status:
+            return
+        leg["status"] = status
+        leg["filled_qty"] = int(float(row.get("filled_qty") or 0))
+        avg = float(row.get("average_traded_price") or row.get("avg_price") or 0)
+        leg["avg_price"] = avg or leg["avg_price"]
+        if status == "COMPLETE" and leg["fill_ms"] is None:
+            leg["fill_ms"] = round((time.monotonic() - leg["submitted_at"]) * 1000, 1)
+        if status == "REJECTED":
+            leg["message"] = row.get("message") or row.get("reject_reason") or leg["message"]
+
+    def track_legs(
+        self,
+        legs: List[Dict[str, Any]],
+        max_workers: Optional[int] = None,
+        poll_interval: float = BASKET_POLL_INTERVAL,
+        timeout: float = BASKET_TRACK_TIMEOUT,
+    ) -> None:
+        """Poll open legs until all reach a final state or `timeout` seconds pass."""
+        deadline = time.monotonic() + timeout
+        while True:
+            open_legs = [leg for leg in legs if leg["order_id"] and leg["status"] not in TERMINAL_STATUSES]
+            if not open_legs or time.monotonic() >= deadline:
+                return
+            self._run(self._poll_leg, open_legs, max_workers)
+            time.sleep(poll_interval)
+
+    def _run(self, fn, items, max_workers: Optional[int] = None) -> None:
+        items = list(items)
+        workers = max(1, min(max_workers or self.max_workers, len(items) or 1))
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            list(ex.map(fn, items))
 
     def build_gtt_oco_payloads_from_holding(
         self,
@@ -49,8 +299,8 @@ class OrdersService:
         token: str,
         qty: int,
         avg_price: float,
-        sl_pct: float = -2.0,
-        target_pcts: List[float] = (10.0, 20.0, 30.0, 40.0),
+        sl_pct: float = DEFAULT_SL_PCT,
+        target_pcts: List[float] = DEFAULT_TARGET_PCTS,
     ) -> List[Dict[str, Any]]:
         payloads: List[Dict[str, Any]] = []
 
@@ -87,12 +337,477 @@ class OrdersService:
             })
         return payloads
 
-    def place_gtt_bulk(self, gtt_payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        results = []
-        for p in gtt_payloads:
+    def pending_gtt_book(self) -> List[Dict[str, Any]]:
+        self.limiter.acquire()
+        resp = self.client.gtt_orders()
+        return (resp.get("pendingGTTOrderBook") if isinstance(resp, dict) else None) or []
+
+    def pending_gtt_keys(self, rows: Optional[List[Dict[str, Any]]] = None) -> Set[str]:
+        """Idempotency keys found in the remarks of the pending GTT/OCO book."""
+        rows = self.pending_gtt_book() if rows is None else rows
+        keys = set()
+        for row in rows:
+            keys.update(IDEMPOTENCY_TAG.findall(str(row.get("remarks") or "")))
+        return keys
+
+    def place_gtt_bulk(
+        self,
+        gtt_payloads: List[Dict[str, Any]],
+        max_workers: Optional[int] = None,
+        skip_existing: bool = True,
+        timeout: float = ACK_TIMEOUT,
+    ) -> List[Dict[str, Any]]:
+        """
+        Place GTT/OCO payloads through the account's outbox, waiting for them concurrently.
+        Each payload is tagged with its idempotency key, which is also the outbox key; legs
+        already in the pending book are skipped, and the outbox only retries a failed send
+        once the book shows it did not land ("unknown" when the book cannot be read).
+        Results come back in input order with per-leg latency.
+        """
+        # GTT triggers may sit outside today's circuit band, so only tick/lot checks apply
+        checked, errors = self.validator.check_batch(gtt_payloads, check_bands=False)
+        tagged = [tag_payload(p) for p in checked]
+        invalid = {i: "; ".join(e) for i, e in enumerate(errors) if e}
+        existing: Set[str] = set()
+        if skip_existing and tagged:
             try:
-                r = self.client.gtt_place(p)
-                results.append({"ok": True, "req": p, "resp": r})
+                existing = self.pending_gtt_keys()
             except Exception as e:
-                results.append({"ok": False, "req": p, "error": str(e)})
-        return results
+                log.warning("could not read pending GTT book: %s", e)
+
+        def _one(i: int) -> Dict[str, Any]:
+            p = tagged[i]
+            key = IDEMPOTENCY_TAG.search(p["remarks"]).group(1)
+            if i in invalid:
+                return {"ok": False, "req": p, "key": key, "attempts": 0, "status": "invalid", "error": invalid[i]}
+            if key in existing:
+                return {"ok": True, "req": p, "key": key, "attempts": 0, "status": "exists", "resp": None, "latency_ms": 0.0}
+            t0 = time.monotonic()
+            intent = self.send_intent(p, "gtt", key, timeout)
+            result = {
+                "ok": intent["status"] in ("placed", "exists"), "req": p, "key": key, "attempts": intent["attempts"],
+                "status": intent["status"], "resp": json.loads(intent["response"]) if intent.get("response") else None,
+                "latency_ms": round((time.monotonic() - t0) * 1000, 1),
+            }
+            if intent.get("error") and not result["ok"]:
+                result["error"] = intent["error"]
+            log.info("GTT %s %s in %.0f ms (%d attempts)", key, result["status"], result["latency_ms"], result["attempts"])
+            return result
+
+        workers = max(1, min(max_workers or self.max_workers, len(tagged) or 1))
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            return list(ex.map(_one, range(len(tagged))))
+
+    def slice_spec(self, spec: Dict[str, Any], master=None) -> List[Dict[str, Any]]:
+        """
+        Child specs of one order, each whole lots and within the underlying's freeze quantity.
+        LOTSIZE and SYMBOL come from the instrument master.
+        """
+        master = master or get_master()
+        rec = master.lookup_symbol(spec["exchange"], spec["tradingsymbol"]) or {}
+        lotsize = int(rec.get("LOTSIZE") or 1)
+        qtys = slice_quantity(int(spec["quantity"]), lotsize, freeze_qty(rec.get("SYMBOL", "")))
+        token = spec.get("token") or rec.get("TOKEN", "")
+        return [dict(spec, quantity=q, token=token) for q in qtys]
+
+    def place_sliced(
+        self,
+        spec: Dict[str, Any],
+        schedule: str = "parallel",
+        interval: float = 5.0,
+        master=None,
+        timeout: float = BASKET_TRACK_TIMEOUT,
+    ) -> Dict[str, Any]:
+        """
+        Split one large order into compliant children (see slice_spec) and submit them:
+          parallel - all children at once as a basket
+          iceberg  - next child only after the previous one completes
+          twap     - one child every `interval` seconds
+        Blocks until done; start_sliced() runs the same schedule in the background.
+        Returns {"parent": aggregated status, "children": per-child table}.
+        """
+        job = SlicedOrder(self, spec, schedule, interval, master, timeout)
+        job.run()
+        return job.result
+
+    def start_sliced(
+        self,
+        spec: Dict[str, Any],
+        schedule: str = "twap",
+        interval: float = 5.0,
+        master=None,
+        timeout: float = BASKET_TRACK_TIMEOUT,
+    ) -> "SlicedOrder":
+        """place_sliced() on a background thread; poll the returned job's progress()."""
+        job = SlicedOrder(self, spec, schedule, interval, master, timeout)
+        job.start()
+        return job
+
+    @staticmethod
+    def aggregate_children(spec: Dict[str, Any], table: pd.DataFrame) -> Dict[str, Any]:
+        filled = pd.to_numeric(table["filled_qty"], errors="coerce").fillna(0)
+        prices = pd.to_numeric(table["avg_price"], errors="coerce").fillna(0)
+        total = int(filled.sum())
+        quantity = int(spec["quantity"])
+        statuses = set(table["status"])
+        if total >= quantity:
+            status = "COMPLETE"
+        elif total > 0:
+            status = "PARTIAL"
+        elif statuses <= {"REJECTED", "INVALID", "NOT_SENT", "ERROR"}:
+            status = "REJECTED"
+        else:
+            status = "OPEN"
+        return {
+            "tradingsymbol": spec["tradingsymbol"], "side": str(spec.get("side", "")).upper(),
+            "quantity": quantity, "children": len(table), "sent": int(table["order_id"].notna().sum()),
+            "filled_qty": total, "avg_price": round(float((filled * prices).sum() / total), 4) if total else None,
+            "status": status,
+        }
+
+    @staticmethod
+    def atr_table(bars: BarStore, segment: str, tokens: List[str], period: int = ATR_PERIOD) -> pd.DataFrame:
+        """Last close and simple-average true range per token from cached daily bars."""
+        panels = bars.panels(segment, tokens, ["High", "Low", "Close"], tail=period + 1)
+        high, low, close = panels["High"], panels["Low"], panels["Close"]
+        if close.empty:
+            return pd.DataFrame(columns=["last_close", "atr"])
+        prev = close.shift(1)
+        tr = np.maximum(high - low, np.maximum((high - prev).abs(), (low - prev).abs()))
+        return pd.DataFrame({"last_close": close.ffill().iloc[-1], "atr": tr.iloc[1:].mean()})
+
+    def build_portfolio_ladder(
+        self,
+        holdings: pd.DataFrame,
+        sl_pct: float = DEFAULT_SL_PCT,
+        target_pcts: List[float] = DEFAULT_TARGET_PCTS,
+        bars: Optional[BarStore] = None,
+        sl_atr: float = DEFAULT_SL_ATR,
+        target_atrs: List[float] = DEFAULT_TARGET_ATRS,
+        atr_period: int = ATR_PERIOD,
+    ) -> pd.DataFrame:
+        """
+        SL + target GTT legs for every holding in one pass: a (holdings x legs) price grid.
+        Levels are % of average price, or ATR multiples around the last close when `bars` is
+        given (holdings without cached bars fall back to %). Returns one row per leg with the
+        payload fields of build_gtt_oco_payloads_from_holding.
+        """
+        h = holdings.rename(columns=HOLDING_COLUMNS)
+        h = h.loc[:, ~h.columns.duplicated()]
+        h = h[(pd.to_numeric(h["qty"], errors="coerce") > 0) & (pd.to_numeric(h["avg_price"], errors="coerce") > 0)]
+        if h.empty:
+            return pd.DataFrame()
+        exchange = h["exchange"].astype(str).to_numpy() if "exchange" in h.columns else np.full(len(h), "NSE")
+        avg = h["avg_price"].astype(float).to_numpy()
+        qty = h["qty"].astype(float).astype(int).to_numpy()
+
+        pcts = np.array([sl_pct] + list(target_pcts), dtype=float)
+        prices = avg[:, None] * (1.0 + pcts[None, :] / 100.0)
+        labels = np.array([f"Auto SL {sl_pct:.2f}%"] + [f"Auto Target +{p:.0f}%" for p in target_pcts], dtype=object)
+        remarks = np.broadcast_to(labels, prices.shape).copy()
+
+        if bars is not None:
+            tokens = h["token"].astype(str).to_numpy()
+            last, rng = np.full(len(h), np.nan), np.full(len(h), np.nan)
+            for seg in np.unique(exchange):
+                m = exchange == seg
+                atr = self.atr_table(bars, seg, tokens[m].tolist(), atr_period).reindex(tokens[m])
+                last[m], rng[m] = atr["last_close"].to_numpy(dtype=float), atr["atr"].to_numpy(dtype=float)
+            ok = rng > 0
+            mults = np.array([-sl_atr] + list(target_atrs), dtype=float)
+            atr_prices = last[:, None] + rng[:, None] * mults[None, :]
+            prices[ok] = atr_prices[ok]
+            atr_labels = np.array([f"Auto SL -{sl_atr:g}ATR"] + [f"Auto Target +{m:g}ATR" for m in target_atrs], dtype=object)
+            remarks[ok] = atr_labels
+
+        n, legs = prices.shape
+        out = pd.DataFrame({
+            "exchange": np.repeat(exchange, legs),
+            "tradingsymbol": np.repeat(h["symbol"].astype(str).to_numpy(), legs),
+            "token": np.repeat(h["token"].astype(str).to_numpy(), legs),
+            "alert_type": "GTT",
+            "side": "SELL",
+            "quantity": np.repeat(qty, legs),
+            "trigger_price": np.round(prices.ravel(), 2),
+            "limit_price": np.round(prices.ravel(), 2),
+            "variety": np.tile(np.array(["OCO"] + ["GTT"] * (legs - 1)), n),
+            "remarks": remarks.ravel(),
+        })
+        return out[out["trigger_price"] > 0].reset_index(drop=True)
+
+    def protect_portfolio(self, holdings: pd.DataFrame, max_workers: Optional[int] = None, **ladder) -> Dict[str, Any]:
+        """
+        Build the ladder for every holding, drop legs already in the pending GTT book
+        (same idempotency key, or same symbol and trigger price) and submit the
+        rest as one concurrent batch. Keyword arguments go to build_portfolio_ladder.
+        """
+        t0 = time.monotonic()
+        legs = self.build_portfolio_ladder(holdings, **ladder)
+        if legs.empty:
+            return {"legs": 0, "skipped": 0, "results": [], "elapsed_s": 0.0}
+        payloads, _ = self.validator.check_batch(legs.to_dict("records"), check_bands=False)
+        book = self.pending_gtt_book()
+        keys = self.pending_gtt_keys(book)
+        live = pd.DataFrame(book)
+        existing = set()
+        if not live.empty and "tradingsymbol" in live.columns:
+            col = next((c for c in ("trigger_price", "alert_price") if c in live.columns), None)
+            trig = pd.to_numeric(live[col], errors="coerce") if col else pd.Series(index=live.index, dtype=float)
+            existing = set(zip(live["tradingsymbol"].astype(str), np.round(trig.fillna(-1).to_numpy(), 2)))
+        fresh = [p for p in payloads
+                 if idempotency_key(p) not in keys
+                 and (str(p["tradingsymbol"]), round(float(p["trigger_price"]), 2)) not in existing]
+        results = self.place_gtt_bulk(fresh, max_workers=max_workers, skip_existing=False) if fresh else []
+        elapsed = time.monotonic() - t0
+        log.info("portfolio ladder: %d legs, %d already pending, placed in %.2fs", len(payloads), len(payloads) - len(fresh), elapsed)
+        return {"legs": len(payloads), "skipped": len(payloads) - len(fresh), "results": results, "elapsed_s": round(elapsed, 2)}
+
+    # ---- bulk actions on the order and GTT books ----
+    @staticmethod
+    def select_orders(
+        book: pd.DataFrame,
+        symbol: str = "",
+        side: Optional[str] = None,
+        product: Optional[str] = None,
+        statuses: Optional[List[str]] = None,
+        min_age_s: Optional[float] = None,
+        now: Optional[pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        """
+        Rows of an order or GTT book matching every given filter: symbol substring, side
+        (order_type), product_type, status (order_status/status) and minimum age in seconds
+        taken from the first time column present.
+        """
+        if book.empty:
+            return book
+        mask = pd.Series(True, index=book.index)
+
+        def col(name: str) -> pd.Series:
+            return book[name].astype(str).str.upper() if name in book.columns else pd.Series("", index=book.index)
+
+        if symbol:
+            mask &= col("tradingsymbol").str.contains(symbol.upper(), regex=False)
+        if side:
+            mask &= col("order_type") == side.upper()
+        if product:
+            mask &= col("product_type") == product.upper()
+        if statuses:
+            status_col = "order_status" if "order_status" in book.columns else "status"
+            mask &= col(status_col).isin([s.upper() for s in statuses])
+        if min_age_s:
+            tcol = next((c for c in ORDER_TIME_FIELDS if c in book.columns), None)
+            if tcol is not None:
+                placed = pd.to_datetime(book[tcol], errors="coerce", dayfirst=True, format="mixed")
+                age = ((now or pd.Timestamp.now()) - placed).dt.total_seconds()
+                mask &= age.fillna(0) >= min_age_s
+        return book[mask]
+
+    def _bulk(self, rows: List[Dict[str, Any]], action: str, call, max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """Run `call(row)` concurrently under the rate limiter; one outcome row per order."""
+        t0 = time.monotonic()
+        id_field = "order_id" if action in ("cancel", "modify") else "alert_id"
+
+        def _one(row: Dict[str, Any]) -> Dict[str, Any]:
+            out = {id_field: row.get(id_field), "tradingsymbol": row.get("tradingsymbol"), "action": action,
+                   "status": "failed", "message": "", "latency_ms": None}
+            self.limiter.acquire()
+            t = time.monotonic()
+            try:
+                resp = call(row)
+            except Exception as e:
+                out["message"] = str(e)
+            else:
+                ok = isinstance(resp, dict) and str(resp.get("status", "")).upper() == "SUCCESS"
+                out.update(status="ok" if ok else "rejected", message=str(resp.get("message", "") if isinstance(resp, dict) else resp))
+            out["latency_ms"] = round((time.monotonic() - t) * 1000, 1)
+            return out
+
+        results: List[Dict[str, Any]] = []
+        if rows:
+            workers = max(1, min(max_workers or self.max_workers, len(rows)))
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                results = list(ex.map(_one, rows))
+        elapsed = time.monotonic() - t0
+        table = pd.DataFrame(results)
+        log.info("bulk %s: %d orders, %d ok in %.2fs", action, len(rows),
+                 int((table["status"] == "ok").sum()) if not table.empty else 0, elapsed)
+        return {"results": table, "elapsed_s": round(elapsed, 2)}
+
+    @staticmethod
+    def _shift(value: Any, pct: float) -> Optional[float]:
+        try:
+            v = float(value)
+        except (TypeError, ValueError):
+            return None
+        return v * (1.0 + pct / 100.0) if v > 0 else None
+
+    def bulk_cancel(self, orders: pd.DataFrame, max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """Cancel every order in `orders` (e.g. from select_orders); {"results", "elapsed_s"}."""
+        rows = orders.to_dict("records") if not orders.empty else []
+        return self._bulk(rows, "cancel", lambda r: self.client.cancel_order(str(r["order_id"])), max_workers)
+
+    def bulk_modify(
+        self,
+        orders: pd.DataFrame,
+        price_pct: float = 0.0,
+        trigger_pct: float = 0.0,
+        quantity: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Move price and/or trigger of every order by a percentage (rounded to tick) and
+        optionally set a new quantity, e.g. trigger_pct=1.0 raises all SL triggers by 1%.
+        """
+        payloads = []
+        for r in (orders.to_dict("records") if not orders.empty else []):
+            p = {
+                "order_id": str(r["order_id"]), "exchange": r.get("exchange"), "tradingsymbol": r.get("tradingsymbol"),
+                "order_type": r.get("order_type"), "price_type": r.get("price_type", "LIMIT"),
+                "product_type": r.get("product_type", "NORMAL"),
+                "quantity": str(int(quantity) if quantity else int(float(r.get("quantity") or 0))),
+                "price": str(self._shift(r.get("price"), price_pct) or r.get("price") or 0),
+            }
+            trig = self._shift(r.get("trigger_price"), trigger_pct)
+            if trig:
+                p["trigger_price"] = str(trig)
+            payloads.append(p)
+        payloads, errors = self.validator.check_batch(payloads, check_bands=True)
+        bad = {p["order_id"]: "; ".join(e) for p, e in zip(payloads, errors) if e}
+        result = self._bulk([p for p in payloads if p["order_id"] not in bad], "modify", self.client.modify_order, max_workers)
+        if bad:
+            invalid = pd.DataFrame([{"order_id": oid, "action": "modify", "status": "invalid", "message": msg}
+                                    for oid, msg in bad.items()])
+            result["results"] = pd.concat([result["results"], invalid], ignore_index=True)
+        return result
+
+    @staticmethod
+    def is_oco(row: Dict[str, Any]) -> bool:
+        return any(str(row.get(f) or "").strip() not in ("", "0", "0.0", "nan") for f in OCO_FIELDS)
+
+    def bulk_cancel_gtt(self, alerts: pd.DataFrame, max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """Cancel GTT and OCO alerts from the pending book by alert_id."""
+        rows = alerts.to_dict("records") if not alerts.empty else []
+
+        def _cancel(r: Dict[str, Any]) -> Any:
+            alert_id = str(r["alert_id"])
+            return self.client.oco_cancel(alert_id) if self.is_oco(r) else self.client.gtt_cancel(alert_id)
+
+        return self._bulk(rows, "gtt_cancel", _cancel, max_workers)
+
+    def bulk_modify_gtt(
+        self,
+        alerts: pd.DataFrame,
+        trigger_pct: float = 0.0,
+        price_pct: Optional[float] = None,
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Shift GTT trigger (alert_price) and limit price by a percentage; for OCO alerts both
+        the stoploss and target legs move. `price_pct` defaults to `trigger_pct`.
+        """
+        price_pct = trigger_pct if price_pct is None else price_pct
+        payloads = []
+        for r in (alerts.to_dict("records") if not alerts.empty else []):
+            common = {"alert_id": str(r["alert_id"]), "exchange": r.get("exchange"), "tradingsymbol": r.get("tradingsymbol"),
+                      "order_type": r.get("order_type"), "product_type": r.get("product_type", "CNC")}
+            if self.is_oco(r):
+                p = dict(common, remarks=r.get("remarks", ""),
+                         target_quantity=str(r.get("target_quantity") or r.get("quantity") or ""),
+                         stoploss_quantity=str(r.get("stoploss_quantity") or r.get("quantity") or ""),
+                         target_price=str(self._shift(r.get("target_price"), trigger_pct) or r.get("target_price")),
+                         stoploss_price=str(self._shift(r.get("stoploss_price"), trigger_pct) or r.get("stoploss_price")))
+            else:
+                trigger = r.get("trigger_price", r.get("alert_price"))
+                p = dict(common, condition=r.get("condition", ""), quantity=str(r.get("quantity") or ""),
+                         alert_price=str(self._shift(trigger, trigger_pct) or trigger),
+                         price=str(self._shift(r.get("price"), price_pct) or r.get("price") or 0))
+            payloads.append(p)
+        payloads, _ = self.validator.check_batch(payloads, check_bands=False)
+
+        def _modify(p: Dict[str, Any]) -> Any:
+            return self.client.oco_modify(p) if "stoploss_price" in p else self.client.gtt_modify(p)
+
+        return self._bulk(payloads, "gtt_modify", _modify, max_workers)
+
+
+class SlicedOrder:
+    """
+    One sliced parent order working through its schedule (see OrdersService.place_sliced).
+    run() blocks; start() runs it on a daemon thread so TWAP / iceberg schedules do not
+    hold up the page, which reads progress() between reruns and may cancel() the rest.
+    """
+
+    def __init__(
+        self,
+        service: OrdersService,
+        spec: Dict[str, Any],
+        schedule: str = "parallel",
+        interval: float = 5.0,
+        master=None,
+        timeout: float = BASKET_TRACK_TIMEOUT,
+    ):
+        if schedule not in SLICE_SCHEDULES:
+            raise ValueError(f"schedule must be one of {SLICE_SCHEDULES}")
+        self.service = service
+        self.spec = spec
+        self.schedule = schedule
+        self.interval = interval
+        self.timeout = timeout
+        self.children = service.slice_spec(spec, master)
+        self.legs: List[Dict[str, Any]] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run(self) -> None:
+        svc = self.service
+        if self.schedule == "parallel" or len(self.children) <= 1:
+            self.legs.extend(svc.submit_legs(self.children))
+        else:
+            for i, child in enumerate(self.children):
+                if self._stop.is_set():
+                    log.info("sliced %s cancelled after %d of %d children", self.spec.get("tradingsymbol"), i, len(self.children))
+                    break
+                t0 = time.monotonic()
+                leg = svc.submit_legs([child])[0]
+                leg["leg"] = i
+                self.legs.append(leg)
+                if self.schedule == "iceberg":
+                    svc.track_legs([leg], timeout=self.timeout)
+                    if leg["status"] != "COMPLETE":
+                        log.warning("iceberg halted after child %d: %s", i, leg["status"])
+                        break
+                elif i < len(self.children) - 1:
+                    self._stop.wait(max(0.0, self.interval - (time.monotonic() - t0)))
+        svc.track_legs(self.legs, timeout=self.timeout)
+        table = svc.legs_table(self.legs)
+        self.result = {"parent": svc.aggregate_children(self.spec, table), "children": table}
+
+    def _run_safe(self) -> None:
+        try:
+            self.run()
+        except Exception as e:
+            log.exception("sliced order %s failed", self.spec.get("tradingsymbol"))
+            self.error = str(e)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run_safe, name=f"sliced-{self.spec.get('tradingsymbol')}", daemon=True)
+            self._thread.start()
+
+    def cancel(self) -> None:
+        """Send no further children; those already sent are left working."""
+        self._stop.set()
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None or self.error is not None
+
+    def progress(self) -> Dict[str, Any]:
+        legs = list(self.legs)
+        return {
+            "sent": len(legs), "total": len(self.children), "done": self.done,
+            "cancelled": self._stop.is_set(), "error": self.error,
+            "children": self.service.legs_table(legs) if legs else pd.DataFrame(),
+        }
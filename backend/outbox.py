@@ -0,0 +1,370 @@
+# backend/outbox.py
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from .accounts import on_release
+from .orders import IDEMPOTENCY_TAG, OrdersService
+
+log = logging.getLogger("backend.outbox")
+log.setLevel(logging.INFO)
+
+OUTBOX_PATH = "data/outbox/outbox.db"
+OUTBOX_WORKERS = 4
+OUTBOX_RETRIES = 3
+OUTBOX_BACKOFF = 1.0
+# A 'sending' row older than this belongs to a worker that died; it is re-queued
+SEND_LEASE = 60.0
+POLL_INTERVAL = 0.5
+# Client method that sends each kind of intent
+SEND_METHODS = {"order": "place_order", "gtt": "gtt_place", "oco": "oco_place"}
+INTENT_KINDS = tuple(SEND_METHODS)
+# "unknown": the book could not be read before a retry, so the intent was not resent
+FINAL_STATES = ("placed", "exists", "rejected", "failed", "unknown")
+
+# Keys are unique per account: GTT keys are content hashes, so two accounts share them.
+# uid is '' (not NULL) for clients without one, since UNIQUE treats NULLs as distinct.
+TABLE = """
+CREATE TABLE IF NOT EXISTS intents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    uid TEXT NOT NULL DEFAULT '',
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    order_id TEXT,
+    response TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    next_try REAL NOT NULL,
+    UNIQUE (uid, key)
+)"""
+INDEXES = """
+CREATE INDEX IF NOT EXISTS intents_due ON intents (status, next_try);
+CREATE INDEX IF NOT EXISTS intents_uid ON intents (uid, status, next_try);
+"""
+INTENT_COLUMNS = ("id", "key", "uid", "kind", "payload", "status", "attempts", "order_id", "response", "error",
+                  "created", "updated", "next_try")
+
+
+class OrderOutbox:
+    """
+    Durable queue of order intents in SQLite (WAL), one outbox per account: rows carry the
+    uid and each outbox only lists and sends its own. enqueue() commits the intent and
+    returns at once; background workers claim due rows, send them under the shared rate
+    limiter and write the outcome back. Every payload carries its intent key in remarks
+    ([gm:<key>]), so a send whose outcome is unknown (error, crash, restart) is only
+    retried after the order / GTT book shows it did not land.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        path: str = OUTBOX_PATH,
+        workers: int = OUTBOX_WORKERS,
+        retries: int = OUTBOX_RETRIES,
+        backoff: float = OUTBOX_BACKOFF,
+        orders: Optional[OrdersService] = None,
+        uid: Optional[str] = None,
+    ):
+        self.path = path
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.client = client
+        self.uid = str((uid if uid is not None else getattr(client, "uid", None)) or "")
+        self._orders = orders
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute(TABLE)
+        self._migrate()
+        self._db.executescript(INDEXES)
+        self._lock = threading.Lock()
+        self._wake = threading.Condition()
+        self._done = threading.Condition()
+        self._recovered = 0.0
+        self._stop = False
+        self._threads: List[threading.Thread] = []
+        self._subscribers: List[Callable[[Dict[str, Any]], None]] = []
+
+    def _keyed_per_account(self) -> bool:
+        for idx in self._db.execute("PRAGMA index_list(intents)").fetchall():
+            cols = [r["name"] for r in self._db.execute(f"PRAGMA index_info('{idx['name']}')")]
+            if idx["unique"] and cols == ["uid", "key"]:
+                return True
+        return False
+
+    def _migrate(self) -> None:
+        """Rebuild databases from before UNIQUE(uid, key) (key unique on its own, uid missing or NULL)."""
+        if self._keyed_per_account():
+            return
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            if self._keyed_per_account():   # another process migrated first
+                self._db.execute("COMMIT")
+                return
+            cols = {r["name"] for r in self._db.execute("PRAGMA table_info(intents)")}
+            uid = "COALESCE(uid, '')" if "uid" in cols else "''"
+            copy = ", ".join(uid if c == "uid" else c for c in INTENT_COLUMNS)
+            self._db.execute("ALTER TABLE intents RENAME TO intents_old")
+            self._db.execute(TABLE)
+            self._db.execute(f"INSERT INTO intents ({', '.join(INTENT_COLUMNS)}) SELECT {copy} FROM intents_old")
+            self._db.execute("DROP TABLE intents_old")
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        log.info("outbox: intents table migrated to per-account keys")
+
+    @property
+    def orders(self) -> OrdersService:
+        if self._orders is None or self._orders.client is not self.client:
+            self._orders = OrdersService(self.client)
+        return self._orders
+
+    # ---- producer side ----
+    def enqueue(self, payload: Dict[str, Any], kind: str = "order", key: Optional[str] = None, renew: bool = False) -> Dict[str, Any]:
+        """
+        Persist one intent and wake a worker. Pass a stable `key` to make a repeated enqueue
+        of the same intent a no-op; by default every call is a new intent. With `renew`, an
+        intent with that key that already finished is queued again (its retry still checks
+        the book first).
+        """
+        if kind not in INTENT_KINDS:
+            raise ValueError(f"kind must be one of {INTENT_KINDS}")
+        key = key or uuid.uuid4().hex[:10]
+        body = dict(payload)
+        remarks = IDEMPOTENCY_TAG.sub("", str(body.get("remarks") or "")).strip()
+        body["remarks"] = f"{remarks} [gm:{key}]".strip()
+        now = time.time()
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT OR IGNORE INTO intents (key, uid, kind, payload, created, updated, next_try) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, self.uid, kind, json.dumps(body), now, now, now),
+            )
+            if renew and not cur.rowcount:
+                self._db.execute(
+                    "UPDATE intents SET status = 'queued', attempts = 0, payload = ?, order_id = NULL, response = NULL, "
+                    "error = NULL, updated = ?, next_try = ? WHERE key = ? AND uid = ? AND status IN (%s)"
+                    % ", ".join("?" * len(FINAL_STATES)),
+                    (json.dumps(body), now, now, key, self.uid, *FINAL_STATES),
+                )
+        with self._wake:
+            self._wake.notify()
+        return self.get(key)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """This account's intent `key`."""
+        with self._lock:
+            row = self._db.execute("SELECT * FROM intents WHERE uid = ? AND key = ?", (self.uid, key)).fetchone()
+        return dict(row) if row else None
+
+    def wait(self, key: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Intent `key` once it reaches a final state, or as it stands after `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        with self._done:
+            while True:
+                row = self.get(key)
+                left = deadline - time.monotonic()
+                if row is None or row["status"] in FINAL_STATES or left <= 0:
+                    return row
+                self._done.wait(left)
+
+    def frame(self, limit: int = 100, status: Optional[str] = None) -> pd.DataFrame:
+        """This account's most recent intents first."""
+        sql, args = "SELECT * FROM intents WHERE uid = ?", [self.uid]
+        if status:
+            sql, args = sql + " AND status = ?", args + [status]
+        with self._lock:
+            rows = self._db.execute(sql + " ORDER BY id DESC LIMIT ?", (*args, int(limit))).fetchall()
+        return pd.DataFrame([dict(r) for r in rows])
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM intents WHERE uid = ? AND status IN ('queued', 'sending')", (self.uid,),
+            ).fetchone()[0]
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    # ---- worker side ----
+    def recover(self) -> int:
+        """
+        Re-queue this account's rows left 'sending' longer than SEND_LEASE by a dead worker;
+        their next claim checks the book first. Runs at start and again from the worker loop,
+        so rows still inside their lease at a restart are picked up once it expires.
+        """
+        now = self._recovered = time.time()
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE intents SET status = 'queued', next_try = ?, updated = ? WHERE uid = ? AND status = 'sending' AND updated < ?",
+                (now, now, self.uid, now - SEND_LEASE),
+            )
+        if cur.rowcount:
+            log.warning("outbox: re-queued %d intents with unknown outcome", cur.rowcount)
+        return cur.rowcount
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "UPDATE intents SET status = 'sending', attempts = attempts + 1, updated = ? "
+                "WHERE id = (SELECT id FROM intents WHERE uid = ? AND status = 'queued' AND next_try <= ? ORDER BY id LIMIT 1) "
+                "RETURNING *",
+                (now, self.uid, now),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def _finish(self, intent: Dict[str, Any], status: str, **fields: Any) -> None:
+        now = time.time()
+        fields = {k: (json.dumps(v, default=str) if k == "response" else v) for k, v in fields.items()}
+        sets = ", ".join(f"{k} = ?" for k in fields)
+        with self._lock:
+            self._db.execute(
+                f"UPDATE intents SET status = ?, updated = ?{', ' + sets if sets else ''} WHERE id = ?",
+                (status, now, *fields.values(), intent["id"]),
+            )
+        with self._done:
+            self._done.notify_all()
+        event = dict(intent, status=status, updated=now, **fields)
+        for cb in list(self._subscribers):
+            try:
+                cb(event)
+            except Exception as e:
+                log.error("outbox subscriber %r failed: %s", cb, e)
+
+    def find_in_book(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        """Book row carrying [gm:key] in its remarks, if the intent already landed."""
+        if kind == "order":
+            self.orders.limiter.acquire()
+            resp = self.client.orders()
+            rows = (resp.get("orders") if isinstance(resp, dict) else None) or []
+        else:
+            rows = self.orders.pending_gtt_book()
+        for row in rows:
+            if key in IDEMPOTENCY_TAG.findall(str(row.get("remarks") or "")):
+                return row
+        return None
+
+    def _send(self, intent: Dict[str, Any]) -> None:
+        payload, kind, key = json.loads(intent["payload"]), intent["kind"], intent["key"]
+        if intent["attempts"] > 1:
+            # an earlier attempt may have reached the broker before its reply was lost
+            try:
+                row = self.find_in_book(kind, key)
+            except Exception as e:
+                if intent["attempts"] > self.retries:
+                    # cannot tell whether it landed: resending could place it twice
+                    log.error("outbox: book check for %s failed, giving up without resending: %s", key, e)
+                    self._finish(intent, "unknown", error=f"book check failed, not resent: {e}")
+                else:
+                    log.warning("outbox: book check for %s failed, will retry: %s", key, e)
+                    self._finish(intent, "queued", next_try=time.time() + self.backoff, error=f"book check failed: {e}")
+                return
+            if row is not None:
+                self._finish(intent, "exists", order_id=str(row.get("order_id") or row.get("alert_id") or ""), response=row)
+                return
+
+        send = getattr(self.client, SEND_METHODS[kind])
+        self.orders.limiter.acquire()
+        with self._lock:   # renew the lease: the wait for a token may have been long
+            self._db.execute("UPDATE intents SET updated = ? WHERE id = ?", (time.time(), intent["id"]))
+        try:
+            resp = send(payload)
+        except Exception as e:
+            if intent["attempts"] > self.retries:
+                self._finish(intent, "failed", error=str(e))
+            else:
+                delay = self.backoff * 2 ** (intent["attempts"] - 1)
+                self._finish(intent, "queued", next_try=time.time() + delay, error=str(e))
+            return
+        ok = isinstance(resp, dict) and str(resp.get("status", "")).upper() == "SUCCESS"
+        order_id = str(resp.get("order_id") or resp.get("alert_id") or "") if isinstance(resp, dict) else ""
+        self._finish(intent, "placed" if ok else "rejected", order_id=order_id or None, response=resp,
+                     error=None if ok else str(resp.get("message", resp) if isinstance(resp, dict) else resp))
+
+    def _run(self) -> None:
+        while not self._stop:
+            if time.time() - self._recovered >= SEND_LEASE:
+                self.recover()
+            intent = self._claim() if self.client is not None else None
+            if intent is None:
+                with self._wake:
+                    self._wake.wait(POLL_INTERVAL)
+                continue
+            try:
+                self._send(intent)
+            except Exception as e:
+                log.error("outbox: intent %s crashed the sender: %s", intent["key"], e)
+                status = "failed" if intent["attempts"] > self.retries else "queued"
+                self._finish(intent, status, next_try=time.time() + self.backoff, error=str(e))
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self.recover()
+        self._stop = False
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"order-outbox-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def close(self) -> None:
+        self._stop = True
+        with self._wake:
+            self._wake.notify_all()
+        for t in self._threads:
+            if t is not threading.current_thread():
+                t.join(timeout=5)
+        self._threads = []
+        self._db.close()
+
+
+_outboxes: Dict[Optional[str], OrderOutbox] = {}
+_outbox_lock = threading.Lock()
+
+
+def get_outbox(client) -> OrderOutbox:
+    """Outbox of `client`'s account (one per uid); its workers send with that client."""
+    uid = getattr(client, "uid", None)
+    with _outbox_lock:
+        outbox = _outboxes.get(uid)
+        if outbox is None:
+            outbox = _outboxes[uid] = OrderOutbox(client, uid=uid)
+            atexit.register(outbox.close)
+        elif client is not None and outbox.client is not client:
+            outbox.client = client
+        if outbox.client is not None:
+            outbox.start()
+        return outbox
+
+
+def _on_account_released(uid: str) -> None:
+    """Stop the account's workers; its queued intents stay in the database for the next login."""
+    with _outbox_lock:
+        outbox = _outboxes.pop(uid, None)
+    if outbox is not None:
+        atexit.unregister(outbox.close)
+        outbox.close()
+
+
+on_release(_on_account_released)
@@ -0,0 +1,54 @@
+# backend/ratelimit.py
+import threading
+import time
+from typing import Optional
+
+# Broker order endpoints accept roughly 10 requests/second per session
+ORDER_RATE_PER_SEC = 10.0
+ORDER_BURST = 10
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket: `rate` tokens per second, at most `burst` saved up.
+    acquire() blocks until a token is available, so worker pools can share one limiter.
+    """
+
+    def __init__(self, rate: float = ORDER_RATE_PER_SEC, burst: Optional[int] = ORDER_BURST):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, int(rate)))
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Block until `tokens` are available; False if `timeout` seconds pass first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                wait = min(wait, left)
+            time.sleep(wait)
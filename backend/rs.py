@@ -0,0 +1,94 @@
+# backend/rs.py
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .bars import BarStore
+from .master import segment_tokens
+
+log = logging.getLogger("backend.rs")
+log.setLevel(logging.INFO)
+
+
+def relative_strength(closes: pd.DataFrame, index_close: pd.Series, sma_period: int = 20, lookback: int = 55) -> pd.DataFrame:
+    """
+    Relative strength of every column of `closes` (DateTime x token) against one index,
+    computed in a single vectorized pass. RS = StockClose / IndexClose * 100, same as
+    the chart viewer. Returns one row per token, sorted by RS percentile rank.
+    """
+    common = closes.index.intersection(index_close.index)
+    if len(common) == 0 or closes.empty:
+        return pd.DataFrame()
+    closes = closes.loc[common].sort_index()
+    idx = index_close.loc[common].sort_index()
+
+    rs = closes.div(idx, axis=0) * 100.0
+    rs_sma = rs.rolling(window=sma_period, min_periods=sma_period).mean()
+
+    above = (rs > rs_sma).to_numpy()
+    valid = rs_sma.notna().to_numpy()
+    flips = np.zeros_like(above)
+    flips[1:] = (above[1:] != above[:-1]) & valid[1:] & valid[:-1]
+    n = len(rs)
+    last_flip = np.where(flips, np.arange(n)[:, None], -1).max(axis=0)
+    bars_since = np.where(last_flip >= 0, n - 1 - last_flip, np.nan)
+    cross = np.where(flips[-1], np.where(above[-1], 1, -1), 0)
+
+    rs_last = rs.iloc[-1]
+    sma_last = rs_sma.iloc[-1]
+    rs_past = rs.shift(lookback).iloc[-1]
+    rs_change = (rs_last / rs_past - 1.0) * 100.0
+
+    out = pd.DataFrame({
+        "token": rs.columns.astype(str),
+        "close": closes.iloc[-1].to_numpy(),
+        "RS": rs_last.to_numpy(),
+        "RS_SMA": sma_last.to_numpy(),
+        "RS_vs_SMA_%": ((rs_last / sma_last - 1.0) * 100.0).to_numpy(),
+        "RS_above_SMA": above[-1] & valid[-1],
+        "RS_cross": cross,
+        "bars_since_cross": bars_since,
+        f"RS_change_{lookback}_%": rs_change.to_numpy(),
+    })
+    out = out.dropna(subset=["RS"])
+    out["RS_rank"] = out[f"RS_change_{lookback}_%"].rank(pct=True) * 100.0
+    out["as_of"] = common.max()
+    return out.sort_values("RS_rank", ascending=False, na_position="last").reset_index(drop=True)
+
+
+class RelativeStrengthEngine:
+    """
+    Batch RS scanner: ranks every instrument of a master-file segment against one index
+    using only cached bars (fill the cache first with BarStore.refresh).
+    """
+
+    def __init__(self, bars: BarStore):
+        self.bars = bars
+
+    def scan(
+        self,
+        master_df: pd.DataFrame,
+        segment: str,
+        index_segment: str,
+        index_token: str,
+        sma_period: int = 20,
+        lookback: int = 55,
+        instrument: Optional[str] = "EQ",
+        timeframe: str = "day",
+    ) -> pd.DataFrame:
+        universe = segment_tokens(master_df, segment, instrument)
+        index_close = self.bars.series(index_segment, str(index_token), "Close", timeframe)
+        if index_close.empty:
+            log.error("no cached bars for index %s|%s", index_segment, index_token)
+            return pd.DataFrame()
+        tail = sma_period + lookback + 5
+        closes = self.bars.panel(segment, universe["TOKEN"].tolist(), "Close", timeframe, tail=tail)
+        table = relative_strength(closes, index_close, sma_period=sma_period, lookback=lookback)
+        if table.empty:
+            return table
+        names = universe[["TOKEN", "TRADINGSYM", "SYMBOL"]].rename(columns={"TOKEN": "token"})
+        table = names.merge(table, on="token", how="inner")
+        log.info("RS scan %s vs %s|%s: %d instruments", segment, index_segment, index_token, len(table))
+        return table.sort_values("RS_rank", ascending=False, na_position="last").reset_index(drop=True)
@@ -0,0 +1,182 @@
+# backend/screener.py
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .bars import BarStore
+from .master import segment_tokens
+from .rs import relative_strength
+
+log = logging.getLogger("backend.screener")
+log.setLevel(logging.INFO)
+
+# Named filters; anything else passed to the screener is treated as a pandas query expression
+# over the indicator columns (close, ema_<n>, volume, vol_sma_20, vol_ratio, high_52w, low_52w,
+# pct_from_52w_high, RS, RS_SMA, RS_vs_SMA_%, rs_change, rs_rank).
+FILTERS: Dict[str, str] = {
+    "ema_aligned": "close > ema_20 > ema_50 > ema_200",
+    "rs_leader": "rs_rank >= 80",
+    "rs_above_sma": "RS > RS_SMA",
+    "volume_spike": "vol_ratio >= 2",
+    "near_52w_high": "pct_from_52w_high >= -5",
+}
+
+# Columns that only make sense across the whole universe, so filters using them run after the merge
+CROSS_SECTIONAL = ("rs_rank",)
+
+DEFAULT_EMAS = (10, 20, 50, 100, 200)
+
+
+def _expand(filters: Sequence[str]) -> List[str]:
+    return [FILTERS.get(f.strip(), f.strip()) for f in filters if f and f.strip()]
+
+
+def _is_cross_sectional(expr: str) -> bool:
+    return any(re.search(rf"\b{c}\b", expr) for c in CROSS_SECTIONAL)
+
+
+def _apply(df: pd.DataFrame, exprs: Sequence[str]) -> pd.DataFrame:
+    for expr in exprs:
+        if df.empty:
+            break
+        df = df.query(expr)
+    return df
+
+
+def indicator_snapshot(
+    panels: Dict[str, pd.DataFrame],
+    index_close: Optional[pd.Series] = None,
+    ema_periods: Sequence[int] = DEFAULT_EMAS,
+    rs_sma_period: int = 20,
+    rs_lookback: int = 55,
+) -> pd.DataFrame:
+    """
+    Last-bar indicator values for every token of the given wide panels
+    (DateTime x token), evaluated column-wise in one pass.
+    """
+    close = panels["Close"]
+    if close.empty:
+        return pd.DataFrame()
+    high, low, volume = panels["High"], panels["Low"], panels["Volume"]
+    last = close.index.max()
+
+    snap = pd.DataFrame(index=close.columns.astype(str))
+    snap["close"] = close.iloc[-1].to_numpy()
+    for p in ema_periods:
+        snap[f"ema_{p}"] = close.ewm(span=p, adjust=False).mean().iloc[-1].to_numpy()
+    vol_sma = volume.rolling(20, min_periods=20).mean()
+    snap["volume"] = volume.iloc[-1].to_numpy()
+    snap["vol_sma_20"] = vol_sma.iloc[-1].to_numpy()
+    prev_sma = vol_sma.shift(1).iloc[-1].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        snap["vol_ratio"] = snap["volume"].to_numpy() / prev_sma
+    window = high.loc[high.index > last - pd.Timedelta(days=365)]
+    snap["high_52w"] = window.max().to_numpy()
+    snap["low_52w"] = low.loc[low.index > last - pd.Timedelta(days=365)].min().to_numpy()
+    snap["pct_from_52w_high"] = (snap["close"] / snap["high_52w"] - 1.0) * 100.0
+
+    if index_close is not None and not index_close.empty:
+        rs = relative_strength(close, index_close, sma_period=rs_sma_period, lookback=rs_lookback)
+        if not rs.empty:
+            rs = rs.set_index("token")[["RS", "RS_SMA", "RS_vs_SMA_%", "RS_cross", f"RS_change_{rs_lookback}_%"]]
+            rs = rs.rename(columns={f"RS_change_{rs_lookback}_%": "rs_change"})
+            snap = snap.join(rs, how="left")
+    snap.index.name = "token"
+    return snap.reset_index()
+
+
+def _screen_shard(task: Dict[str, Any]) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Process-pool worker: load one shard of cached bars, compute indicators, apply the
+    shard-local filters. Returns (passing rows, rs_change of every token in the shard) so
+    ranks are taken over the whole universe. Module level so it pickles by reference.
+    """
+    bars = BarStore(root=task["bar_root"])
+    panels = bars.panels(task["segment"], task["tokens"], timeframe=task["timeframe"], tail=task["tail"])
+    snap = indicator_snapshot(
+        panels, task["index_close"], task["ema_periods"], task["rs_sma_period"], task["rs_lookback"],
+    )
+    if snap.empty:
+        return snap, pd.Series(dtype=float)
+    rs_change = snap.set_index("token")["rs_change"] if "rs_change" in snap.columns else pd.Series(dtype=float)
+    return _apply(snap, task["exprs"]), rs_change
+
+
+class ScreenerEngine:
+    """
+    Screens a master-file segment with declarative filters. The token universe is split
+    into shards that a process pool evaluates in parallel against the bar cache; the
+    shard results are merged, cross-sectional filters applied, and the set ranked.
+    """
+
+    def __init__(self, bars: BarStore, max_workers: Optional[int] = None, min_shard: int = 50):
+        self.bars = bars
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_shard = min_shard
+
+    def run(
+        self,
+        master_df: pd.DataFrame,
+        segment: str,
+        filters: Sequence[str],
+        index_segment: Optional[str] = None,
+        index_token: Optional[str] = None,
+        rank_by: str = "rs_change",
+        instrument: Optional[str] = "EQ",
+        timeframe: str = "day",
+        ema_periods: Sequence[int] = DEFAULT_EMAS,
+        rs_sma_period: int = 20,
+        rs_lookback: int = 55,
+    ) -> pd.DataFrame:
+        exprs = _expand(filters)
+        # cross-sectional ranks need every token, so shards may only pre-filter when none is used
+        if any(_is_cross_sectional(e) for e in exprs):
+            local, post = [], exprs
+        else:
+            local, post = exprs, []
+
+        universe = segment_tokens(master_df, segment, instrument)
+        tokens = universe["TOKEN"].astype(str).tolist()
+        index_close = None
+        if index_segment and index_token:
+            index_close = self.bars.series(index_segment, str(index_token), "Close", timeframe)
+
+        tail = max(260, max(ema_periods) * 3, rs_sma_period + rs_lookback + 5)
+        n_shards = max(1, min(self.max_workers * 4, len(tokens) // self.min_shard))
+        shards = [s.tolist() for s in np.array_split(np.array(tokens, dtype=object), n_shards) if len(s)]
+        tasks = [{
+            "bar_root": self.bars.root, "segment": segment, "tokens": shard, "timeframe": timeframe,
+            "tail": tail, "index_close": index_close, "ema_periods": tuple(ema_periods),
+            "rs_sma_period": rs_sma_period, "rs_lookback": rs_lookback, "exprs": local,
+        } for shard in shards]
+
+        if len(tasks) == 1 or self.max_workers == 1:
+            parts = [_screen_shard(t) for t in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(tasks))) as ex:
+                parts = list(ex.map(_screen_shard, tasks))
+
+        # percentile of rs_change among the whole universe, not just the rows that passed
+        changes = [c for _, c in parts if not c.empty]
+        rs_rank = pd.concat(changes).rank(pct=True) * 100.0 if changes else None
+        parts = [p for p, _ in parts if not p.empty]
+        if not parts:
+            return pd.DataFrame()
+        result = pd.concat(parts, ignore_index=True)
+        if rs_rank is not None:
+            result["rs_rank"] = result["token"].map(rs_rank).to_numpy()
+        result = _apply(result, post)
+        if result.empty:
+            return result
+
+        names = universe[["TOKEN", "TRADINGSYM", "SYMBOL"]].rename(columns={"TOKEN": "token"})
+        result = names.merge(result, on="token", how="inner")
+        if rank_by in result.columns:
+            result = result.sort_values(rank_by, ascending=False, na_position="last")
+        log.info("screen %s (%d shards): %d of %d passed %s", segment, len(tasks), len(result), len(tokens), exprs)
+        return result.reset_index(drop=True)
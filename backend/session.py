@@ -1,53 +1,167 @@
 # backend/session.py
+import hashlib
+import json
 import logging
-from typing import Optional
+import os
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Optional
 import pyotp
 from .api_client import APIClient
 
 log = logging.getLogger("backend.session")
 log.setLevel(logging.INFO)
 
+SESSION_DIR = "data/sessions"
+# Broker sessions last a trading day; renew well before that and validate cached ones
+SESSION_MAX_AGE = 20 * 3600.0
+RENEW_MARGIN = 3600.0
+RENEW_RETRY = 60.0
+OTP_TOKEN_KEYS = ("otp_token", "otpToken", "otp_request_token", "request_token")
+
+
 class SessionError(Exception):
     pass
 
+
+def extract_otp_token(s1: Any) -> Optional[str]:
+    if isinstance(s1, dict):
+        for k in OTP_TOKEN_KEYS:
+            if k in s1:
+                return s1.get(k)
+    return None
+
+
+def token_fingerprint(api_token: str) -> str:
+    """Short hash identifying the API token a cached session belongs to (the token itself is not stored)."""
+    return hashlib.sha256(str(api_token).encode("utf-8")).hexdigest()[:16]
+
+
+class SessionCache:
+    """
+    On-disk cache of broker sessions, one JSON file per uid holding api_session_key,
+    susertoken, uid/actid and the issue time. Files are written atomically with mode 0600
+    inside a 0700 directory.
+    """
+
+    def __init__(self, root: str = SESSION_DIR, max_age: float = SESSION_MAX_AGE):
+        self.root = root
+        self.max_age = max_age
+
+    def path(self, uid: str) -> str:
+        return os.path.join(self.root, f"{uid}.json")
+
+    def save(self, record: Dict[str, Any]) -> str:
+        os.makedirs(self.root, mode=0o700, exist_ok=True)
+        path = self.path(record["uid"])
+        tmp = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        return path
+
+    def load(self, uid: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(uid), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def find(self, api_token: str) -> Optional[Dict[str, Any]]:
+        """Newest cached session issued for `api_token` (any uid)."""
+        fp, best = token_fingerprint(api_token), None
+        if not os.path.isdir(self.root):
+            return None
+        for name in os.listdir(self.root):
+            if name.endswith(".json"):
+                rec = self.load(name[:-5])
+                if rec and rec.get("token_fp") == fp and (best is None or rec["issued_at"] > best["issued_at"]):
+                    best = rec
+        return best
+
+    def clear(self, uid: str) -> None:
+        try:
+            os.remove(self.path(uid))
+        except OSError:
+            pass
+
+    def fresh(self, record: Optional[Dict[str, Any]], margin: float = 0.0) -> bool:
+        return bool(record and record.get("api_session_key")) and time.time() - record["issued_at"] < self.max_age - margin
+
+
 class SessionManager:
     """
     Create and maintain a session. Use create_session(otp_code=None) to login.
     If totp_secret is provided, TOTP will be generated automatically.
     Returns an APIClient instance pre-populated with api_session_key & susertoken.
+    A cached session (see SessionCache) is reused when it is fresh and the broker still
+    accepts it; start_renewal() renews it via TOTP before it expires.
     """
-    def __init__(self, api_token: Optional[str] = None, api_secret: Optional[str] = None, totp_secret: Optional[str] = None):
+    def __init__(
+        self,
+        api_token: Optional[str] = None,
+        api_secret: Optional[str] = None,
+        totp_secret: Optional[str] = None,
+        cache: Optional[SessionCache] = None,
+        client_factory: Callable[..., Any] = APIClient,
+    ):
         # You can pass token/secret programmatically or rely on Streamlit secrets (frontend code will pass)
         self.api_token = api_token
         self.api_secret = api_secret
         self.totp_secret = totp_secret
+        self.cache = cache or SessionCache()
+        self.client_factory = client_factory
 
         self.api_session_key: Optional[str] = None
         self.susertoken: Optional[str] = None
         self.uid: Optional[str] = None
         self.actid: Optional[str] = None
+        self.issued_at: Optional[float] = None
+        self._clients: "weakref.WeakSet" = weakref.WeakSet()
+        self._renewer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
 
-    def create_session(self, otp_code: Optional[str] = None) -> APIClient:
+    def _check_credentials(self) -> None:
         if not self.api_token:
             raise SessionError("api_token required for session creation")
         if not self.api_secret:
             raise SessionError("api_secret required for session creation")
 
-        client = APIClient(api_token=self.api_token, api_secret=self.api_secret)
+    def _new_client(self, **session: Any):
+        client = self.client_factory(api_token=self.api_token, api_secret=self.api_secret, **session)
+        client.uid = self.uid
+        client.actid = self.actid
+        return client
+
+    def _client(self):
+        client = self._new_client(api_session_key=self.api_session_key, susertoken=self.susertoken)
+        self._clients.add(client)
+        return client
 
-        # step 1
+    # ---- two-step auth ----
+    def request_otp(self, auth=None) -> Optional[str]:
+        """auth_step1; returns the otp_token to pass to login() together with the OTP."""
+        self._check_credentials()
         try:
-            s1 = client.auth_step1()
+            s1 = (auth or self._new_client()).auth_step1()
         except Exception as e:
             log.exception("auth_step1 failed")
             raise SessionError(f"auth_step1 failed: {e}")
+        return extract_otp_token(s1)
 
-        otp_token = None
-        if isinstance(s1, dict):
-            for k in ("otp_token", "otpToken", "otp_request_token", "request_token"):
-                if k in s1:
-                    otp_token = s1.get(k)
-                    break
+    def login(self, otp_code: Optional[str] = None, otp_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        auth_step2 (running auth_step1 first unless `otp_token` is given); stores the new
+        session in the cache and returns its record.
+        """
+        self._check_credentials()
+        auth = self._new_client()
+        if otp_token is None:
+            otp_token = self.request_otp(auth)
 
         # generate totp if totp_secret provided
         if self.totp_secret and not otp_code:
@@ -62,7 +176,7 @@ class SessionManager:
 
         # step 2
         try:
-            s2 = client.auth_step2(otp_token=otp_token or "", otp_code=str(otp_code))
+            s2 = auth.auth_step2(otp_token=otp_token or "", otp_code=str(otp_code))
         except Exception as e:
             log.exception("auth_step2 failed")
             raise SessionError(f"auth_step2 failed: {e}")
@@ -70,20 +184,91 @@ class SessionManager:
         if isinstance(s2, dict):
             # flexible extraction
             self.api_session_key = s2.get("api_session_key") or s2.get("apiSessionKey") or s2.get("api_key") or s2.get("apiKey")
-            self.susertoken = s2.get("susertoken") or s2.get("susertoken")
+            self.susertoken = s2.get("susertoken")
             self.uid = s2.get("uid") or s2.get("user") or s2.get("actid")
             self.actid = s2.get("actid") or self.uid
 
         if not self.api_session_key:
             raise SessionError(f"Login response missing api_session_key: {s2}")
 
-        final_client = APIClient(
-            api_token=self.api_token,
-            api_secret=self.api_secret,
-            api_session_key=self.api_session_key,
-            susertoken=self.susertoken,
-            uid=self.uid,
-            actid=self.actid
-        )
+        self.issued_at = time.time()
+        record = self.record()
+        if self.uid:
+            try:
+                self.cache.save(record)
+            except OSError as e:
+                log.warning("could not cache session for uid=%s: %s", self.uid, e)
+        # long-lived clients handed out earlier pick up the new key in place
+        for client in list(self._clients):
+            client.api_session_key, client.susertoken = self.api_session_key, self.susertoken
         log.info("Session created for uid=%s", self.uid)
-        return final_client
+        return record
+
+    def record(self) -> Dict[str, Any]:
+        return {
+            "uid": self.uid, "actid": self.actid, "api_session_key": self.api_session_key,
+            "susertoken": self.susertoken, "issued_at": self.issued_at, "token_fp": token_fingerprint(self.api_token),
+        }
+
+    # ---- cached sessions ----
+    def validate(self, client) -> bool:
+        """Cheap authenticated call (/limits) to confirm the broker still accepts the session."""
+        try:
+            resp = client.limits()
+        except Exception as e:
+            log.info("cached session rejected: %s", e)
+            return False
+        return isinstance(resp, dict) and str(resp.get("status", "SUCCESS")).upper() not in ("ERROR", "FAILED", "FAILURE")
+
+    def restore(self, uid: Optional[str] = None):
+        """Client from a fresh, still-valid cached session, or None."""
+        self._check_credentials()
+        rec = self.cache.load(uid) if uid else self.cache.find(self.api_token)
+        if not self.cache.fresh(rec, RENEW_MARGIN) or rec.get("token_fp") != token_fingerprint(self.api_token):
+            return None
+        self.api_session_key, self.susertoken = rec["api_session_key"], rec.get("susertoken")
+        self.uid, self.actid, self.issued_at = rec["uid"], rec.get("actid") or rec["uid"], rec["issued_at"]
+        client = self._client()
+        if not self.validate(client):
+            self._clients.discard(client)
+            self.cache.clear(rec["uid"])
+            self.api_session_key = self.susertoken = None
+            return None
+        log.info("Reusing cached session for uid=%s (issued %.1fh ago)", self.uid, (time.time() - self.issued_at) / 3600)
+        return client
+
+    def create_session(self, otp_code: Optional[str] = None, otp_token: Optional[str] = None, use_cache: bool = True):
+        if use_cache and not otp_code:
+            client = self.restore(self.uid)
+            if client is not None:
+                return client
+        self.login(otp_code, otp_token)
+        return self._client()
+
+    # ---- proactive renewal ----
+    def renew_due(self) -> float:
+        """Seconds until the session should be renewed (<= 0 means now)."""
+        if self.issued_at is None:
+            return 0.0
+        return self.issued_at + self.cache.max_age - RENEW_MARGIN - time.time()
+
+    def _renew_loop(self) -> None:
+        while not self._stop.wait(max(1.0, self.renew_due())):
+            try:
+                self.login()
+            except SessionError as e:
+                log.error("session renewal failed, retrying in %.0fs: %s", RENEW_RETRY, e)
+                self._stop.wait(RENEW_RETRY)
+
+    def start_renewal(self) -> None:
+        """Renew via TOTP in the background before expiry; clients from this manager are updated in place."""
+        if not self.totp_secret:
+            log.warning("no totp_secret: session for uid=%s cannot be renewed automatically", self.uid)
+            return
+        if self._renewer is None or not self._renewer.is_alive():
+            self._stop.clear()
+            self._renewer = threading.Thread(target=self._renew_loop, name=f"session-renew-{self.uid}", daemon=True)
+            self._renewer.start()
+
+    def stop_renewal(self) -> None:
+        self._stop.set()
@@ -0,0 +1,69 @@
+# backend/slicing.py
+import csv
+import logging
+import os
+from typing import Dict, List, Optional
+
+from .master import MASTER_DIR
+
+log = logging.getLogger("backend.slicing")
+log.setLevel(logging.INFO)
+
+# Maximum quantity (units, not lots) accepted in one order for index derivatives.
+# Exchanges revise these; a SYMBOL,FREEZE_QTY csv at FREEZE_QTY_FILE overrides/extends them.
+FREEZE_QTY: Dict[str, int] = {
+    "NIFTY": 1800,
+    "BANKNIFTY": 900,
+    "FINNIFTY": 1800,
+    "MIDCPNIFTY": 2800,
+    "NIFTYNXT50": 600,
+    "SENSEX": 1000,
+    "BANKEX": 900,
+}
+FREEZE_QTY_FILE = os.path.join(MASTER_DIR, "freeze_qty.csv")
+
+_overrides: Optional[Dict[str, int]] = None
+_overrides_mtime = 0.0
+
+
+def _load_overrides(path: str) -> Dict[str, int]:
+    global _overrides, _overrides_mtime
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    if _overrides is None or mtime != _overrides_mtime:
+        table = {}
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                try:
+                    table[row["SYMBOL"].strip().upper()] = int(float(row["FREEZE_QTY"]))
+                except (KeyError, ValueError, AttributeError):
+                    continue
+        _overrides, _overrides_mtime = table, mtime
+    return _overrides
+
+
+def freeze_qty(symbol: str, path: str = FREEZE_QTY_FILE) -> Optional[int]:
+    """Per-order quantity limit of an underlying, or None when it has none on record."""
+    symbol = str(symbol or "").strip().upper()
+    return _load_overrides(path).get(symbol) or FREEZE_QTY.get(symbol)
+
+
+def slice_quantity(quantity: int, lotsize: int = 1, max_qty: Optional[int] = None) -> List[int]:
+    """
+    Split `quantity` into child quantities that are whole lots and at most `max_qty` each
+    (rounded down to a lot multiple). Raises ValueError when `quantity` is not whole lots.
+    """
+    quantity, lotsize = int(quantity), max(1, int(lotsize or 1))
+    if quantity <= 0:
+        return []
+    if quantity % lotsize:
+        raise ValueError(f"quantity {quantity} is not a multiple of lot size {lotsize}")
+    if not max_qty or max_qty >= quantity:
+        return [quantity]
+    child = (int(max_qty) // lotsize) * lotsize
+    if child <= 0:
+        raise ValueError(f"freeze quantity {max_qty} is below one lot ({lotsize})")
+    full, rest = divmod(quantity, child)
+    return [child] * full + ([rest] if rest else [])
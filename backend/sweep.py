@@ -0,0 +1,147 @@
+# backend/sweep.py
+import csv
+import itertools
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .backtest import simulate_ladder, summarize
+from .bars import BarStore
+
+log = logging.getLogger("backend.sweep")
+log.setLevel(logging.INFO)
+
+SWEEP_DIR = "data/sweeps"
+RESULT_FIELDS = [
+    "sl_pct", "target_pcts", "max_hold", "trades", "win_rate_%", "stop_rate_%",
+    "all_targets_rate_%", "timeout_rate_%", "expectancy_%", "avg_win_%", "avg_loss_%",
+    "avg_holding_bars", "target_hit_rates_%", "worker_s",
+]
+
+# Per-process read-only views of the price arrays, opened once by _init_worker
+_SHARED: Dict[str, np.ndarray] = {}
+
+
+def _init_worker(paths: Dict[str, str]) -> None:
+    global _SHARED
+    _SHARED = {name: np.load(path, mmap_mode="r") for name, path in paths.items()}
+
+
+def _run_combo(combo: Tuple[Optional[float], Tuple[float, ...], int]) -> Dict[str, Any]:
+    sl_pct, target_pcts, max_hold = combo
+    t0 = time.perf_counter()
+    res = simulate_ladder(
+        _SHARED["high"], _SHARED["low"], _SHARED["close"], _SHARED["entries"],
+        sl_pct=sl_pct, target_pcts=target_pcts, max_hold=max_hold, open_=_SHARED["open"],
+    )
+    trades = pd.DataFrame({
+        "return_pct": res["return_pct"],
+        "holding_bars": res["holding_bars"],
+        "exit_reason": res["exit_reason"],
+        "stop_hit": res["stop_hit"],
+    })
+    stats = summarize(trades, ())
+    hit_rates = res["targets_filled"].mean(axis=0) * 100.0 if len(trades) else np.zeros(len(target_pcts))
+    stats.update({
+        "sl_pct": sl_pct,
+        "target_pcts": "/".join(f"{p:g}" for p in target_pcts),
+        "max_hold": max_hold,
+        "target_hit_rates_%": "/".join(f"{h:.2f}" for h in hit_rates),
+        "worker_s": round(time.perf_counter() - t0, 4),
+    })
+    return stats
+
+
+def parameter_grid(
+    sl_pcts: Sequence[Optional[float]],
+    target_sets: Sequence[Sequence[float]],
+    max_holds: Sequence[int] = (60,),
+) -> List[Tuple[Optional[float], Tuple[float, ...], int]]:
+    return [(sl, tuple(float(t) for t in tg), int(h)) for sl, tg, h in itertools.product(sl_pcts, target_sets, max_holds)]
+
+
+class ParameterSweep:
+    """
+    Grid search of the GTT-ladder stop/target percentages. Price arrays are written once
+    as .npy files and memory-mapped read-only by every worker, so each task ships only its
+    parameter tuple. Finished combinations are appended to a CSV as they complete.
+    """
+
+    def __init__(self, bars: BarStore, max_workers: Optional[int] = None, workdir: str = SWEEP_DIR):
+        self.bars = bars
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.workdir = workdir
+
+    def _write_arrays(self, segment: str, tokens: Sequence[str], timeframe: str, entry_step: int, tmpdir: str) -> Dict[str, str]:
+        panels = self.bars.panels(segment, tokens, ["Open", "High", "Low", "Close"], timeframe)
+        close = panels["Close"]
+        if close.empty:
+            raise ValueError(f"no cached bars for {segment} sweep universe")
+        arrays = {
+            "open": panels["Open"].reindex(index=close.index, columns=close.columns).to_numpy(dtype=float),
+            "high": panels["High"].reindex(index=close.index, columns=close.columns).to_numpy(dtype=float),
+            "low": panels["Low"].reindex(index=close.index, columns=close.columns).to_numpy(dtype=float),
+            "close": close.to_numpy(dtype=float),
+        }
+        entries = np.zeros(close.shape, dtype=bool)
+        entries[::max(1, int(entry_step)), :] = True
+        arrays["entries"] = entries
+        paths = {}
+        for name, arr in arrays.items():
+            paths[name] = os.path.join(tmpdir, f"{name}.npy")
+            np.save(paths[name], np.ascontiguousarray(arr))
+        return paths
+
+    def run(
+        self,
+        segment: str,
+        tokens: Sequence[str],
+        sl_pcts: Sequence[Optional[float]],
+        target_sets: Sequence[Sequence[float]],
+        max_holds: Sequence[int] = (60,),
+        timeframe: str = "day",
+        entry_step: int = 1,
+        results_path: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        combos = parameter_grid(sl_pcts, target_sets, max_holds)
+        os.makedirs(self.workdir, exist_ok=True)
+        results_path = results_path or os.path.join(self.workdir, f"sweep_{segment}_{time.strftime('%Y%m%d_%H%M%S')}.csv")
+        tmpdir = tempfile.mkdtemp(prefix="arrays_", dir=self.workdir)
+        t0 = time.perf_counter()
+        done = 0
+        try:
+            paths = self._write_arrays(segment, tokens, timeframe, entry_step, tmpdir)
+            t_prep = time.perf_counter() - t0
+            with open(results_path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+                writer.writeheader()
+                with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker, initargs=(paths,)) as ex:
+                    futures = [ex.submit(_run_combo, c) for c in combos]
+                    for fut in as_completed(futures):
+                        try:
+                            writer.writerow(fut.result())
+                            f.flush()
+                            done += 1
+                        except Exception as e:
+                            log.error("sweep combination failed: %s", e)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+        elapsed = time.perf_counter() - t0
+        summary = {
+            "combinations": len(combos),
+            "completed": done,
+            "workers": self.max_workers,
+            "prep_s": round(t_prep, 3),
+            "elapsed_s": round(elapsed, 3),
+            "combos_per_s": round(done / elapsed, 3) if elapsed > 0 else None,
+            "results_path": results_path,
+        }
+        log.info("sweep %s: %s", segment, summary)
+        return summary
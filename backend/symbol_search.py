@@ -0,0 +1,154 @@
+# backend/symbol_search.py
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .master import InstrumentMaster
+from .master_diff import rebind_indexes, subscribe
+
+log = logging.getLogger("backend.symbol_search")
+log.setLevel(logging.INFO)
+
+SEARCH_FIELDS = ("TRADINGSYM", "SYMBOL", "COMPANY")
+# Rank weights of a prefix hit per field; fuzzy (trigram) hits score in [0, 1)
+PREFIX_WEIGHT = {"TRADINGSYM": 3.0, "SYMBOL": 2.5, "COMPANY": 2.0}
+MAX_KEY_LEN = 48
+
+
+def _normalise(values: np.ndarray) -> np.ndarray:
+    return np.char.upper(np.char.strip(np.asarray(values, dtype=str)))
+
+
+def _trigram_codes(words: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized trigrams of an array of strings: returns (word_index, code) pairs where a
+    code packs three bytes of the space-padded upper-case ASCII word into one integer.
+    """
+    padded = np.char.add(np.char.add("  ", words), " ")
+    raw = np.char.encode(padded, "ascii", "replace").astype(f"S{MAX_KEY_LEN + 3}")
+    b = np.frombuffer(raw.tobytes(), dtype=np.uint8).reshape(len(raw), -1).astype(np.int64)
+    codes = (b[:, :-2] << 16) | (b[:, 1:-1] << 8) | b[:, 2:]
+    valid = (b[:, 2:] != 0) & (codes != 0x202020)   # stop at the fixed-width padding, skip blanks
+    rows = np.broadcast_to(np.arange(len(words))[:, None], codes.shape)
+    return rows[valid], codes[valid]
+
+
+class SymbolSearchIndex:
+    """
+    Top-k instrument search over TRADINGSYM, SYMBOL and COMPANY for one segment.
+    Prefix matches come from sorted key arrays (binary search per field), fuzzy matches
+    from a CSR trigram index; both are plain numpy arrays built in a vectorized pass.
+    """
+
+    def __init__(self, master: InstrumentMaster, segment: Optional[str] = None):
+        self.master = master
+        self.segment = segment
+        self.rows = master.segment_rows(segment) if segment else np.arange(len(master))
+        self.fields = {f: _normalise(master.column(f, self.rows)) for f in SEARCH_FIELDS if f in master.columns}
+
+        # prefix: per field, keys sorted with their local row positions
+        self._sorted: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for f, vals in self.fields.items():
+            order = np.argsort(vals, kind="stable")
+            self._sorted[f] = (vals[order], order)
+
+        # fuzzy: union of trigrams of all fields per row, as CSR (code -> local rows)
+        pairs_r, pairs_c = [], []
+        for vals in self.fields.values():
+            r, c = _trigram_codes(vals)
+            pairs_r.append(r)
+            pairs_c.append(c)
+        r = np.concatenate(pairs_r) if pairs_r else np.zeros(0, np.int64)
+        c = np.concatenate(pairs_c) if pairs_c else np.zeros(0, np.int64)
+        pair = np.sort((c << 24) | r)                         # (code, row) sorted by code
+        pair = pair[np.r_[True, pair[1:] != pair[:-1]]] if len(pair) else pair
+        codes, rows = pair >> 24, (pair & 0xFFFFFF).astype(np.int32)
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.zeros(0, np.int64)
+        self._gram_codes = codes[starts]
+        self._gram_starts = np.r_[starts, len(codes)]
+        self._gram_rows = rows
+        self._gram_count = np.bincount(rows, minlength=len(self.rows)).astype(np.float64)
+        log.info("symbol index %s: %d instruments, %d trigrams", segment or "ALL", len(self.rows), len(self._gram_codes))
+
+    def rebind(self, master: InstrumentMaster, old_rows: np.ndarray, new_rows: np.ndarray) -> None:
+        """Switch to another build with the same contracts in the same order (see master_diff)."""
+        self.master = master
+        self.rows = new_rows[np.searchsorted(old_rows, self.rows)]
+
+    def _prefix(self, q: str, k: int) -> List[Tuple[float, int]]:
+        hits: List[Tuple[float, int]] = []
+        for f, (keys, order) in self._sorted.items():
+            lo = int(np.searchsorted(keys, q, side="left"))
+            hi = int(np.searchsorted(keys, q + "\uffff", side="left"))
+            if hi <= lo:
+                continue
+            cand = order[lo:min(hi, lo + k * 4)]
+            lengths = np.char.str_len(keys[lo:lo + len(cand)])
+            # exact match first, then shorter keys
+            score = PREFIX_WEIGHT[f] + (lengths == len(q)) * 1.0 - lengths / 1000.0
+            hits.extend(zip(score.tolist(), cand.tolist()))
+        return hits
+
+    def _fuzzy(self, q: str, k: int) -> List[Tuple[float, int]]:
+        _, qcodes = _trigram_codes(np.array([q]))
+        qcodes = np.unique(qcodes)
+        if not len(self._gram_codes):
+            return []
+        pos = np.minimum(np.searchsorted(self._gram_codes, qcodes), len(self._gram_codes) - 1)
+        pos = pos[self._gram_codes[pos] == qcodes]
+        if not len(pos):
+            return []
+        postings = np.concatenate([self._gram_rows[self._gram_starts[p]:self._gram_starts[p + 1]] for p in pos])
+        counts = np.bincount(postings, minlength=len(self.rows))
+        local = np.flatnonzero(counts)
+        shared = counts[local]
+        # Jaccard over trigram sets
+        score = shared / (len(qcodes) + self._gram_count[local] - shared)
+        top = np.argpartition(-score, min(k, len(score) - 1))[:k] if len(score) > k else np.arange(len(score))
+        return list(zip((score[top] * 0.999).tolist(), local[top].tolist()))
+
+    def search(self, query: str, k: int = 10) -> List[Dict[str, Any]]:
+        q = (query or "").strip().upper()[:MAX_KEY_LEN]
+        if not q:
+            return []
+        hits = self._prefix(q, k)
+        if len({h[1] for h in hits}) < k and len(q) >= 2:
+            hits += self._fuzzy(q, k)
+        best: Dict[int, float] = {}
+        for score, local in hits:
+            if score > best.get(local, -1.0):
+                best[local] = score
+        ranked = sorted(best.items(), key=lambda kv: -kv[1])[:k]
+        out = []
+        for local, score in ranked:
+            rec = self.master.record(int(self.rows[local]))
+            out.append({
+                "SEGMENT": rec["SEGMENT"], "TOKEN": rec["TOKEN"], "TRADINGSYM": rec["TRADINGSYM"],
+                "SYMBOL": rec["SYMBOL"], "COMPANY": rec.get("COMPANY", ""), "score": round(score, 3),
+            })
+        return out
+
+
+_indexes: Dict[Tuple[str, Optional[str]], SymbolSearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(master: InstrumentMaster, segment: Optional[str] = None) -> SymbolSearchIndex:
+    """Process-wide index per (master build, segment), built on first use."""
+    key = (master.path, segment)
+    with _indexes_lock:
+        idx = _indexes.get(key)
+        if idx is None:
+            for stale in [k for k in _indexes if k[0] != master.path]:
+                _indexes.pop(stale)
+            idx = _indexes[key] = SymbolSearchIndex(master, segment)
+        return idx
+
+
+def _on_master_diff(diff: Dict[str, Any]) -> None:
+    rebind_indexes(_indexes, _indexes_lock, diff)
+
+
+subscribe(_on_master_diff)
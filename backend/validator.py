@@ -0,0 +1,269 @@
+# backend/validator.py
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .accounts import account_state
+from .master import get_master
+from .master_diff import subscribe
+
+log = logging.getLogger("backend.validator")
+log.setLevel(logging.INFO)
+
+# Payload fields checked per order kind (regular, GTT, OCO share one validator)
+PRICE_FIELDS = ("price", "trigger_price", "limit_price", "alert_price", "target_price", "stoploss_price")
+QUANTITY_FIELDS = ("quantity", "target_quantity", "stoploss_quantity")
+BAND_TTL = 300.0
+# security_info field names seen for circuit limits
+LOWER_BAND_KEYS = ("lower_circuit", "lower_circuit_limit", "lc")
+UPPER_BAND_KEYS = ("upper_circuit", "upper_circuit_limit", "uc")
+
+
+class OrderValidationError(ValueError):
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def round_to_tick(price, tick, decimals: int = 8):
+    """Nearest multiple of `tick`; works on scalars and arrays (element-wise ticks)."""
+    tick = np.where(np.asarray(tick, dtype=float) > 0, tick, 0.05)
+    return np.round(np.round(np.asarray(price, dtype=float) / tick) * tick, decimals)
+
+
+def _first_float(d: Dict[str, Any], keys: Tuple[str, ...]) -> Optional[float]:
+    for k in keys:
+        try:
+            v = float(d.get(k))
+        except (TypeError, ValueError):
+            continue
+        if v > 0:
+            return v
+    return None
+
+
+class PreTradeValidator:
+    """
+    Local checks of order payloads against the instrument master (TICKSIZE, LOTSIZE,
+    PRICEPREC) and cached circuit limits from security_info. Prices are rounded to the
+    tick; quantity, lot and band violations are rejected before anything is sent.
+    """
+
+    def __init__(self, client=None, master=None, band_ttl: float = BAND_TTL):
+        self.client = client
+        self._master = master
+        self.band_ttl = band_ttl
+        self._instruments: Dict[Tuple[str, str], Optional[Dict[str, Any]]] = {}
+        self._bands: Dict[Tuple[str, str], Tuple[float, Optional[float], Optional[float]]] = {}
+        self._unbanded: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def reset_master(self) -> None:
+        """Forget the master and memoized contracts (after a master refresh)."""
+        with self._lock:
+            self._master = None
+            self._instruments.clear()
+
+    @property
+    def master(self):
+        if self._master is None:
+            try:
+                self._master = get_master()
+            except Exception as e:
+                log.warning("instrument master unavailable, skipping master checks: %s", e)
+                return None
+        return self._master
+
+    def instrument(self, exchange: str, tradingsymbol: str) -> Optional[Dict[str, Any]]:
+        """TOKEN/TICKSIZE/LOTSIZE/PRICEPREC of a contract, memoized per symbol."""
+        key = (str(exchange), str(tradingsymbol).strip())
+        if key not in self._instruments:
+            master = self.master
+            rec = master.lookup_symbol(*key) if master is not None else None
+            self._instruments[key] = rec and {
+                "token": str(rec["TOKEN"]),
+                "tick": float(rec.get("TICKSIZE") or 0.05) or 0.05,
+                "lot": max(1, int(rec.get("LOTSIZE") or 1)),
+                "prec": int(rec.get("PRICEPREC") or 2),
+            }
+        return self._instruments[key]
+
+    def bands(self, exchange: str, token: str) -> Tuple[Optional[float], Optional[float]]:
+        """(lower, upper) circuit limits, cached for `band_ttl` seconds."""
+        key = (str(exchange), str(token))
+        now = time.monotonic()
+        with self._lock:
+            hit = self._bands.get(key)
+        if hit and now - hit[0] < self.band_ttl:
+            return hit[1], hit[2]
+        lower = upper = None
+        if self.client is not None and hasattr(self.client, "security_info"):
+            try:
+                info = self.client.security_info(exchange, token) or {}
+                lower, upper = _first_float(info, LOWER_BAND_KEYS), _first_float(info, UPPER_BAND_KEYS)
+            except Exception as e:
+                log.warning("security_info failed for %s: %s", key, e)
+            else:
+                if lower is None and upper is None and exchange not in self._unbanded:
+                    # the checks pass silently without limits: say so once per exchange
+                    self._unbanded.add(exchange)
+                    log.warning("security_info for %s has no circuit limits (looked for %s / %s; got %s): "
+                                "band checks are off for %s", key, LOWER_BAND_KEYS, UPPER_BAND_KEYS,
+                                sorted(info) if isinstance(info, dict) else type(info).__name__, exchange)
+        with self._lock:
+            self._bands[key] = (now, lower, upper)
+        return lower, upper
+
+    def check(self, payload: Dict[str, Any], check_bands: bool = True) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Validate one payload; returns (payload with prices rounded to tick, errors).
+        Band checks only make sense for orders executing now, not GTT triggers.
+        """
+        out, errors = dict(payload), []
+        exchange, symbol = payload.get("exchange", ""), payload.get("tradingsymbol", "")
+        inst = self.instrument(exchange, symbol) if self.master is not None else None
+        if self.master is not None and inst is None:
+            return out, [f"{exchange}:{symbol} not in instrument master"]
+        tick, lot, prec = (inst["tick"], inst["lot"], inst["prec"]) if inst else (0.05, 1, 2)
+        lower = upper = None
+        if check_bands and inst:
+            lower, upper = self.bands(exchange, payload.get("token") or inst["token"])
+
+        for f in QUANTITY_FIELDS:
+            if f not in payload:
+                continue
+            try:
+                q = float(payload[f])
+            except (TypeError, ValueError):
+                errors.append(f"{f} is not a number")
+                continue
+            if q <= 0 or q != int(q):
+                errors.append(f"{f} must be a positive integer")
+            elif int(q) % lot:
+                errors.append(f"{f} {int(q)} is not a multiple of lot size {lot}")
+        for f in PRICE_FIELDS:
+            if f not in payload or payload[f] in ("", None):
+                continue
+            try:
+                p = float(payload[f])
+            except (TypeError, ValueError):
+                errors.append(f"{f} is not a number")
+                continue
+            if p < 0:
+                errors.append(f"{f} is negative")
+                continue
+            if p == 0:
+                continue
+            rounded = float(round_to_tick(p, tick))
+            if (lower and rounded < lower) or (upper and rounded > upper):
+                errors.append(f"{f} {rounded} outside circuit band {lower}–{upper}")
+            out[f] = rounded if not isinstance(payload[f], str) else f"{rounded:.{prec}f}"
+        return out, errors
+
+    def validate(self, payload: Dict[str, Any], check_bands: bool = True) -> Dict[str, Any]:
+        """check() that raises OrderValidationError instead of returning errors."""
+        out, errors = self.check(payload, check_bands)
+        if errors:
+            raise OrderValidationError(errors)
+        return out
+
+    def check_batch(self, payloads: Iterable[Dict[str, Any]], check_bands: bool = False) -> Tuple[List[Dict[str, Any]], List[List[str]]]:
+        """
+        Vectorized check of many payloads: one master lookup per distinct symbol, then
+        tick rounding and lot checks as array operations per field.
+        Returns (adjusted payloads, errors per payload).
+        """
+        payloads = [dict(p) for p in payloads]
+        if not payloads:
+            return [], []
+        df = pd.DataFrame(payloads)
+        n = len(df)
+        errors: List[List[str]] = [[] for _ in range(n)]
+        keys = list(zip(df.get("exchange", pd.Series([""] * n)).astype(str), df.get("tradingsymbol", pd.Series([""] * n)).astype(str)))
+        insts = {k: self.instrument(*k) for k in set(keys)} if self.master is not None else {}
+        default = {"tick": 0.05, "lot": 1, "prec": 2, "token": ""}
+        known = np.array([self.master is None or insts.get(k) is not None for k in keys])
+        meta = [insts.get(k) or default for k in keys]
+        tick = np.array([m["tick"] for m in meta])
+        lot = np.array([m["lot"] for m in meta])
+        prec = np.array([m["prec"] for m in meta])
+        lower = np.full(n, np.nan)
+        upper = np.full(n, np.nan)
+        if check_bands:
+            for i, (k, m) in enumerate(zip(keys, meta)):
+                if m["token"]:
+                    lo, hi = self.bands(k[0], m["token"])
+                    lower[i], upper[i] = lo or np.nan, hi or np.nan
+
+        for i in np.flatnonzero(~known):
+            errors[i].append(f"{keys[i][0]}:{keys[i][1]} not in instrument master")
+        for f in QUANTITY_FIELDS:
+            if f not in df.columns:
+                continue
+            q = pd.to_numeric(df[f], errors="coerce").to_numpy(dtype=float)
+            present = df[f].notna().to_numpy()
+            bad = present & known & (np.isnan(q) | (q <= 0) | (q != np.floor(q)))
+            off_lot = present & known & ~bad & (np.nan_to_num(q) % lot != 0)
+            for i in np.flatnonzero(bad):
+                errors[i].append(f"{f} must be a positive integer")
+            for i in np.flatnonzero(off_lot):
+                errors[i].append(f"{f} {int(q[i])} is not a multiple of lot size {lot[i]}")
+        for f in PRICE_FIELDS:
+            if f not in df.columns:
+                continue
+            raw = df[f].replace("", np.nan)
+            p = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=float)
+            present = raw.notna().to_numpy()
+            for i in np.flatnonzero(present & np.isnan(p)):
+                errors[i].append(f"{f} is not a number")
+            for i in np.flatnonzero(present & (p < 0)):
+                errors[i].append(f"{f} is negative")
+            rounded = round_to_tick(p, tick)
+            out_band = present & (p > 0) & ((rounded < np.nan_to_num(lower, nan=-np.inf)) | (rounded > np.nan_to_num(upper, nan=np.inf)))
+            for i in np.flatnonzero(out_band):
+                errors[i].append(f"{f} {rounded[i]} outside circuit band {lower[i]}–{upper[i]}")
+            for i in np.flatnonzero(present & (p > 0)):
+                v = payloads[i][f]
+                payloads[i][f] = f"{rounded[i]:.{prec[i]}f}" if isinstance(v, str) else float(rounded[i])
+        return payloads, errors
+
+
+_shared: Optional[PreTradeValidator] = None
+_validators: "weakref.WeakSet[PreTradeValidator]" = weakref.WeakSet()
+_validators_lock = threading.Lock()
+
+
+def get_validator(client=None) -> PreTradeValidator:
+    """
+    Validator of `client`'s account, kept in its account_state so every session on that
+    account shares the symbol and band caches and band lookups use that account's client.
+    Without a client: one process-wide validator with master checks only.
+    """
+    global _shared
+    with _validators_lock:
+        if client is None:
+            if _shared is None:
+                _shared = PreTradeValidator()
+                _validators.add(_shared)
+            return _shared
+        state = account_state(client)
+        validator = state.get("validator")
+        if validator is None or validator.client is not client:
+            validator = state["validator"] = PreTradeValidator(client)
+            _validators.add(validator)
+        return validator
+
+
+def _on_master_diff(diff: Dict[str, Any]) -> None:
+    with _validators_lock:
+        validators = list(_validators)
+    for validator in validators:
+        validator.reset_master()
+
+
+subscribe(_on_master_diff)
@@ -4,6 +4,7 @@ import logging
 import io
 import pandas as pd
 from typing import Optional, Dict, Any
+from backend.journal import ORDER_ENDPOINTS, journaled
 
 log = logging.getLogger("definedge_api")
 log.setLevel(logging.INFO)
@@ -56,12 +57,22 @@ class DefinedgeClient:
 
     # ---- generic GET/POST (trading API base) ----
     def api_get(self, rel_path: str) -> Any:
+        if ORDER_ENDPOINTS.match(rel_path):
+            return journaled(rel_path, None, lambda: self._api_get(rel_path))
+        return self._api_get(rel_path)
+
+    def api_post(self, rel_path: str, payload: Optional[Dict]=None) -> Any:
+        if ORDER_ENDPOINTS.match(rel_path):
+            return journaled(rel_path, payload, lambda: self._api_post(rel_path, payload))
+        return self._api_post(rel_path, payload)
+
+    def _api_get(self, rel_path: str) -> Any:
         url = rel_path if rel_path.startswith("http") else f"{BASE_API}{rel_path}"
         r = self._session.get(url, headers=self._auth_headers(), timeout=self.timeout)
         r.raise_for_status()
         return r.json()
 
-    def api_post(self, rel_path: str, payload: Optional[Dict]=None) -> Any:
+    def _api_post(self, rel_path: str, payload: Optional[Dict]=None) -> Any:
         url = rel_path if rel_path.startswith("http") else f"{BASE_API}{rel_path}"
         r = self._session.post(url, headers=self._auth_headers(), json=payload or {}, timeout=self.timeout)
         r.raise_for_status()
@@ -110,6 +121,12 @@ class DefinedgeClient:
     def gtt_cancel(self, alert_id: str):
         return self.api_get(f"/gttcancel/{alert_id}")
 
+    def oco_modify(self, payload: Dict[str, Any]):
+        return self.api_post("/ocomodify", payload)
+
+    def oco_cancel(self, alert_id: str):
+        return self.api_get(f"/ococancel/{alert_id}")
+
     def historical_csv(self, segment: str, token: str, timeframe: str, frm: str, to: str) -> str:
         url = f"{BASE_DATA}/history/{segment}/{token}/{timeframe}/{frm}/{to}"
         r = self._session.get(url, headers=self._auth_headers(), timeout=self.timeout)
@@ -125,6 +142,37 @@ class DefinedgeClient:
                     f.write(chunk)
         return dest_path
 
+    # ---- APIClient-compatible names (backend services accept either client) ----
+    def holdings(self):
+        return self.get_holdings()
+
+    def positions(self):
+        return self.get_positions()
+
+    def orders(self):
+        return self.get_orders()
+
+    def order(self, order_id: str):
+        return self.get_order(order_id)
+
+    def trades(self):
+        return self.get_trades()
+
+    def quote(self, exchange: str, token: str):
+        return self.get_quotes(exchange, token)
+
+    def security_info(self, exchange: str, token: str):
+        return self.api_get(f"/securityinfo/{exchange}/{token}")
+
+    def limits(self):
+        return self.api_get("/limits")
+
+    def margin(self):
+        return self.api_get("/margin")
+
+    def span_calculator(self, payload: Dict[str, Any]):
+        return self.api_post("/spancalculator", payload)
+
     # helper to parse csv string into pandas dataframe
     @staticmethod
     def csv_to_df(csv_text: str) -> pd.DataFrame:
@@ -1,6 +1,9 @@
+import time
+import pandas as pd
 import streamlit as st
 from backend.orders import OrdersService
 from backend.holdings import HoldingsService
+from backend.bars import BarStore
 
 def show_orders():
     st.header('🧾 Orders')
@@ -20,16 +23,15 @@ def show_orders():
     qty = st.number_input('Quantity', min_value=1, value=1)
     sl = st.number_input('Stop loss % (negative value)', value=-2.0)
     targets = st.text_input('Targets % (comma separated, e.g. 10,20,30,40)', value='10,20,30,40')
+    workers = st.number_input('Concurrent requests', min_value=1, max_value=16, value=8)
     if st.button('Build and place GTTs'):
         try:
             tlist = [float(x.strip()) for x in targets.split(',') if x.strip()]
             # find holding
             holding = None
             if not df.empty:
-                for _, r in df.iterrows():
-                    if str(r.get('token')) == str(token) or str(r.get('symbol')) == token:
-                        holding = r
-                        break
+                match = df[(df['token'].astype(str) == str(token)) | (df['symbol'].astype(str) == token)]
+                holding = match.iloc[0] if not match.empty else None
             avg_price = holding['avg_price'] if holding is not None else None
             tradingsymbol = holding['symbol'] if holding is not None else token
             payloads = osvc.build_gtt_oco_payloads_from_holding(
@@ -37,7 +39,37 @@ def show_orders():
                 avg_price=float(avg_price) if avg_price is not None else 0.0,
                 sl_pct=float(sl), target_pcts=tlist
             )
-            results = osvc.place_gtt_bulk(payloads)
-            st.write(results)
+            t0 = time.perf_counter()
+            results = osvc.place_gtt_bulk(payloads, max_workers=int(workers))
+            elapsed = time.perf_counter() - t0
+            table = pd.DataFrame([{
+                'tradingsymbol': r['req'].get('tradingsymbol'), 'trigger_price': r['req'].get('trigger_price'),
+                'status': r['status'], 'attempts': r['attempts'], 'latency_ms': r.get('latency_ms'),
+                'key': r['key'], 'error': r.get('error', ''),
+            } for r in results])
+            st.success(f"{int(table['status'].isin(['placed', 'exists']).sum())}/{len(table)} legs in place in {elapsed:.2f}s")
+            st.dataframe(table, use_container_width=True)
         except Exception as e:
             st.error(f'Failed to place GTTs: {e}')
+    st.markdown('---')
+    st.subheader('Protect whole portfolio')
+    use_atr = st.checkbox('ATR-based levels from cached bars (falls back to % when no bars)', value=False)
+    if st.button('Build and place ladders for all holdings'):
+        if df.empty:
+            st.info('No holdings to protect.')
+            return
+        try:
+            tlist = [float(x.strip()) for x in targets.split(',') if x.strip()]
+            with st.spinner('Placing protective GTT ladders...'):
+                out = osvc.protect_portfolio(
+                    df, max_workers=int(workers), sl_pct=float(sl), target_pcts=tlist,
+                    bars=BarStore(client) if use_atr else None,
+                )
+            st.success(f"{out['legs']} legs: {out['skipped']} already pending, {len(out['results'])} sent in {out['elapsed_s']:.2f}s")
+            if out['results']:
+                st.dataframe(pd.DataFrame([{
+                    'tradingsymbol': r['req'].get('tradingsymbol'), 'trigger_price': r['req'].get('trigger_price'),
+                    'status': r['status'], 'latency_ms': r.get('latency_ms'), 'error': r.get('error', ''),
+                } for r in out['results']]), use_container_width=True)
+        except Exception as e:
+            st.error(f'Failed to protect portfolio: {e}')
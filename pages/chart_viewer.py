@@ -4,18 +4,30 @@ import numpy as np
 import io
 from datetime import datetime, timedelta
 import plotly.graph_objects as go
+import time
+from backend.chart_cache import chart_key, get_chart_cache
+from backend.master import get_master
+from backend.symbol_search import get_search_index
+from backend.downsample import (
+    DEFAULT_MAX_POINTS, figure_stats, format_stats, line_on_buckets, ohlc_buckets, visible_window,
+)
 
-@st.cache_data
-def load_master_symbols(master_csv_path="data/master/allmaster.csv"):
-    df = pd.read_csv(master_csv_path)
-    return df
+def load_master_symbols():
+    # Shared memory-mapped master (see backend.master.get_master)
+    return get_master()
 
-def select_symbol(df, label="Trading Symbol"):
-    symbol = st.selectbox(label, df["TRADINGSYM"].unique())
-    row = df[df["TRADINGSYM"] == symbol].iloc[0]
-    return row
+def select_symbol(master, segment, label="Trading Symbol", k=15):
+    # Search box + short candidate list instead of shipping the whole segment to the browser
+    query = st.text_input(f"Search {label}", value="", key=f"search_{label}")
+    hits = get_search_index(master, segment).search(query, k=k) if query.strip() else []
+    if not hits:
+        st.caption("Type a symbol or company name to search.")
+        return None
+    names = {h["TRADINGSYM"]: (f"{h['TRADINGSYM']} — {h['COMPANY']}" if h["COMPANY"] else h["TRADINGSYM"]) for h in hits}
+    symbol = st.selectbox(label, list(names), format_func=names.get)
+    return master.lookup_symbol(segment, symbol)
 
-def select_index_symbol(df, label="Index Symbol"):
+def select_index_symbol(master, df, label="Index Symbol"):
     index_candidates = df[
         df["INSTRUMENT"].str.contains("INDEX", case=False, na=False) |
         df["TRADINGSYM"].str.contains("NIFTY|IDX|SENSEX|BANKNIFTY|MIDSMALL|500|100", case=False, na=False)
@@ -23,14 +35,14 @@ def select_index_symbol(df, label="Index Symbol"):
     if index_candidates.empty:
         index_candidates = df
     index_symbol = st.selectbox(label, index_candidates["TRADINGSYM"].unique())
-    row = index_candidates[index_candidates["TRADINGSYM"] == index_symbol].iloc[0]
-    return row
+    segment = index_candidates.loc[index_candidates["TRADINGSYM"] == index_symbol, "SEGMENT"].iloc[0]
+    return master.lookup_symbol(segment, index_symbol)
 
-def fetch_historical(client, segment, token, days):
+def fetch_historical(client, segment, token, days, timeframe="day"):
     today = datetime.today()
     from_date = (today - timedelta(days=days*2)).strftime("%d%m%Y%H%M")
     to_date = today.strftime("%d%m%Y%H%M")
-    hist_csv = client.historical_csv(segment=segment, token=token, timeframe="day", frm=from_date, to=to_date)
+    hist_csv = client.historical_csv(segment=segment, token=token, timeframe=timeframe, frm=from_date, to=to_date)
     if not hist_csv.strip():
         return pd.DataFrame()
     hist_df = pd.read_csv(io.StringIO(hist_csv), header=None)
@@ -57,15 +69,18 @@ if not client:
     st.error("⚠️ Not logged in. Please login first from the Login page.")
     st.stop()
 
-df_master = load_master_symbols()
-segment = st.selectbox("Exchange/Segment", sorted(df_master["SEGMENT"].unique()), index=0)
-segment_df = df_master[df_master["SEGMENT"] == segment]
+master = load_master_symbols()
+df_master = master.frame()
+segment = st.selectbox("Exchange/Segment", master.segments(), index=0)
 
 # Symbol selection
-stock_row = select_symbol(segment_df, label="Stock Trading Symbol")
+stock_row = select_symbol(master, segment, label="Stock Trading Symbol")
 
 # Index selection
-index_row = select_index_symbol(df_master, label="Index Trading Symbol")
+index_row = select_index_symbol(master, df_master, label="Index Trading Symbol")
+if stock_row is None or index_row is None:
+    st.warning("Select a stock and an index symbol.")
+    st.stop()
 
 # EMA period selection
 st.markdown("#### EMA Periods")
@@ -74,15 +89,25 @@ ema_periods = [int(x.strip()) for x in ema_periods.split(",") if x.strip().isdig
 
 days_back = st.number_input("Number of Days (candles to fetch)", min_value=20, max_value=600, value=250, step=1)
 rs_sma_period = st.number_input("RS SMA Period", min_value=2, max_value=55, value=20, step=1)
+timeframe = st.selectbox("Timeframe", ["day", "minute"], index=0)
+max_points = st.number_input("Max points per chart (downsampling)", min_value=100, max_value=20000, value=DEFAULT_MAX_POINTS, step=100)
+
+chart_cache = get_chart_cache()
+cache_key = chart_key(
+    stock_row["SEGMENT"], stock_row["TOKEN"], timeframe, days_back, tuple(ema_periods),
+    (index_row["SEGMENT"], index_row["TOKEN"]), rs_sma_period,
+)
+# Recently viewed charts render straight from the cache; others need a click
+chart_data = chart_cache.get(cache_key, timeframe)
 
-if st.button("Show Chart"):
+if st.button("Show Chart") and chart_data is None:
     try:
-        df_stock = fetch_historical(client, stock_row["SEGMENT"], stock_row["TOKEN"], days_back)
+        df_stock = fetch_historical(client, stock_row["SEGMENT"], stock_row["TOKEN"], days_back, timeframe)
         if df_stock.empty:
             st.warning(f"No data for: {stock_row['TRADINGSYM']} ({stock_row['TOKEN']}, {stock_row['SEGMENT']})")
             st.stop()
 
-        df_index = fetch_historical(client, index_row["SEGMENT"], index_row["TOKEN"], days_back)
+        df_index = fetch_historical(client, index_row["SEGMENT"], index_row["TOKEN"], days_back, timeframe)
         if df_index.empty:
             st.warning(f"No data for index: {index_row['TRADINGSYM']} ({index_row['TOKEN']}, {index_row['SEGMENT']})")
             st.stop()
@@ -91,26 +116,70 @@ if st.button("Show Chart"):
         df_stock = df_stock.sort_values("DateTime").drop_duplicates(subset=["DateTime"]).reset_index(drop=True)
         df_index = df_index.sort_values("DateTime").drop_duplicates(subset=["DateTime"]).reset_index(drop=True)
 
-        # Calculate EMAs
+        # Calculate EMAs on the full history so the visible window starts warmed up
         for period in ema_periods:
             df_stock[f"EMA_{period}"] = ema(df_stock["Close"], period)
 
+        # --- Relative Strength ---
+        df_stock_rs = df_stock[["DateTime", "Close"]].rename(columns={"Close": "StockClose"})
+        df_index_rs = df_index[["DateTime", "Close"]].rename(columns={"Close": "IndexClose"})
+        df_rs = pd.merge(df_stock_rs, df_index_rs, on="DateTime", how="inner")
+        df_rs = df_rs.sort_values("DateTime").reset_index(drop=True)
+        if not df_rs.empty:
+            df_rs["RS"] = (df_rs["StockClose"] / df_rs["IndexClose"]) * 100
+            df_rs["RS_SMA"] = df_rs["RS"].rolling(window=rs_sma_period).mean()
+
+        chart_data = {
+            "stock_row": stock_row, "index_row": index_row, "ema_periods": ema_periods,
+            "rs_sma_period": rs_sma_period, "timeframe": timeframe,
+            "df_stock": df_stock, "df_rs": df_rs,
+        }
+        chart_cache.put(cache_key, chart_data, timeframe)
+    except Exception as e:
+        st.error(f"Error fetching/calculating chart: {e}")
+
+if chart_data:
+    try:
+        stock_row, index_row = chart_data["stock_row"], chart_data["index_row"]
+        ema_periods, rs_sma_period = chart_data["ema_periods"], chart_data["rs_sma_period"]
+        df_stock, df_rs = chart_data["df_stock"], chart_data["df_rs"]
+
+        def x_values(dt):
+            return dt.dt.date if chart_data["timeframe"] == "day" else dt.dt.strftime("%Y-%m-%d %H:%M")
+
+        # --- Visible window: detail level follows it, narrow windows are full resolution ---
+        first_day = df_stock["DateTime"].min().date()
+        last_day = df_stock["DateTime"].max().date()
+        if first_day < last_day:
+            win_start, win_end = st.slider(
+                "Visible window", min_value=first_day, max_value=last_day, value=(first_day, last_day),
+            )
+        else:
+            win_start, win_end = first_day, last_day
+        full_res = st.checkbox("Full resolution (no downsampling)", value=False)
+        limit = len(df_stock) if full_res else int(max_points)
+        view = visible_window(df_stock, win_start, win_end).reset_index(drop=True)
+
         # --- Candlestick Chart with EMAs ---
+        t0 = time.perf_counter()
+        candles = ohlc_buckets(view, limit)
         fig1 = go.Figure()
         fig1.add_trace(go.Candlestick(
-            x=df_stock["DateTime"].dt.date,
-            open=df_stock["Open"],
-            high=df_stock["High"],
-            low=df_stock["Low"],
-            close=df_stock["Close"],
+            x=x_values(candles["DateTime"]),
+            open=candles["Open"],
+            high=candles["High"],
+            low=candles["Low"],
+            close=candles["Close"],
             name="OHLC",
             increasing_line_color='green',
             decreasing_line_color='red'
         ))
+        # LTTB keeps each EMA's turns; its points sit on the candles' x grid
         for period in ema_periods:
+            ex, ey = line_on_buckets(view, f"EMA_{period}", limit)
             fig1.add_trace(go.Scatter(
-                x=df_stock["DateTime"].dt.date, 
-                y=df_stock[f"EMA_{period}"],
+                x=x_values(ex),
+                y=ey,
                 mode="lines", name=f"EMA {period}",
                 line=dict(width=1.5)
             ))
@@ -128,12 +197,14 @@ if st.button("Show Chart"):
             margin=dict(l=10, r=10, t=40, b=10)
         )
         st.plotly_chart(fig1, use_container_width=True)
+        st.caption(format_stats("Price chart", figure_stats(fig1, t0), len(view) * (1 + len(ema_periods))))
 
         # --- Volume Chart (separate) ---
+        t0 = time.perf_counter()
         fig_vol = go.Figure()
         fig_vol.add_trace(go.Bar(
-            x=df_stock["DateTime"].dt.date,
-            y=df_stock["Volume"],
+            x=x_values(candles["DateTime"]),
+            y=candles["Volume"],
             name="Volume",
             marker=dict(color="#636EFA"),
             opacity=0.7,
@@ -150,28 +221,26 @@ if st.button("Show Chart"):
             margin=dict(l=10, r=10, t=40, b=10)
         )
         st.plotly_chart(fig_vol, use_container_width=True)
+        st.caption(format_stats("Volume chart", figure_stats(fig_vol, t0), len(view)))
 
         # --- Relative Strength Section ---
-        df_stock_rs = df_stock[["DateTime", "Close"]].rename(columns={"Close": "StockClose"})
-        df_index_rs = df_index[["DateTime", "Close"]].rename(columns={"Close": "IndexClose"})
-        df_rs = pd.merge(df_stock_rs, df_index_rs, on="DateTime", how="inner")
-        df_rs = df_rs.sort_values("DateTime").reset_index(drop=True)
         if df_rs.empty:
             st.warning("No overlapping dates between stock and index data for RS chart.")
         else:
-            df_rs["RS"] = (df_rs["StockClose"] / df_rs["IndexClose"]) * 100
-            df_rs["RS_SMA"] = df_rs["RS"].rolling(window=rs_sma_period).mean()
-
+            rs_view = visible_window(df_rs, win_start, win_end).reset_index(drop=True)
+            t0 = time.perf_counter()
+            rx, ry = line_on_buckets(rs_view, "RS", limit)
+            sx, sy = line_on_buckets(rs_view, "RS_SMA", limit)
             fig2 = go.Figure()
             fig2.add_trace(go.Scatter(
-                x=df_rs["DateTime"].dt.date, 
-                y=df_rs["RS"],
+                x=x_values(rx),
+                y=ry,
                 mode="lines", name="Relative Strength",
                 line=dict(color="#1976d2", width=2)
             ))
             fig2.add_trace(go.Scatter(
-                x=df_rs["DateTime"].dt.date, 
-                y=df_rs["RS_SMA"],
+                x=x_values(sx),
+                y=sy,
                 mode="lines", name=f"RS SMA {rs_sma_period}",
                 line=dict(color="#d32f2f", width=2, dash='dash')
             ))
@@ -188,10 +257,11 @@ if st.button("Show Chart"):
                 margin=dict(l=10, r=10, t=40, b=10)
             )
             st.plotly_chart(fig2, use_container_width=True)
+            st.caption(format_stats("RS chart", figure_stats(fig2, t0), len(rs_view) * 2))
 
             st.markdown("#### Download Relative Strength Data")
             rs_display_cols = ["DateTime", "StockClose", "IndexClose", "RS", "RS_SMA"]
-            st.dataframe(df_rs[rs_display_cols], use_container_width=True)
+            st.dataframe(rs_view[rs_display_cols].tail(int(max_points)), use_container_width=True)
             csv_rs = df_rs[rs_display_cols].to_csv(index=False).encode('utf-8')
             st.download_button(
                 label="Download RS data as CSV",
@@ -206,7 +276,7 @@ if st.button("Show Chart"):
 
         # --- Download full OHLCV+EMA data ---
         st.markdown("#### Download OHLCV+EMAs Data")
-        st.dataframe(df_stock, use_container_width=True)
+        st.dataframe(view.tail(int(max_points)), use_container_width=True)
         csv = df_stock.to_csv(index=False).encode('utf-8')
         st.download_button(
             label="Download OHLCV+EMA data as CSV",
@@ -216,7 +286,8 @@ if st.button("Show Chart"):
         )
         st.info(
             f"EMAs shown for periods: {', '.join([str(p) for p in ema_periods])}. "
-            "You can adjust the periods and days as needed."
+            "You can adjust the periods and days as needed. Tables show the last rows of the "
+            "visible window; the CSV downloads contain the full resolution data."
         )
     except Exception as e:
         st.error(f"Error fetching/calculating chart: {e}")
@@ -3,6 +3,8 @@ import pandas as pd
 import io
 from datetime import datetime, timedelta
 import plotly.graph_objects as go
+from backend.analytics import PortfolioAnalytics
+from backend.chart_cache import chart_key, get_chart_cache
 
 DEFAULT_TOTAL_CAPITAL = 1400000  # Default capital for % allocation
 
@@ -168,42 +170,88 @@ def show_dashboard():
         fig.update_traces(textinfo='label+percent', pull=[0.05]*len(pie_df))
         st.plotly_chart(fig, use_container_width=True)
 
+        # --- Step 8b: Portfolio analytics (cached per trading day) ---
+        st.subheader("📉 Portfolio Analytics")
+        bench_token = st.text_input("Benchmark index token (NSE)", value="26000")
+        try:
+            analytics = PortfolioAnalytics(client).get(
+                holdings=df[["symbol", "token", "quantity", "avg_buy_price"]],
+                benchmark_segment="NSE",
+                benchmark_token=bench_token.strip(),
+            )
+            m = analytics["metrics"]
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("Return (period)", f"{m['total_return_%']:.2f}%")
+            c2.metric("Max Drawdown", f"{m['max_drawdown_%']:.2f}%")
+            c3.metric("Annual Volatility", f"{m['annual_vol_%']:.2f}%")
+            c4.metric("Beta", f"{m['beta']:.2f}" if m["beta"] is not None else "—")
+
+            curve = analytics["curve"]
+            fig_eq = go.Figure()
+            fig_eq.add_trace(go.Scatter(x=curve.index, y=curve["equity"], mode="lines", name="Portfolio"))
+            fig_eq.add_trace(go.Scatter(x=curve.index, y=curve["benchmark_rebased"], mode="lines", name="Benchmark (rebased)", line=dict(dash="dash")))
+            fig_eq.update_layout(title="Equity Curve (current holdings)", height=350, template="plotly_white", margin=dict(l=10, r=10, t=40, b=10))
+            st.plotly_chart(fig_eq, use_container_width=True)
+
+            fig_dd = go.Figure()
+            fig_dd.add_trace(go.Scatter(x=curve.index, y=curve["drawdown_%"], fill="tozeroy", name="Drawdown %", line=dict(color="#d32f2f")))
+            fig_dd.add_trace(go.Scatter(x=curve.index, y=curve["rolling_vol_%"], name="Rolling Vol % (ann.)", yaxis="y2", line=dict(color="#1976d2")))
+            fig_dd.update_layout(
+                title="Drawdown & Rolling Volatility", height=300, template="plotly_white",
+                yaxis2=dict(overlaying="y", side="right", showgrid=False), margin=dict(l=10, r=10, t=40, b=10),
+            )
+            st.plotly_chart(fig_dd, use_container_width=True)
+
+            corr = analytics["correlation"]
+            fig_corr = go.Figure(data=[go.Heatmap(z=corr.values, x=corr.columns, y=corr.index, zmin=-1, zmax=1, colorscale="RdBu")])
+            fig_corr.update_layout(title="Holdings Correlation", height=500, margin=dict(l=10, r=10, t=40, b=10))
+            st.plotly_chart(fig_corr, use_container_width=True)
+            st.dataframe(analytics["asset_beta"].to_frame(), use_container_width=True)
+        except Exception as e:
+            st.warning(f"Portfolio analytics unavailable: {e}")
+
         # --- Step 9: Chart for selected stock ---
         st.subheader("📈 Stock Charts")
         selected_symbol = st.selectbox("Select Symbol for Chart", df["symbol"].tolist())
         token = df[df["symbol"] == selected_symbol]["token"].values[0]
 
-        # Fetch historical CSV for chart (last 120 days)
-        from_date = (today - timedelta(days=120)).strftime("%d%m%Y%H%M")
-        to_date = today.strftime("%d%m%Y%H%M")
-        hist_csv = client.historical_csv(segment="NSE", token=token, timeframe="day", frm=from_date, to=to_date)
-        hist_df = pd.read_csv(io.StringIO(hist_csv), header=None)
-
-        if hist_df.shape[1] == 7:
-            hist_df.columns = ["DateTime", "Open", "High", "Low", "Close", "Volume", "OI"]
-        elif hist_df.shape[1] == 6:
-            hist_df.columns = ["DateTime", "Open", "High", "Low", "Close", "Volume"]
-
-        hist_df["DateTime"] = pd.to_datetime(hist_df["DateTime"])
-        hist_df = hist_df.sort_values("DateTime")
-
-        # Candlestick chart
-        fig2 = go.Figure(data=[go.Candlestick(
-            x=hist_df["DateTime"],
-            open=hist_df["Open"],
-            high=hist_df["High"],
-            low=hist_df["Low"],
-            close=hist_df["Close"],
-            name=selected_symbol
-        )])
-        # Add volume
-        fig2.add_bar(x=hist_df["DateTime"], y=hist_df["Volume"], name="Volume", yaxis="y2")
-        fig2.update_layout(
-            title=f"{selected_symbol} Candlestick Chart",
-            yaxis_title="Price",
-            yaxis2=dict(title="Volume", overlaying="y", side="right", showgrid=False),
-            xaxis_rangeslider_visible=False
-        )
+        def build_stock_chart():
+            # Fetch historical CSV for chart (last 120 days)
+            from_date = (today - timedelta(days=120)).strftime("%d%m%Y%H%M")
+            to_date = today.strftime("%d%m%Y%H%M")
+            hist_csv = client.historical_csv(segment="NSE", token=token, timeframe="day", frm=from_date, to=to_date)
+            hist_df = pd.read_csv(io.StringIO(hist_csv), header=None)
+
+            if hist_df.shape[1] == 7:
+                hist_df.columns = ["DateTime", "Open", "High", "Low", "Close", "Volume", "OI"]
+            elif hist_df.shape[1] == 6:
+                hist_df.columns = ["DateTime", "Open", "High", "Low", "Close", "Volume"]
+
+            hist_df["DateTime"] = pd.to_datetime(hist_df["DateTime"])
+            hist_df = hist_df.sort_values("DateTime")
+
+            # Candlestick chart
+            fig2 = go.Figure(data=[go.Candlestick(
+                x=hist_df["DateTime"],
+                open=hist_df["Open"],
+                high=hist_df["High"],
+                low=hist_df["Low"],
+                close=hist_df["Close"],
+                name=selected_symbol
+            )])
+            # Add volume
+            fig2.add_bar(x=hist_df["DateTime"], y=hist_df["Volume"], name="Volume", yaxis="y2")
+            fig2.update_layout(
+                title=f"{selected_symbol} Candlestick Chart",
+                yaxis_title="Price",
+                yaxis2=dict(title="Volume", overlaying="y", side="right", showgrid=False),
+                xaxis_rangeslider_visible=False
+            )
+            return {"hist_df": hist_df, "fig": fig2}
+
+        # Recently viewed symbols come straight from the shared chart cache
+        chart = get_chart_cache().get_or_compute(chart_key("NSE", token, "day", 120), build_stock_chart, "day")
+        fig2 = chart["fig"]
         st.plotly_chart(fig2, use_container_width=True)
 
     except Exception as e:
@@ -2,6 +2,7 @@
 import streamlit as st
 import pandas as pd
 import traceback
+from backend.orders import OrdersService
 
 def show():
     st.header("⏰ GTT & OCO Order Book — Definedge")
@@ -57,6 +58,32 @@ def show():
         csv = df.to_csv(index=False).encode("utf-8")
         st.download_button("⬇️ Download GTT/OCO orders (CSV)", csv, "gtt_oco_orders.csv", "text/csv")
 
+        # ---- Bulk actions on the filtered alerts ----
+        with st.expander(f"⚡ Bulk actions on the {len(df)} filtered alerts"):
+            c1, c2 = st.columns(2)
+            side = c1.selectbox("Side", ["All", "BUY", "SELL"], key="gtt_bulk_side")
+            products = sorted(df["product_type"].astype(str).unique()) if "product_type" in df.columns else []
+            product = c2.selectbox("Product", ["All"] + products, key="gtt_bulk_product")
+            c3, c4 = st.columns(2)
+            status_col = "order_status" if "order_status" in df.columns else "status"
+            status_opts = sorted(df[status_col].astype(str).str.upper().unique()) if status_col in df.columns else []
+            statuses = c3.multiselect("Status", status_opts, key="gtt_bulk_status")
+            min_age = c4.number_input("Older than (seconds)", min_value=0, value=0, step=30, key="gtt_bulk_age")
+            targets = OrdersService.select_orders(
+                df, side=None if side == "All" else side, product=None if product == "All" else product,
+                statuses=statuses, min_age_s=min_age,
+            )
+            st.caption(f"{len(targets)} alerts selected")
+            action = st.radio("Action", ["Cancel", "Move triggers"], horizontal=True, key="gtt_bulk_action")
+            pct = st.number_input("Move triggers and prices by %", value=1.0, step=0.5) if action == "Move triggers" else 0.0
+            if st.button(f"Run on {len(targets)} alerts", disabled=targets.empty):
+                osvc = OrdersService(client)
+                with st.spinner(f"{action} on {len(targets)} alerts..."):
+                    out = osvc.bulk_cancel_gtt(targets) if action == "Cancel" else osvc.bulk_modify_gtt(targets, trigger_pct=pct)
+                ok = int((out["results"]["status"] == "ok").sum())
+                st.success(f"✅ {ok}/{len(targets)} succeeded in {out['elapsed_s']:.2f}s")
+                st.dataframe(out["results"], use_container_width=True)
+
         # ---- Action buttons ----
         st.markdown("---")
         st.subheader("⚡ Order Actions")
@@ -1,9 +1,67 @@
 # pages/login.py
 import streamlit as st
-import pyotp
 from definedge_api import DefinedgeClient
+from backend.accounts import get_account_registry
+from backend.session import SessionError, SessionManager
 import traceback
 
+@st.cache_resource
+def account_registry():
+    # Process-level pool: every browser session on the same uid shares one client
+    return get_account_registry()
+
+def get_session_manager(api_token, api_secret, totp_secret):
+    # One manager per browser session; it owns the cached session and its renewal
+    if "session_manager" not in st.session_state:
+        st.session_state["session_manager"] = SessionManager(
+            api_token=api_token, api_secret=api_secret, totp_secret=totp_secret, client_factory=DefinedgeClient,
+        )
+    return st.session_state["session_manager"]
+
+def set_logged_in(mgr, client, how):
+    # The pool keeps the first session's client and manager for this uid; reuse them
+    old = st.session_state.pop("account_lease", None)
+    if old is not None:
+        old.release()
+    registry = account_registry()
+    lease = registry.lease(mgr.uid, client, mgr)
+    mgr = registry.manager(mgr.uid) or mgr
+    st.session_state["account_lease"] = lease
+    st.session_state["session_manager"] = mgr
+    st.session_state["api_session_key"] = mgr.api_session_key
+    st.session_state["susertoken"] = mgr.susertoken
+    st.session_state["uid"] = mgr.uid
+    st.session_state["client"] = lease.client
+    mgr.start_renewal()
+    st.success(f"✅ Logged in ({how}).")
+
+def restore_session():
+    # Cold start: reuse a cached session if the broker still accepts it (no OTP round trips)
+    if "client" in st.session_state or st.session_state.get("session_restore_tried"):
+        return
+    st.session_state["session_restore_tried"] = True
+    api_token = st.secrets.get("DEFINEDGE_API_TOKEN")
+    api_secret = st.secrets.get("DEFINEDGE_API_SECRET")
+    if not api_token or not api_secret:
+        return
+    registry = account_registry()
+    uid = registry.find(api_token)
+    pooled = registry.manager(uid) if uid else None
+    if pooled is not None:
+        # another session already holds this account: share its client, no broker calls
+        try:
+            set_logged_in(pooled, None, "shared session")
+            return
+        except KeyError:
+            pass   # released in the meantime
+    mgr = get_session_manager(api_token, api_secret, st.secrets.get("DEFINEDGE_TOTP_SECRET"))
+    try:
+        client = mgr.restore()
+    except SessionError:
+        return
+    if client is not None:
+        set_logged_in(mgr, client, "cached session")
+
 def show():
     st.header("🔐 Login — Definedge")
     st.write("App uses `.streamlit/secrets.toml` for API token/secret and optional TOTP secret.")
@@ -16,84 +74,45 @@ def show():
         st.error("Add DEFINEDGE_API_TOKEN and DEFINEDGE_API_SECRET to .streamlit/secrets.toml")
         return
 
+    mgr = get_session_manager(api_token, api_secret, totp_secret)
+    restore_session()
+
     col1, col2 = st.columns(2)
 
     with col1:
         st.subheader("Login with TOTP (automatic)")
         if st.button("Login (TOTP)"):
-            try:
-                client = DefinedgeClient(api_token=api_token, api_secret=api_secret)
-                # Step1
-                s1 = client.auth_step1()
-                otp_token = None
-                if isinstance(s1, dict):
-                    for k in ("otp_token","otpToken","request_token"):
-                        if k in s1:
-                            otp_token = s1.get(k)
-                            break
-                # generate TOTP
-                if not totp_secret:
-                    st.error("No TOTP secret found in secrets. Use manual OTP option.")
-                else:
-                    otp_code = pyotp.TOTP(totp_secret).now()
-                    s2 = client.auth_step2(otp_token or "", otp_code)
-                    # extract api_session_key
-                    api_session_key = s2.get("api_session_key") or s2.get("apiSessionKey") or s2.get("api_key") or s2.get("apiKey")
-                    susertoken = s2.get("susertoken") or s2.get("susertoken")
-                    uid = s2.get("uid") or s2.get("actid") or s2.get("user")
-                    if not api_session_key:
-                        st.error(f"Login failed — no api_session_key returned. Response: {s2}")
-                    else:
-                        st.session_state["api_session_key"] = api_session_key
-                        st.session_state["susertoken"] = susertoken
-                        st.session_state["uid"] = uid
-                        client.set_session_key(api_session_key)
-                        st.session_state["client"] = client
-                        st.success("✅ Logged in (TOTP).")
-            except Exception as e:
-                st.error(f"Login failed: {e}")
-                st.text(traceback.format_exc())
+            if not totp_secret:
+                st.error("No TOTP secret found in secrets. Use manual OTP option.")
+            else:
+                try:
+                    client = mgr.create_session(use_cache=False)
+                    set_logged_in(mgr, client, "TOTP")
+                except SessionError as e:
+                    st.error(f"Login failed: {e}")
+                    st.text(traceback.format_exc())
 
     with col2:
         st.subheader("Manual OTP (SMS) flow")
         if st.button("Request OTP (auth_step1)"):
             try:
-                c = DefinedgeClient(api_token=api_token, api_secret=api_secret)
-                r = c.auth_step1()
-                st.write("Step1 response (server):")
-                st.json(r)
+                # keep the otp_token: auth_step2 must use the one this OTP was sent for
+                st.session_state["otp_token"] = mgr.request_otp()
                 st.success("OTP requested. Check SMS.")
-            except Exception as e:
+            except SessionError as e:
                 st.error(f"Request OTP failed: {e}")
         otp = st.text_input("Paste OTP received (SMS)", key="otp_input")
         if st.button("Complete OTP login"):
-            try:
-                c = DefinedgeClient(api_token=api_token, api_secret=api_secret)
-                # we need otp_token possibly from previous step; if not available, pass empty
-                # For simplicity, call auth_step1 again to get otp_token
-                s1 = c.auth_step1()
-                otp_token = None
-                if isinstance(s1, dict):
-                    for k in ("otp_token","otpToken","request_token"):
-                        if k in s1:
-                            otp_token = s1.get(k)
-                            break
-                resp = c.auth_step2(otp_token or "", otp)
-                api_session_key = resp.get("api_session_key") or resp.get("apiSessionKey") or resp.get("api_key") or resp.get("apiKey")
-                susertoken = resp.get("susertoken")
-                uid = resp.get("uid") or resp.get("actid")
-                if not api_session_key:
-                    st.error(f"Login failed — response did not contain api_session_key: {resp}")
-                else:
-                    st.session_state["api_session_key"] = api_session_key
-                    st.session_state["susertoken"] = susertoken
-                    st.session_state["uid"] = uid
-                    c.set_session_key(api_session_key)
-                    st.session_state["client"] = c
-                    st.success("✅ Logged in (OTP).")
-            except Exception as e:
-                st.error(f"OTP login failed: {e}")
-                st.text(traceback.format_exc())
+            if "otp_token" not in st.session_state:
+                st.error("Request an OTP first.")
+            else:
+                try:
+                    client = mgr.create_session(otp_code=otp, otp_token=st.session_state["otp_token"] or "")
+                    st.session_state.pop("otp_token", None)
+                    set_logged_in(mgr, client, "OTP")
+                except SessionError as e:
+                    st.error(f"OTP login failed: {e}")
+                    st.text(traceback.format_exc())
 
     # show status
     st.markdown("---")
@@ -101,5 +120,18 @@ def show():
     if st.session_state.get("api_session_key"):
         st.write("UID:", st.session_state.get("uid"))
         st.write("Session key present.")
+        if mgr.issued_at:
+            left = mgr.renew_due() / 3600
+            st.caption(f"Renews in {left:.1f}h" if mgr.totp_secret else f"Expires in about {left + 1:.1f}h (no TOTP secret for renewal)")
+        if st.button("Log out and forget cached session"):
+            # other sessions on this account keep the pooled client until they log out too
+            lease = st.session_state.pop("account_lease", None)
+            if lease is not None:
+                lease.release()
+            if mgr.uid:
+                mgr.cache.clear(mgr.uid)
+            for k in ("client", "api_session_key", "susertoken", "uid", "session_manager"):
+                st.session_state.pop(k, None)
+            st.rerun()
     else:
         st.info("Not logged in yet.")
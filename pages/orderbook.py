@@ -2,6 +2,65 @@
 import streamlit as st
 import traceback
 import pandas as pd
+from backend.order_tracker import get_order_tracker
+from backend.orders import TERMINAL_STATUSES, OrdersService
+
+PAGE_SIZE = 50
+
+def get_order_store(client):
+    # This account's background tracker keeps its store current between reruns
+    return get_order_tracker(client).store
+
+def show_changes(changes):
+    if not changes:
+        st.info("No changes since the last refresh.")
+        return
+    new = sum(1 for c in changes if c["change"] == "new")
+    st.success(f"✅ {new} new, {len(changes) - new} updated orders")
+    updated = [
+        {"order_id": c["order_id"], "tradingsymbol": c["row"].get("tradingsymbol", ""),
+         "changes": ", ".join(f"{f}: {a} → {b}" for f, (a, b) in c["fields"].items())}
+        for c in changes if c["change"] == "updated"
+    ]
+    if updated:
+        st.dataframe(pd.DataFrame(updated), use_container_width=True)
+
+def show_bulk_actions(client, store):
+    # Filters run over the whole local book, not just the current page
+    book = store.frame()
+    open_statuses = [s for s in store.statuses() if s not in TERMINAL_STATUSES]
+    c1, c2, c3 = st.columns(3)
+    symbol = c1.text_input("Symbol contains", key="bulk_symbol").strip()
+    side = c2.selectbox("Side", ["All", "BUY", "SELL"], key="bulk_side")
+    products = sorted(book["product_type"].astype(str).unique()) if "product_type" in book.columns else []
+    product = c3.selectbox("Product", ["All"] + products, key="bulk_product")
+    c4, c5 = st.columns(2)
+    statuses = c4.multiselect("Status", store.statuses(), default=open_statuses, key="bulk_status")
+    min_age = c5.number_input("Older than (seconds)", min_value=0, value=0, step=30, key="bulk_age")
+    targets = OrdersService.select_orders(
+        book, symbol, None if side == "All" else side, None if product == "All" else product, statuses, min_age,
+    )
+    st.caption(f"{len(targets)} orders selected")
+    if targets.empty:
+        return
+    st.dataframe(targets, use_container_width=True)
+
+    action = st.radio("Action", ["Cancel", "Modify"], horizontal=True, key="bulk_action")
+    price_pct = trigger_pct = 0.0
+    if action == "Modify":
+        m1, m2 = st.columns(2)
+        price_pct = m1.number_input("Move price by %", value=0.0, step=0.5, key="bulk_price_pct")
+        trigger_pct = m2.number_input("Move trigger by %", value=0.0, step=0.5, key="bulk_trigger_pct")
+    if st.button(f"Run {action.lower()} on {len(targets)} orders"):
+        osvc = OrdersService(client)
+        with st.spinner(f"{action} {len(targets)} orders..."):
+            if action == "Cancel":
+                out = osvc.bulk_cancel(targets)
+            else:
+                out = osvc.bulk_modify(targets, price_pct=price_pct, trigger_pct=trigger_pct)
+        ok = int((out["results"]["status"] == "ok").sum())
+        st.success(f"✅ {ok}/{len(targets)} succeeded in {out['elapsed_s']:.2f}s")
+        st.dataframe(out["results"], use_container_width=True)
 
 def show():
     st.header("📑 Orderbook — Definedge (Manage by Symbol)")
@@ -11,97 +70,107 @@ def show():
         st.error("⚠️ Not logged in. Please login first from the Login page.")
         return
 
-    if st.button("🔄 Fetch Orderbook"):
+    store = get_order_store(client)
+    tracker = get_order_tracker(client)
+    st.caption(f"Live: following {len(tracker.tracked())} open orders ({tracker.polls} book polls so far)")
+    seen_key = f"orderbook_seen_{getattr(client, 'uid', '')}"
+    fetch = st.button("🔄 Fetch Orderbook")
+    if not tracker.polls:
         try:
-            resp = client.get_orders()   # calls /orders
-            if not resp:
-                st.warning("⚠️ API returned empty response")
-                return
-
-            status = resp.get("status")
-            orders = resp.get("orders", [])
-
-            if status != "SUCCESS":
-                st.error(f"❌ API returned error. Response: {resp}")
-                return
-
-            if not orders:
-                st.info("No orders found in orderbook today.")
-                return
-
-            df = pd.DataFrame(orders)
-            st.success(f"✅ Orderbook fetched ({len(df)} orders)")
-            st.dataframe(df, use_container_width=True)
-
-            # --- Manage Orders by Symbol ---
-            st.subheader("⚙️ Manage Orders by Symbol")
-            symbols = df["tradingsymbol"].unique().tolist() if "tradingsymbol" in df.columns else []
-            if not symbols:
-                st.info("⚠️ No tradingsymbol found in response to manage.")
-                return
-
-            selected_symbol = st.selectbox("Select a symbol to manage:", symbols)
-            symbol_orders = df[df["tradingsymbol"] == selected_symbol]
-
-            if symbol_orders.empty:
-                st.warning("⚠️ No orders found for this symbol")
-                return
-
-            st.write(f"📋 Orders for {selected_symbol}:")
-            for idx, order in symbol_orders.iterrows():
-                st.markdown("---")
-                st.write(f"**Order ID:** {order['order_id']}")
-                st.write(f"Exchange: {order.get('exchange', '')}, Type: {order.get('order_type', '')}, "
-                         f"Qty: {order.get('quantity', '')}, Price: {order.get('price', '')}, "
-                         f"Product: {order.get('product_type', '')}, Status: {order.get('status', '')}")
-
-                col1, col2 = st.columns(2)
-
-                # Cancel Button
-                with col1:
-                    if st.button(f"❌ Cancel {order['order_id']}"):
-                        try:
-                            cancel_resp = client.cancel_order(order_id=order['order_id'])
-                            st.write("🔎 Cancel API Response:", cancel_resp)
-                            if cancel_resp.get("status") == "SUCCESS":
-                                st.success(f"Order {order['order_id']} cancelled successfully ✅")
-                            else:
-                                st.error(f"Cancel failed: {cancel_resp}")
-                        except Exception as e:
-                            st.error(f"Cancel API failed: {e}")
-                            st.text(traceback.format_exc())
-
-                # Modify Form
-                with col2:
-                    with st.form(f"modify_form_{order['order_id']}"):
-                        st.write("✏️ Modify Order")
-                        new_price = st.text_input("New Price", str(order.get("price", "")), key=f"price_{order['order_id']}")
-                        new_qty = st.text_input("New Quantity", str(order.get("quantity", "")), key=f"qty_{order['order_id']}")
-                        submitted = st.form_submit_button("Update Order", key=f"submit_{order['order_id']}")
-
-                        if submitted:
-                            try:
-                                payload = {
-                                    "order_id": order['order_id'],
-                                    "exchange": order.get("exchange"),
-                                    "tradingsymbol": selected_symbol,
-                                    "order_type": order.get("order_type"),
-                                    "price": float(new_price) if new_price else None,
-                                    "quantity": int(new_qty) if new_qty else None,
-                                    "product_type": order.get("product_type", "NORMAL"),
-                                    "price_type": order.get("price_type", "LIMIT"),
-                                }
-                                modify_resp = client.modify_order(payload)
-                                st.write("🔎 Modify API Response:", modify_resp)
-                                if modify_resp.get("status") == "SUCCESS":
-                                    st.success(f"Order {order['order_id']} modified successfully ✅")
-                                else:
-                                    st.error(f"Modify failed: {modify_resp}")
-                            except Exception as e:
-                                st.error(f"Modify API failed: {e}")
-                                st.text(traceback.format_exc())
-
+            tracker.poll_once()   # first load only; the tracker polls on its own after that
         except Exception as e:
             st.error(f"Fetching orderbook failed: {e}")
             st.text(traceback.format_exc())
-            
+            return
+    if fetch or seen_key not in st.session_state:
+        # changes the tracker applied since this page last showed them; no extra /orders call
+        seq, changes = tracker.changes_since(st.session_state.get(seen_key, 0))
+        st.session_state[seen_key] = seq
+        show_changes(changes)
+
+    if not len(store):
+        st.info("No orders found in orderbook today.")
+        return
+
+    # --- Filters + pagination over the local store ---
+    col1, col2, col3 = st.columns(3)
+    search_symbol = col1.text_input("Search by Trading Symbol").strip()
+    statuses = col2.multiselect("Status", store.statuses())
+    side = col3.selectbox("Side", ["All", "BUY", "SELL"])
+    _, total = store.query(search_symbol, statuses, None if side == "All" else side, page_size=1)
+    pages = max(1, (total + PAGE_SIZE - 1) // PAGE_SIZE)
+    page = st.number_input(f"Page (1–{pages})", min_value=1, max_value=pages, value=1, step=1) - 1
+    df, total = store.query(search_symbol, statuses, None if side == "All" else side, page=page, page_size=PAGE_SIZE)
+    st.caption(f"{total} of {len(store)} orders match — showing {len(df)}")
+    st.dataframe(df, use_container_width=True)
+
+    with st.expander("⚡ Bulk cancel / modify by filter"):
+        show_bulk_actions(client, store)
+
+    # --- Manage Orders by Symbol (current page only) ---
+    st.subheader("⚙️ Manage Orders by Symbol")
+    symbols = df["tradingsymbol"].unique().tolist() if "tradingsymbol" in df.columns else []
+    if not symbols:
+        st.info("⚠️ No tradingsymbol found in response to manage.")
+        return
+
+    selected_symbol = st.selectbox("Select a symbol to manage:", symbols)
+    symbol_orders = df[df["tradingsymbol"] == selected_symbol]
+
+    if symbol_orders.empty:
+        st.warning("⚠️ No orders found for this symbol")
+        return
+
+    st.write(f"📋 Orders for {selected_symbol}:")
+    for idx, order in symbol_orders.iterrows():
+        st.markdown("---")
+        st.write(f"**Order ID:** {order['order_id']}")
+        st.write(f"Exchange: {order.get('exchange', '')}, Type: {order.get('order_type', '')}, "
+                 f"Qty: {order.get('quantity', '')}, Price: {order.get('price', '')}, "
+                 f"Product: {order.get('product_type', '')}, Status: {order.get('order_status', order.get('status', ''))}")
+
+        col1, col2 = st.columns(2)
+
+        # Cancel Button
+        with col1:
+            if st.button(f"❌ Cancel {order['order_id']}"):
+                try:
+                    cancel_resp = client.cancel_order(order['order_id'])
+                    st.write("🔎 Cancel API Response:", cancel_resp)
+                    if cancel_resp.get("status") == "SUCCESS":
+                        st.success(f"Order {order['order_id']} cancelled successfully ✅")
+                    else:
+                        st.error(f"Cancel failed: {cancel_resp}")
+                except Exception as e:
+                    st.error(f"Cancel API failed: {e}")
+                    st.text(traceback.format_exc())
+
+        # Modify Form
+        with col2:
+            with st.form(f"modify_form_{order['order_id']}"):
+                st.write("✏️ Modify Order")
+                new_price = st.text_input("New Price", str(order.get("price", "")), key=f"price_{order['order_id']}")
+                new_qty = st.text_input("New Quantity", str(order.get("quantity", "")), key=f"qty_{order['order_id']}")
+                submitted = st.form_submit_button("Update Order", key=f"submit_{order['order_id']}")
+
+                if submitted:
+                    try:
+                        payload = {
+                            "order_id": order['order_id'],
+                            "exchange": order.get("exchange"),
+                            "tradingsymbol": selected_symbol,
+                            "order_type": order.get("order_type"),
+                            "price": float(new_price) if new_price else None,
+                            "quantity": int(new_qty) if new_qty else None,
+                            "product_type": order.get("product_type", "NORMAL"),
+                            "price_type": order.get("price_type", "LIMIT"),
+                        }
+                        modify_resp = client.modify_order(payload)
+                        st.write("🔎 Modify API Response:", modify_resp)
+                        if modify_resp.get("status") == "SUCCESS":
+                            st.success(f"Order {order['order_id']} modified successfully ✅")
+                        else:
+                            st.error(f"Modify failed: {modify_resp}")
+                    except Exception as e:
+                        st.error(f"Modify API failed: {e}")
+                        st.text(traceback.format_exc())
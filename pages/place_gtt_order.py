@@ -1,6 +1,7 @@
 # pages/place_gtt_order.py
 import streamlit as st
 import traceback
+from backend.validator import get_validator
 
 def show_place_gtt_order():
     st.header("📌 Place GTT Order — Definedge")
@@ -45,6 +46,11 @@ def show_place_gtt_order():
         if remarks:
             payload["remarks"] = remarks
 
+        payload, errors = get_validator(client).check(payload, check_bands=False)
+        if errors:
+            st.error("❌ Rejected before sending: " + "; ".join(errors))
+            return
+
         if debug:
             st.write("🔎 Debug: payload to send")
             st.json(payload)
@@ -1,6 +1,7 @@
 # pages/place_oco_order.py
 import streamlit as st
 import traceback
+from backend.validator import get_validator
 
 def show_place_oco_order():
     st.header("🎯 Place OCO Order — Definedge")
@@ -44,6 +45,11 @@ def show_place_oco_order():
         if remarks:
             payload["remarks"] = remarks
 
+        payload, errors = get_validator(client).check(payload, check_bands=False)
+        if errors:
+            st.error("❌ Rejected before sending: " + "; ".join(errors))
+            return
+
         if debug:
             st.write("🔎 Debug: Payload to send")
             st.json(payload)
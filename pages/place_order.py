@@ -1,40 +1,32 @@
 # pages/place_order.py
 import streamlit as st
-import pandas as pd
-import io
-import zipfile
-import requests
 import time
-
-MASTER_URL = "https://app.definedgesecurities.com/public/allmaster.zip"
-MASTER_FILE = "data/master/allmaster.csv"
+import numpy as np
+import pandas as pd
+import scripts.update_master as um
+from backend.accounts import account_state
+from backend.chain import get_chain_index
+from backend.margin import get_margin_service
+from backend.master import get_master
+from backend.orders import SLICE_SCHEDULES, OrdersService
+from backend.order_tracker import get_order_tracker
+from backend.outbox import get_outbox
+from backend.symbol_search import get_search_index
+from backend.validator import get_validator
 
 # ---- Load or update master file ----
 def download_and_extract_master():
-    try:
-        r = requests.get(MASTER_URL)
-        r.raise_for_status()
-        with zipfile.ZipFile(io.BytesIO(r.content)) as z:
-            # Assuming first CSV in zip is the master
-            csv_name = z.namelist()[0]
-            with z.open(csv_name) as f:
-                df = pd.read_csv(f, header=None)
-        df.columns = ["SEGMENT","TOKEN","SYMBOL","TRADINGSYM","INSTRUMENT","EXPIRY",
-                      "TICKSIZE","LOTSIZE","OPTIONTYPE","STRIKE","PRICEPREC","MULTIPLIER","ISIN","PRICEMULT","COMPANY"]
-        # Save locally
-        import os
-        os.makedirs("data/master", exist_ok=True)
-        df.to_csv(MASTER_FILE, index=False)
-        return df
-    except Exception as e:
-        st.error(f"Failed to download master file: {e}")
-        return pd.DataFrame()
+    success, msg = um.download_and_extract()
+    if not success:
+        st.error(msg)
+        return None
+    return get_master()
 
 def load_master_symbols():
+    # Shared memory-mapped master; built from the CSV on first use
     try:
-        df = pd.read_csv(MASTER_FILE)
-        return df
-    except:
+        return get_master()
+    except Exception:
         return download_and_extract_master()
 
 # ---- Fetch LTP ----
@@ -45,6 +37,114 @@ def fetch_ltp(client, exchange, token):
     except:
         return 0.0
 
+# ---- Option chain picker (underlying -> expiry -> strike around ATM -> CE/PE) ----
+def pick_from_chain(master, exchange):
+    chain = get_chain_index(master, exchange)
+    c1, c2, c3, c4 = st.columns(4)
+    underlying = c1.selectbox("Underlying", chain.underlyings())
+    expiries = chain.expiries(underlying)
+    if not expiries:
+        st.info("No live expiries for this underlying.")
+        return None
+    expiry = c2.selectbox("Expiry", expiries)
+    option_type = c3.radio("Type", ["CE", "PE", "FUT"], horizontal=True)
+    if option_type == "FUT":
+        fut = chain.future(underlying, expiry)
+        return fut["TRADINGSYM"] if fut else None
+    spot = c4.number_input("Spot / ATM reference", min_value=0.0, value=0.0, step=1.0)
+    strikes = chain.strikes_around(underlying, expiry, spot, n=5, option_type=option_type) if spot else chain.strikes(underlying, expiry, option_type)
+    if not len(strikes):
+        return None
+    default = int(np.searchsorted(strikes, chain.nearest_strike(underlying, expiry, spot, option_type))) if spot else 0
+    strike = st.selectbox("Strike", strikes.tolist(), index=default)
+    row = chain.option(underlying, expiry, strike, option_type)
+    return row["TRADINGSYM"] if row else None
+
+# ---- Margin: one span_calculator call per basket, memoized per account across sessions ----
+def show_margin(container, client, legs):
+    try:
+        m = get_margin_service(client, account_state(client)).check(legs)
+    except Exception as e:
+        container.warning(f"Margin check unavailable: {e}")
+        return None
+    src = "cached" if m["cached"] else f"{m['elapsed_ms']:.0f} ms"
+    text = f"🧮 Required margin: ₹{m['total']:,.2f} (SPAN ₹{m['span']:,.2f} + exposure ₹{m['exposure']:,.2f}"
+    text += f" + cash ₹{m['cash']:,.2f}) — {src}" if m["cash"] else f") — {src}"
+    if m["ok"]:
+        container.info(text)
+    else:
+        container.error(f"{text}. Short by ₹{m['shortfall']:,.2f}")
+    return m
+
+# ---- Basket: many legs validated locally, submitted concurrently, tracked to fill ----
+BASKET_COLUMNS = ["exchange", "tradingsymbol", "side", "quantity", "price_type", "product_type", "price", "trigger_price"]
+
+def resolve_tokens(master, specs):
+    # The editor has no token column: fill it from the master so margin and orders carry it
+    unknown = []
+    for spec in specs:
+        rec = master.lookup_symbol(str(spec["exchange"]).strip(), str(spec["tradingsymbol"]).strip())
+        if rec is None:
+            unknown.append(f"{spec['exchange']}:{spec['tradingsymbol']}")
+        else:
+            spec["token"] = str(rec["TOKEN"])
+    return unknown
+
+def show_basket(client, master):
+    template = pd.DataFrame([{"exchange": "NSE", "tradingsymbol": "", "side": "BUY", "quantity": 1,
+                              "price_type": "MARKET", "product_type": "CNC", "price": 0.0, "trigger_price": 0.0}],
+                            columns=BASKET_COLUMNS)
+    legs = st.data_editor(template, num_rows="dynamic", use_container_width=True, key="basket_editor")
+    track = st.checkbox("Track fills after submit", value=True)
+    specs = [r for r in legs.fillna({"price": 0.0, "trigger_price": 0.0}).to_dict("records") if str(r.get("tradingsymbol") or "").strip()]
+    unknown = resolve_tokens(master, specs)
+    if unknown:
+        st.error("❌ Not in the instrument master: " + ", ".join(unknown))
+        specs = [s for s in specs if s.get("token")]
+    margin = show_margin(st.empty(), client, specs) if specs else None
+    short = margin is not None and not margin["ok"]
+    override = short and st.checkbox("Submit even if margin is short")
+    if st.button("🧺 Submit basket"):
+        if not specs:
+            st.warning("Add at least one leg.")
+            return
+        if unknown:
+            st.error("❌ Fix or remove the legs not found in the instrument master.")
+            return
+        if short and not override:
+            st.error("❌ Not enough margin for this basket.")
+            return
+        t0 = time.perf_counter()
+        with st.spinner(f"Submitting {len(specs)} legs..."):
+            table = OrdersService(client).place_basket(specs, track=track)
+        st.caption(f"Basket finished in {time.perf_counter() - t0:.2f}s")
+        st.dataframe(table, use_container_width=True)
+
+# ---- Sliced orders working in the background (TWAP / iceberg) ----
+def show_sliced_jobs():
+    jobs = st.session_state.get("sliced_jobs") or []
+    if not jobs:
+        return
+    st.subheader("⏱️ Sliced orders")
+    for i, job in enumerate(jobs):
+        p = job.progress()
+        label = f"{job.spec['tradingsymbol']} {job.spec['side']} {job.spec['quantity']} ({job.schedule}): {p['sent']}/{p['total']} children sent"
+        st.progress(p["sent"] / max(p["total"], 1), text=label)
+        if p["error"]:
+            st.error(f"❌ {p['error']}")
+        elif p["done"]:
+            st.json(job.result["parent"])
+        elif not p["cancelled"] and st.button("Stop sending", key=f"sliced_cancel_{i}"):
+            job.cancel()
+        if not p["children"].empty:
+            st.dataframe(p["children"], use_container_width=True)
+    c1, c2 = st.columns(2)
+    if c1.button("🔄 Refresh progress"):
+        st.rerun()
+    if c2.button("Clear finished"):
+        st.session_state["sliced_jobs"] = [j for j in jobs if not j.done]
+        st.rerun()
+
 # ---- Place order page ----
 def show_place_order():
     st.header("🛒 Place Order — Definedge")
@@ -54,23 +154,26 @@ def show_place_order():
         st.error("⚠️ Not logged in. Please login first from Login page.")
         return
 
-    df_symbols = load_master_symbols()
+    master = load_master_symbols()
+    if master is None:
+        return
 
     # ---- Exchange selection ----
     exchange = st.radio("Exchange", ["NSE", "BSE", "NFO", "MCX"], index=0)
 
-    # Filter master for selected exchange
-    df_exch = df_symbols[df_symbols["SEGMENT"] == exchange]
-
-    # ---- Trading Symbol selection ----
+    # ---- Trading Symbol search + selection (only the top matches go to the browser) ----
+    query = st.text_input("Search symbol / company", value="")
+    hits = get_search_index(master, exchange).search(query, k=15) if query.strip() else []
     selected_symbol = st.selectbox(
         "Trading Symbol",
-        df_exch["TRADINGSYM"].tolist()
+        [h["TRADINGSYM"] for h in hits]
     )
+    if exchange in ("NFO", "MCX") and st.checkbox("Pick from option chain"):
+        selected_symbol = pick_from_chain(master, exchange) or selected_symbol
 
     # Get token for LTP
-    token_row = df_exch[df_exch["TRADINGSYM"] == selected_symbol]
-    token = int(token_row["TOKEN"].values[0]) if not token_row.empty else None
+    token_row = master.lookup_symbol(exchange, selected_symbol) if selected_symbol else None
+    token = int(token_row["TOKEN"]) if token_row else None
 
     # ---- Initial LTP fetch (set price once) ----
     initial_ltp = fetch_ltp(client, exchange, token) if token else 0.0
@@ -81,9 +184,8 @@ def show_place_order():
     cash_container = st.empty()
     margin_container = st.empty()
 
-    # ---- Fetch user limits ----
-    limits = client.api_get("/limits")
-    cash_available = float(limits.get("cash", 0.0))
+    # ---- Fetch user limits (cached briefly by the margin service) ----
+    cash_available = get_margin_service(client, account_state(client)).available() or 0.0
     cash_container.info(f"💰 Cash Available: ₹{cash_available:,.2f}")
 
     # ---- Order form ----
@@ -98,8 +200,16 @@ def show_place_order():
         trigger_price = st.number_input("Trigger Price (for SL orders)", min_value=0.0, step=0.05, value=0.0)
         validity = st.selectbox("Validity", ["DAY", "IOC", "EOS"], index=0)
         remarks = st.text_input("Remarks (optional)", "")
+        slice_schedule = st.selectbox("Slicing above freeze quantity (F&O)", list(SLICE_SCHEDULES), index=0)
         submitted = st.form_submit_button("🚀 Place Order")
 
+    # ---- Margin for the order as entered ----
+    if selected_symbol:
+        show_margin(margin_container, client, [{
+            "exchange": exchange, "tradingsymbol": selected_symbol, "token": str(token or ""),
+            "side": order_type, "quantity": int(quantity), "product_type": product_type, "price": price_input,
+        }])
+
     # ---- Auto-refresh LTP ----
     if token:
         for i in range(1):  # only one refresh on page load, further can use while loop in async or callback
@@ -113,6 +223,34 @@ def show_place_order():
         if place_by == "Amount" and amount > 0 and initial_ltp > 0:
             quantity = int(amount // initial_ltp)
 
+        # F&O orders above the freeze quantity go out as lot-aligned child orders
+        if exchange in ("NFO", "MCX"):
+            spec = {
+                "exchange": exchange, "tradingsymbol": selected_symbol, "token": str(token or ""),
+                "side": order_type, "quantity": int(quantity), "price_type": price_type,
+                "product_type": product_type, "price": price_input, "trigger_price": trigger_price,
+                "validity": validity, "remarks": remarks,
+            }
+            osvc = OrdersService(client)
+            try:
+                children = osvc.slice_spec(spec, master)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                return
+            if len(children) > 1:
+                st.info(f"Quantity {int(quantity)} is above the freeze limit: sending {len(children)} child orders ({slice_schedule}).")
+                if slice_schedule == "parallel":
+                    with st.spinner("Placing child orders..."):
+                        result = osvc.place_sliced(spec, schedule=slice_schedule, master=master)
+                    st.json(result["parent"])
+                    st.dataframe(result["children"], use_container_width=True)
+                else:
+                    # paced schedules run in the background; progress is shown below
+                    st.session_state.setdefault("sliced_jobs", []).append(
+                        osvc.start_sliced(spec, schedule=slice_schedule, master=master))
+                    show_sliced_jobs()
+                return
+
         payload = {
             "exchange": exchange,
             "tradingsymbol": selected_symbol,
@@ -128,14 +266,38 @@ def show_place_order():
         if remarks:
             payload["remarks"] = remarks
 
-        st.write("📦 Sending payload:")
+        payload, errors = get_validator(client).check(payload)
+        if errors:
+            st.error("❌ Rejected before sending: " + "; ".join(errors))
+            return
+
+        st.write("📦 Queued payload:")
         st.json(payload)
 
-        resp = client.place_order(payload)
-        st.write("📬 API Response:")
-        st.json(resp)
+        # Durable outbox: background workers send it, so a rerun or disconnect cannot lose it
+        get_order_tracker(client)   # follows the order once the outbox has an order_id
+        outbox = get_outbox(client)
+        intent = outbox.enqueue(payload)
+        intent = outbox.wait(intent["key"], 0.5) or intent   # most orders are acknowledged by now
+        if intent["status"] in ("placed", "exists"):
+            st.success(f"✅ Order placed successfully. Order ID: {intent['order_id']}")
+        elif intent["status"] in ("rejected", "failed", "unknown"):
+            st.error(f"❌ Order placement failed: {intent['error']}")
+        else:
+            st.info(f"⏳ Order queued (intent {intent['key']}); see Recent submissions below.")
+
+    # ---- Sliced orders in progress ----
+    show_sliced_jobs()
 
-        if resp.get("status") == "SUCCESS":
-            st.success(f"✅ Order placed successfully. Order ID: {resp.get('order_id')}")
+    # ---- Outbox status ----
+    with st.expander("📤 Recent submissions"):
+        recent = get_outbox(client).frame(limit=20)
+        if recent.empty:
+            st.caption("Nothing submitted yet.")
         else:
-            st.error(f"❌ Order placement failed. Response: {resp}")
+            st.dataframe(recent[["key", "kind", "status", "attempts", "order_id", "error"]], use_container_width=True)
+
+    # ---- Basket orders ----
+    st.markdown("---")
+    with st.expander("🧺 Basket order (many legs at once)"):
+        show_basket(client, master)
@@ -0,0 +1,67 @@
+# pages/rs_scanner.py
+import streamlit as st
+import time
+import traceback
+from backend.bars import BarStore
+from backend.master import get_master, segment_tokens
+from backend.rs import RelativeStrengthEngine
+
+def load_master_df():
+    return get_master().frame()
+
+def show():
+    st.header("🏁 Relative Strength Scanner — Universe vs Index")
+
+    client = st.session_state.get("client")
+    if not client:
+        st.error("⚠️ Not logged in. Please login first from the Login page.")
+        st.stop()
+
+    df_master = load_master_df()
+    bars = BarStore(client)
+
+    segment = st.selectbox("Universe segment", sorted(df_master["SEGMENT"].unique()), index=0)
+    instrument = st.text_input("Instrument type filter (blank = all)", value="EQ").strip() or None
+
+    index_candidates = df_master[
+        df_master["INSTRUMENT"].astype(str).str.contains("INDEX", case=False, na=False)
+    ].drop_duplicates("TRADINGSYM")
+    if index_candidates.empty:
+        index_candidates = df_master.drop_duplicates("TRADINGSYM")
+    index_symbol = st.selectbox("Index", index_candidates["TRADINGSYM"].tolist())
+    index_row = index_candidates[index_candidates["TRADINGSYM"] == index_symbol].iloc[0]
+
+    col1, col2, col3 = st.columns(3)
+    sma_period = col1.number_input("RS SMA Period", min_value=2, max_value=55, value=20, step=1)
+    lookback = col2.number_input("RS rank lookback (bars)", min_value=5, max_value=250, value=55, step=1)
+    days = col3.number_input("Days of history to cache", min_value=60, max_value=800, value=250, step=10)
+
+    universe = segment_tokens(df_master, segment, instrument)
+    st.caption(f"{len(universe)} instruments in universe")
+
+    if st.button("🔄 Refresh cached bars"):
+        t0 = time.perf_counter()
+        with st.spinner("Fetching bars..."):
+            ok = bars.refresh(segment, universe["TOKEN"].tolist(), days=int(days))
+            bars.fetch(index_row["SEGMENT"], str(index_row["TOKEN"]), days=int(days))
+        st.success(f"Cached {sum(ok.values())}/{len(ok)} instruments in {time.perf_counter() - t0:.1f}s")
+
+    if st.button("🏁 Run RS scan"):
+        try:
+            t0 = time.perf_counter()
+            engine = RelativeStrengthEngine(bars)
+            table = engine.scan(
+                df_master, segment, index_row["SEGMENT"], str(index_row["TOKEN"]),
+                sma_period=int(sma_period), lookback=int(lookback), instrument=instrument,
+            )
+            elapsed = time.perf_counter() - t0
+            if table.empty:
+                st.warning("No cached bars to scan. Use 'Refresh cached bars' first.")
+                return
+            st.success(f"✅ Ranked {len(table)} instruments in {elapsed:.2f}s")
+            st.dataframe(table, use_container_width=True)
+            csv = table.to_csv(index=False).encode("utf-8")
+            st.download_button("⬇️ Download RS scan (CSV)", csv, f"rs_scan_{segment}_vs_{index_symbol}.csv", "text/csv")
+        except Exception as e:
+            st.error(f"RS scan failed: {e}")
+            st.text(traceback.format_exc())
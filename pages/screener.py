@@ -0,0 +1,64 @@
+# pages/screener.py
+import streamlit as st
+import time
+import traceback
+from backend.bars import BarStore
+from backend.master import get_master
+from backend.screener import FILTERS, ScreenerEngine
+
+def load_master_df():
+    return get_master().frame()
+
+def show():
+    st.header("🔍 Screener — NSE Universe")
+
+    client = st.session_state.get("client")
+    if not client:
+        st.error("⚠️ Not logged in. Please login first from the Login page.")
+        st.stop()
+
+    df_master = load_master_df()
+
+    segment = st.selectbox("Universe segment", sorted(df_master["SEGMENT"].unique()), index=0)
+    instrument = st.text_input("Instrument type filter (blank = all)", value="EQ").strip() or None
+
+    index_candidates = df_master[
+        df_master["INSTRUMENT"].astype(str).str.contains("INDEX", case=False, na=False)
+    ].drop_duplicates("TRADINGSYM")
+    index_symbol = st.selectbox("RS index", ["(none)"] + index_candidates["TRADINGSYM"].tolist())
+    index_row = None
+    if index_symbol != "(none)":
+        index_row = index_candidates[index_candidates["TRADINGSYM"] == index_symbol].iloc[0]
+
+    named = st.multiselect("Filters", list(FILTERS.keys()), default=["ema_aligned"])
+    custom = st.text_area(
+        "Custom filter expressions (one per line, pandas query syntax)",
+        value="",
+        help="Columns: close, ema_10/20/50/100/200, volume, vol_sma_20, vol_ratio, high_52w, low_52w, "
+             "pct_from_52w_high, RS, RS_SMA, `RS_vs_SMA_%`, rs_change, rs_rank",
+    )
+    rank_by = st.selectbox("Rank by", ["rs_change", "rs_rank", "vol_ratio", "pct_from_52w_high", "RS_vs_SMA_%"], index=0)
+    workers = st.number_input("Worker processes", min_value=1, max_value=64, value=ScreenerEngine(BarStore()).max_workers, step=1)
+
+    if st.button("🔍 Run screen"):
+        filters = named + [line for line in custom.splitlines() if line.strip()]
+        try:
+            t0 = time.perf_counter()
+            engine = ScreenerEngine(BarStore(client), max_workers=int(workers))
+            result = engine.run(
+                df_master, segment, filters,
+                index_segment=index_row["SEGMENT"] if index_row is not None else None,
+                index_token=str(index_row["TOKEN"]) if index_row is not None else None,
+                rank_by=rank_by, instrument=instrument,
+            )
+            elapsed = time.perf_counter() - t0
+            if result.empty:
+                st.info("No instruments matched (or no cached bars — refresh them from the RS Scanner page).")
+                return
+            st.success(f"✅ {len(result)} matches in {elapsed:.2f}s using {int(workers)} workers")
+            st.dataframe(result, use_container_width=True)
+            csv = result.to_csv(index=False).encode("utf-8")
+            st.download_button("⬇️ Download results (CSV)", csv, f"screen_{segment}.csv", "text/csv")
+        except Exception as e:
+            st.error(f"Screen failed: {e}")
+            st.text(traceback.format_exc())
@@ -0,0 +1,46 @@
+"""
+Latency percentiles from the order journal (data/journal/orders-YYYYMMDD.jsonl).
+
+Example:
+    python -m scripts.journal_report --from 20261001 --to 20261019 --by endpoint hour
+Prints submit-to-ack percentiles per group, then submit-to-fill percentiles per order type.
+"""
+import argparse
+
+import pandas as pd
+
+from backend.journal import JOURNAL_DIR, latency_report, load_journal
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Order latency report")
+    ap.add_argument("--root", default=JOURNAL_DIR)
+    ap.add_argument("--from", dest="start", help="first day, YYYYMMDD")
+    ap.add_argument("--to", dest="end", help="last day, YYYYMMDD")
+    ap.add_argument("--by", nargs="+", default=["endpoint", "order_type"],
+                    choices=["endpoint", "order_type", "hour", "pid"])
+    ap.add_argument("--csv", help="also write the ack report to this CSV file")
+    args = ap.parse_args()
+
+    df = load_journal(args.root, args.start, args.end)
+    if df.empty:
+        print("no journal entries found")
+        return
+    pd.set_option("display.width", 200)
+    acks = latency_report(df, args.by)
+    print(f"submit -> ack latency (ms), {len(df)} entries")
+    print(acks.to_string(index=False))
+    if args.csv:
+        acks.to_csv(args.csv, index=False)
+
+    fills = df[df["event"] == "fill"]
+    if not fills.empty:
+        # fills carry the order_id only; take the order type from the matching ack
+        kinds = df.loc[df["event"] == "ack", ["order_id", "order_type"]].dropna().drop_duplicates("order_id")
+        fills = fills.drop(columns=["order_type"], errors="ignore").merge(kinds, on="order_id", how="left")
+        print("\nsubmit -> fill latency (ms)")
+        print(latency_report(fills, ["order_type", "status"], value="fill_ms").to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Run a stop-loss / target-percentage sweep over cached bars from the command line.
+
+Example:
+    python -m scripts.sweep_ladder --segment NSE --sl -1 -2 -3 --targets 5,10,15 10,20,30,40 --workers 1 2 4 8
+Passing several --workers values repeats the sweep per core count to compare throughput.
+"""
+import argparse
+
+from backend.bars import BarStore
+from backend.master import load_master, segment_tokens
+from backend.sweep import ParameterSweep
+
+
+def main():
+    ap = argparse.ArgumentParser(description="GTT ladder parameter sweep")
+    ap.add_argument("--segment", default="NSE")
+    ap.add_argument("--instrument", default="EQ")
+    ap.add_argument("--timeframe", default="day")
+    ap.add_argument("--sl", type=float, nargs="+", default=[-1.0, -2.0, -3.0, -5.0])
+    ap.add_argument("--targets", nargs="+", default=["10,20,30,40"], help="comma separated target %% sets")
+    ap.add_argument("--max-hold", type=int, nargs="+", default=[60])
+    ap.add_argument("--entry-step", type=int, default=1)
+    ap.add_argument("--workers", type=int, nargs="+", default=[None])
+    args = ap.parse_args()
+
+    tokens = segment_tokens(load_master(), args.segment, args.instrument)["TOKEN"].tolist()
+    target_sets = [[float(x) for x in t.split(",") if x.strip()] for t in args.targets]
+    for workers in args.workers:
+        sweep = ParameterSweep(BarStore(), max_workers=workers)
+        summary = sweep.run(
+            args.segment, tokens, args.sl, target_sets, args.max_hold,
+            timeframe=args.timeframe, entry_step=args.entry_step,
+        )
+        print(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,120 @@
-import requests
-import zipfile
+import csv
 import io
+import json
 import os
+import tempfile
+import zipfile
+from datetime import datetime
+
+import requests
+
+from backend import master as master_module
+from backend.master import MASTER_COLUMNS, MASTER_DIR, MASTER_FILE
+from backend.master_diff import rebuild_with_diff
 
 MASTER_LINK = "https://app.definedgesecurities.com/public/allmaster.zip"
-DEST_DIR = "data/master/"
+DEST_DIR = MASTER_DIR + "/"
+META_FILE = os.path.join(MASTER_DIR, "allmaster.meta.json")
+CHUNK_SIZE = 64 * 1024
+
+
+def _load_meta():
+    try:
+        with open(META_FILE, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_meta(meta):
+    tmp = META_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, META_FILE)
+
 
-def download_and_extract():
+def _download(dest, headers):
+    """
+    Stream the zip into an open binary file. Returns the response headers,
+    or None when the server reports the copy we have is current (304).
+    """
+    with requests.get(MASTER_LINK, stream=True, timeout=30, headers=headers) as resp:
+        if resp.status_code == 304:
+            return None
+        resp.raise_for_status()
+        for chunk in resp.iter_content(CHUNK_SIZE):
+            if chunk:
+                dest.write(chunk)
+        return resp.headers
+
+
+def _extract_normalised(zip_path, out_path):
+    """
+    Stream the first CSV member out of the zip row by row, trimming fields to the
+    MASTER_COLUMNS layout and writing it with a header row. Returns the row count.
+    """
+    rows = 0
+    with zipfile.ZipFile(zip_path) as z:
+        member = next((n for n in z.namelist() if n.lower().endswith(".csv")), z.namelist()[0])
+        with z.open(member) as raw, open(out_path, "w", newline="", encoding="utf-8") as out:
+            reader = csv.reader(io.TextIOWrapper(raw, encoding="utf-8", errors="replace", newline=""))
+            writer = csv.writer(out)
+            writer.writerow(MASTER_COLUMNS)
+            width = len(MASTER_COLUMNS)
+            for row in reader:
+                if not row or not any(f.strip() for f in row):
+                    continue
+                if row[0].strip().upper() == "SEGMENT":
+                    continue
+                row = [f.strip() for f in row[:width]]
+                row += [""] * (width - len(row))
+                writer.writerow(row)
+                rows += 1
+    return rows
+
+
+def download_and_extract(force=False):
     """
     Downloads the master zip file from Definedge and extracts it to DEST_DIR.
+    The zip is streamed to disk, the download is skipped when the server copy is
+    unchanged (ETag / Last-Modified), and the normalised CSV replaces the live file
+    atomically so readers never see a partial master.
     Returns a tuple: (success: bool, message: str)
     """
     os.makedirs(DEST_DIR, exist_ok=True)
+    meta = _load_meta()
+    headers = {}
+    if not force and os.path.exists(MASTER_FILE):
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    zip_fd, zip_path = tempfile.mkstemp(prefix=".allmaster_", suffix=".zip", dir=DEST_DIR)
+    csv_fd, csv_path = tempfile.mkstemp(prefix=".allmaster_", suffix=".csv", dir=DEST_DIR)
+    os.close(csv_fd)
     try:
-        resp = requests.get(MASTER_LINK, stream=True, timeout=30)
-        resp.raise_for_status()
-        z = zipfile.ZipFile(io.BytesIO(resp.content))
-        z.extractall(DEST_DIR)
-        return True, "✅ Master file updated successfully!"
+        with os.fdopen(zip_fd, "wb") as zf:
+            resp_headers = _download(zf, headers)
+        if resp_headers is None:
+            return True, "✅ Master file already up to date (server copy unchanged)."
+        rows = _extract_normalised(zip_path, csv_path)
+        # swap and rebuild as one step so a concurrent get_master() cannot rebuild in between
+        with master_module._master_lock:
+            os.replace(csv_path, MASTER_FILE)
+            diff = rebuild_with_diff(MASTER_FILE)
+        _save_meta({
+            "etag": resp_headers.get("ETag"),
+            "last_modified": resp_headers.get("Last-Modified"),
+            "rows": rows,
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+        })
+        return True, (f"✅ Master file updated successfully! ({rows:,} instruments; "
+                      f"{len(diff['added']):,} added, {len(diff['removed']):,} expired, "
+                      f"{len(diff['retokenised']):,} re-tokenised, {len(diff['changed']):,} changed)")
     except Exception as e:
         return False, f"Failed to update master file: {e}"
-        
+    finally:
+        for p in (zip_path, csv_path):
+            if os.path.exists(p):
+                os.remove(p)